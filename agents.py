@@ -4,34 +4,66 @@ This module contains the setup for all agents used in the research pipeline.
 """
 
 from autogen_agentchat.agents import AssistantAgent
+from autogen_agentchat.base import Response
+from autogen_agentchat.messages import BaseChatMessage, TextMessage
+from autogen_core import CancellationToken
+from autogen_core.model_context import UnboundedChatCompletionContext
+from autogen_core.models import LLMMessage, UserMessage
+from autogen_core.tools import FunctionTool
 from autogen_ext.models.openai import OpenAIChatCompletionClient
 import os
-from dotenv import load_dotenv
+import threading
+from typing import AsyncGenerator, Dict, List, Optional, Sequence, Tuple, Union
 from constants import (
     OPENAI_MODEL,
     OPENAI_MODEL2,
     OPENAI_API_KEY_ENV,
     OPENROUTER_BASE_URL,
+    MODEL_FALLBACKS,
+    MODEL_TIMEOUTS,
     ARXIV_RESEARCH_AGENT_NAME,
     SUMMARIZER_AGENT_NAME,
+    ARXIV_SEARCH_TOOL_NAME,
+    DEFAULT_MAX_RESULTS,
+    SUMMARIZER_STREAMING,
 )
 from prompts import (
     ARXIV_RESEARCH_AGENT_SYSTEM_MESSAGE,
     SUMMARIZER_AGENT_SYSTEM_MESSAGE,
 )
+from packing import pack_paper_message
+from paper import Paper, dumps, papers_from_json
+from metrics import REGISTRY
+from routing import RoutedModelClient
+from query_planner import search_papers
+from utils import get_summary_cache, summary_cache_key
+import logging
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
+# Process-wide pool of model clients keyed by (model, base_url). Each client
+# owns an HTTP connection pool, so sharing them lets every request reuse
+# already-open sockets and TLS sessions.
+_model_client_pool: Dict[Tuple[str, str], RoutedModelClient] = {}
+_model_client_pool_lock = threading.Lock()
 
-def initialize_model_client(model_name: str = OPENAI_MODEL) -> OpenAIChatCompletionClient:
+
+def initialize_model_client(
+    model_name: Union[str, Sequence[str]] = OPENAI_MODEL
+) -> RoutedModelClient:
     """
     Initialize and return the OpenRouter model client.
     
+    The client routes every call over the given model followed by
+    MODEL_FALLBACKS, with per-model timeouts, retries with jittered backoff
+    and optional hedging (see ``routing.RoutedModelClient``).
+    
     Args:
-        model_name (str): The model to use. Defaults to OPENAI_MODEL.
+        model_name (Union[str, Sequence[str]]): The model to use, or models in
+            order of preference. Defaults to OPENAI_MODEL.
     
     Returns:
-        OpenAIChatCompletionClient: Configured OpenRouter client.
+        RoutedModelClient: Configured OpenRouter client.
         
     Raises:
         ValueError: If API key is not found in environment variables.
@@ -43,10 +75,22 @@ def initialize_model_client(model_name: str = OPENAI_MODEL) -> OpenAIChatComplet
             f"Please set {OPENAI_API_KEY_ENV} in your .env file."
         )
     
+    models = [model_name] if isinstance(model_name, str) else list(model_name)
+    models += [m for m in MODEL_FALLBACKS if m not in models]
+    return RoutedModelClient(
+        [(model, _create_openrouter_client(model, api_key)) for model in models],
+        timeouts=MODEL_TIMEOUTS,
+        provider=OPENROUTER_BASE_URL,
+    )
+
+
+def _create_openrouter_client(model_name: str, api_key: str) -> OpenAIChatCompletionClient:
+    """Create the client for one OpenRouter model; retries are left to the router."""
     return OpenAIChatCompletionClient(
         base_url=OPENROUTER_BASE_URL,
         model=model_name,
         api_key=api_key,
+        max_retries=0,
         model_info={
         "vision": False,
         "function_calling": True,   # ← MUST be True for tools to work
@@ -55,35 +99,200 @@ def initialize_model_client(model_name: str = OPENAI_MODEL) -> OpenAIChatComplet
         "structured_output": False,
     })
 
-def create_arxiv_research_agent() -> AssistantAgent:
+
+def get_model_client(model_name: str = OPENAI_MODEL) -> RoutedModelClient:
+    """
+    Return the pooled model client for a model, creating it on first use.
+    
+    Args:
+        model_name (str): The model to use. Defaults to OPENAI_MODEL.
+    
+    Returns:
+        RoutedModelClient: Shared client for (model_name, OPENROUTER_BASE_URL).
+        
+    Raises:
+        ValueError: If API key is not found in environment variables.
+    """
+    key = (model_name, OPENROUTER_BASE_URL)
+    with _model_client_pool_lock:
+        client = _model_client_pool.get(key)
+        if client is None:
+            client = initialize_model_client(model_name)
+            _model_client_pool[key] = client
+        return client
+
+
+async def close_model_clients() -> None:
+    """Close and drop every pooled model client."""
+    with _model_client_pool_lock:
+        clients = list(_model_client_pool.values())
+        _model_client_pool.clear()
+    for client in clients:
+        await client.close()
+
+def create_arxiv_search_tool(max_results: int = DEFAULT_MAX_RESULTS) -> FunctionTool:
+    """
+    Create the arXiv search tool used by the ArXiv Research Agent.
+    
+    The number of results is fixed by the caller (the UI slider) rather than
+    chosen by the model.
+    
+    Args:
+        max_results (int): Number of papers the tool returns.
+        
+    Returns:
+        FunctionTool: Async tool wrapping query_planner.search_papers.
+    """
+    async def arxiv_search(query: str) -> str:
+        papers = await search_papers(query, max_results=max_results)
+        return dumps(papers)
+    
+    return FunctionTool(
+        arxiv_search,
+        name=ARXIV_SEARCH_TOOL_NAME,
+        description=(
+            "Search arXiv.org for the most relevant papers on a query. Returns a "
+            "JSON list of papers with title, authors, abstract, arxiv_url and published."
+        ),
+    )
+
+
+def create_arxiv_research_agent(max_results: int = DEFAULT_MAX_RESULTS) -> AssistantAgent:
     """
     Create and configure the ArXiv Research Agent.
     Uses OPENAI_MODEL.
+    
+    The agent calls the arXiv search tool and hands its JSON result straight to
+    the team (no reflection turn), so paper metadata is never regenerated by
+    the model.
+    
+    Args:
+        max_results (int): Number of papers the search tool returns.
         
     Returns:
         AssistantAgent: Configured ArXiv Research Agent.
     """
-    model_client = initialize_model_client(OPENAI_MODEL)
+    model_client = get_model_client(OPENAI_MODEL)
     return AssistantAgent(
         name=ARXIV_RESEARCH_AGENT_NAME,
         description="An agent that researches papers on arXiv.org.",
         model_client=model_client,
         system_message=ARXIV_RESEARCH_AGENT_SYSTEM_MESSAGE,
+        tools=[create_arxiv_search_tool(max_results)],
+        reflect_on_tool_use=False,
     )
 
 
-def create_summarizer_agent() -> AssistantAgent:
+class PackedPapersContext(UnboundedChatCompletionContext):
+    """
+    Summarizer model context that fits paper lists into the token budget.
+    
+    In team mode the research agent's tool result (the full papers JSON, also
+    shown in the UI) reaches the summarizer as a message; it is stored packed
+    with packing.pack_papers, using the team's task (the topic) as the query.
+    """
+    
+    def __init__(self, model_name: str = OPENAI_MODEL2):
+        """
+        Initialize an empty context.
+        
+        Args:
+            model_name (str): Model the context is sent to, for its budget.
+        """
+        super().__init__()
+        self.model_name = model_name
+        self._topic: Optional[str] = None
+    
+    async def add_message(self, message: LLMMessage) -> None:
+        """Add a message, packing it first if it is a list of papers."""
+        if isinstance(message, UserMessage) and isinstance(message.content, str):
+            if message.source == ARXIV_RESEARCH_AGENT_NAME:
+                packed = pack_paper_message(message.content, self.model_name, self._topic)
+                if packed is not None:
+                    message = UserMessage(content=packed.content, source=message.source)
+            elif message.source == "user":
+                self._topic = message.content
+        await super().add_message(message)
+    
+    async def clear(self) -> None:
+        """Clear the context, including the remembered topic."""
+        await super().clear()
+        self._topic = None
+
+
+class CachedSummarizerAgent(AssistantAgent):
+    """
+    Summarizer agent that reads and populates the summary cache.
+    
+    In team mode the papers reach the summarizer as the research agent's
+    message. If the same papers were already summarized with the same model
+    and prompt (by either pipeline; see utils.summary_cache_key), the cached
+    summary is returned without calling the model. Otherwise the summary is
+    generated as usual and cached.
+    """
+    
+    async def on_messages_stream(
+        self, messages: Sequence[BaseChatMessage], cancellation_token: CancellationToken
+    ) -> AsyncGenerator:
+        papers = _papers_in(messages)
+        if papers is None:
+            async for item in super().on_messages_stream(messages, cancellation_token):
+                yield item
+            return
+        
+        cache = get_summary_cache()
+        cache_key = summary_cache_key(papers, OPENAI_MODEL2, SUMMARIZER_AGENT_SYSTEM_MESSAGE)
+        cached = cache.get(cache_key)
+        REGISTRY.inc("cache_hits_total" if cached is not None else "cache_misses_total", cache="summary")
+        if cached is not None:
+            logger.info(f"Summary cache hit for {len(papers)} papers")
+            yield Response(chat_message=TextMessage(source=self.name, content=cached))
+            return
+        
+        async for item in super().on_messages_stream(messages, cancellation_token):
+            if isinstance(item, Response) and isinstance(item.chat_message, TextMessage):
+                cache.set(cache_key, item.chat_message.content)
+            yield item
+
+
+def _papers_in(messages: Sequence[BaseChatMessage]) -> Optional[List[Paper]]:
+    """Return the papers of the last paper list sent by the research agent, if any."""
+    papers = None
+    for message in messages:
+        content = getattr(message, "content", None)
+        if message.source == ARXIV_RESEARCH_AGENT_NAME and isinstance(content, str):
+            papers = papers_from_json(content) or papers
+    return papers
+
+
+def create_summarizer_agent(
+    pack_paper_messages: bool = False, use_cache: bool = False
+) -> AssistantAgent:
     """
     Create and configure the Summarizer Agent.
     Uses OPENAI_MODEL2.
+    
+    With SUMMARIZER_STREAMING enabled the agent also yields token-level
+    ModelClientStreamingChunkEvent messages before its final response.
+    
+    Args:
+        pack_paper_messages (bool): Whether to pack paper lists received from
+            the research agent into the token budget (team mode; the direct
+            pipeline packs its own task message).
+        use_cache (bool): Whether to answer paper lists received from the
+            research agent from the summary cache (team mode; the direct
+            pipeline checks the cache itself, see CachedSummarizerAgent).
         
     Returns:
         AssistantAgent: Configured Summarizer Agent.
     """
-    model_client = initialize_model_client(OPENAI_MODEL2)
-    return AssistantAgent(
+    model_client = get_model_client(OPENAI_MODEL2)
+    agent_class = CachedSummarizerAgent if use_cache else AssistantAgent
+    return agent_class(
         name=SUMMARIZER_AGENT_NAME,
         description="An agent that summarizes and synthesizes research papers.",
         model_client=model_client,
         system_message=SUMMARIZER_AGENT_SYSTEM_MESSAGE,
+        model_client_stream=SUMMARIZER_STREAMING,
+        model_context=PackedPapersContext(OPENAI_MODEL2) if pack_paper_messages else None,
     )
\ No newline at end of file
@@ -5,24 +5,40 @@ This is the main entry point for the application.
 
 import streamlit as st
 import os
-import asyncio
-import json
-import re
 import sys
-import nest_asyncio
-from pipeline import ResearchTeam
+import time
+from typing import Dict, List, Optional
+from jobs import (
+    JOB_CANCELLED,
+    JOB_DONE,
+    JOB_FAILED,
+    JOB_FINISHED_STATES,
+    JOB_QUEUED,
+    LiveJob,
+    get_job_queue,
+)
+from paper import Paper, PaperStreamParser
+from metrics import RunTrace
 from constants import (
     APP_TITLE,
     APP_LAYOUT,
     INITIAL_SIDEBAR_STATE,
     DEFAULT_RESEARCH_TOPICS,
     DEFAULT_MAX_RESULTS,
+    PIPELINE_MODE_TEAM,
+    PIPELINE_MODE_DIRECT,
+    DEFAULT_PIPELINE_MODE,
+    SUMMARY_MODE_SINGLE,
+    SUMMARY_MODE_MAP_REDUCE,
+    DEFAULT_SUMMARY_MODE,
+    SUMMARY_RENDER_INTERVAL_SECONDS,
+    SUMMARIZER_AGENT_NAME,
+    JOB_HISTORY_LIMIT,
+    OPENAI_API_KEY_ENV,
+    RUNTIME_POLL_INTERVAL_SECONDS,
 )
 import logging
 
-# Apply nest_asyncio to allow nested event loops (required for Streamlit + asyncio)
-nest_asyncio.apply()
-
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -127,31 +143,40 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-def initialize_team():
-    """Initialize the research team."""
-    return ResearchTeam()
+def submit_research(topic: str, max_results: int, mode: str, summary_mode: str) -> str:
+    """
+    Queue a research run and attach this session to it.
+    
+    The job ID is kept in ``st.session_state``, so the session reattaches to
+    the job (or shows its stored result) on every rerun.
+    """
+    job_id = get_job_queue().submit(topic, max_results, mode, summary_mode)
+    st.session_state["job_id"] = job_id
+    return job_id
 
 
-def extract_json_from_text(text: str) -> dict:
-    """Extract and parse JSON from agent response."""
-    try:
-        # Try to find JSON array in the text
-        json_match = re.search(r'\[\s*\{.*?\}\s*\]', text, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(0)
-            return json.loads(json_str)
-    except json.JSONDecodeError:
-        pass
-    return None
+def cancel_research():
+    """Cancel this session's research job if it is still going and detach from it."""
+    job_id = st.session_state.pop("job_id", None)
+    if job_id is not None:
+        get_job_queue().cancel(job_id)
+        logger.info(f"Research job {job_id} cancelled by user")
 
 
-def display_paper_card(paper: dict, index: int):
+def extract_json_from_text(text: str) -> Optional[List[Paper]]:
+    """Extract the list of papers from an agent response."""
+    parser = PaperStreamParser()
+    parser.feed(text)
+    return parser.papers or None
+
+
+def display_paper_card(paper: Paper, index: int):
     """Display a single paper as a styled card."""
-    title = paper.get("title", "Unknown Title")
-    authors = paper.get("authors", [])
-    published = paper.get("published", "Unknown Date")
-    abstract = paper.get("abstract", "No abstract available")
-    arxiv_url = paper.get("arxiv_url", "")
+    title = paper.title or "Unknown Title"
+    authors = paper.authors
+    published = paper.published or "Unknown Date"
+    abstract = paper.abstract or "No abstract available"
+    arxiv_url = paper.arxiv_url
     
     # Truncate abstract if too long
     abstract_preview = abstract[:300] + "..." if len(abstract) > 300 else abstract
@@ -168,7 +193,7 @@ def display_paper_card(paper: dict, index: int):
         """, unsafe_allow_html=True)
 
 
-def display_papers_section(papers: list):
+def display_papers_section(papers: List[Paper]):
     """Display all papers in a formatted section."""
     if not papers or not isinstance(papers, list):
         return False
@@ -177,9 +202,9 @@ def display_papers_section(papers: list):
     with col1:
         st.metric("📚 Total Papers", len(papers))
     with col2:
-        st.metric("✍️ Total Authors", sum(len(p.get("authors", [])) for p in papers))
+        st.metric("✍️ Total Authors", sum(len(p.authors) for p in papers))
     with col3:
-        st.metric("📊 Latest Year", max([int(p.get("published", "2000")[:4]) for p in papers], default=2024))
+        st.metric("📊 Latest Year", max((p.year for p in papers if p.year), default=2024))
     
     st.markdown("---")
     st.markdown("### 📚 Research Papers Found")
@@ -190,17 +215,106 @@ def display_papers_section(papers: list):
     return True
 
 
-def display_summary(summary_text: str):
-    """Display the summary in a formatted section."""
+def display_summary():
+    """
+    Display the summary section header.
+    
+    Returns:
+        The bordered container the summary is rendered into.
+    """
     st.markdown("---")
     st.markdown("### 📝 Literature Review Summary")
+    return st.container(border=True)
+
+
+def display_latency_breakdown(trace: RunTrace):
+    """Display the stage timings, token usage and cache counters of a run."""
+    with st.expander("⏱️ Latency Breakdown", expanded=True):
+        st.dataframe(trace.breakdown(), use_container_width=True)
+        if trace.tokens:
+            st.markdown("**Tokens per model**")
+            st.dataframe(
+                [{"model": model, **usage} for model, usage in trace.tokens.items()],
+                use_container_width=True,
+            )
+        if trace.counters:
+            st.markdown("**Counters**")
+            st.json(trace.counters)
+
+
+class SummaryStream:
+    """
+    Incrementally render a streamed Markdown summary.
     
-    with st.container():
-        st.markdown(f"""
-        <div class="summary-section">
-        {summary_text}
-        </div>
-        """, unsafe_allow_html=True)
+    Completed blocks (separated by blank lines) are written once as their own
+    element and never touched again; only the trailing, still-growing block is
+    re-rendered, at most every SUMMARY_RENDER_INTERVAL_SECONDS. Rendering cost
+    therefore stays linear in the summary length.
+    """
+    
+    def __init__(self, container):
+        """
+        Initialize the renderer.
+        
+        Args:
+            container: Streamlit container the summary is written into.
+        """
+        self._container = container
+        self._parts = []
+        self._pending = ""
+        self._tail = None
+        self._last_render = 0.0
+    
+    @property
+    def text(self) -> str:
+        """The full summary rendered so far."""
+        return "".join(self._parts)
+    
+    def append(self, chunk: str):
+        """
+        Append streamed text to the summary.
+        
+        Args:
+            chunk (str): Newly generated text.
+        """
+        if not chunk:
+            return
+        self._parts.append(chunk)
+        self._pending += chunk
+        
+        # Commit finished blocks, but never split inside a fenced code block
+        *blocks, pending = self._pending.split("\n\n")
+        committed = []
+        for block in blocks:
+            committed.append(block)
+            finished = "\n\n".join(committed)
+            if finished.count("```") % 2 == 0:
+                if finished.strip():
+                    self._tail_placeholder().markdown(finished)
+                    self._tail = None
+                committed = []
+        self._pending = "\n\n".join(committed + [pending])
+        
+        now = time.monotonic()
+        if now - self._last_render >= SUMMARY_RENDER_INTERVAL_SECONDS:
+            self._render_tail()
+            self._last_render = now
+    
+    def flush(self):
+        """Render whatever is still pending."""
+        self._render_tail()
+    
+    def _render_tail(self):
+        """Re-render the trailing block that is still being generated."""
+        if self._pending.strip():
+            self._tail_placeholder().markdown(self._pending)
+    
+    def _tail_placeholder(self):
+        """Return the placeholder for the trailing block, creating it if needed."""
+        if self._tail is None:
+            with self._container:
+                self._tail = st.empty()
+        return self._tail
 
 
 def render_sidebar():
@@ -237,6 +351,33 @@ def render_sidebar():
             step=1
         )
         
+        # Pipeline mode
+        pipeline_modes = {
+            "Agent Team": PIPELINE_MODE_TEAM,
+            "Fast (Direct Search)": PIPELINE_MODE_DIRECT,
+        }
+        mode_label = st.radio(
+            "Pipeline Mode:",
+            list(pipeline_modes),
+            index=list(pipeline_modes.values()).index(DEFAULT_PIPELINE_MODE),
+            help="Fast mode searches arXiv directly and only uses the LLM for the summary.",
+        )
+        mode = pipeline_modes[mode_label]
+        
+        # Map-reduce summaries need the papers up front, i.e. fast mode
+        map_reduce = st.checkbox(
+            "Map-Reduce Summary",
+            value=DEFAULT_SUMMARY_MODE == SUMMARY_MODE_MAP_REDUCE,
+            disabled=mode != PIPELINE_MODE_DIRECT,
+            help="Summarize each paper in parallel, then synthesize. Faster for many papers.",
+        )
+        summary_mode = SUMMARY_MODE_MAP_REDUCE if map_reduce else SUMMARY_MODE_SINGLE
+        
+        show_latency = st.checkbox(
+            "Show Latency Breakdown",
+            help="Show per-stage timings, time to first token and token usage after each run.",
+        )
+        
         st.markdown("---")
         st.subheader("About")
         st.info(
@@ -245,7 +386,7 @@ def render_sidebar():
             "one for research and one for summarization."
         )
         
-        return topic, max_results
+        return topic, max_results, mode, summary_mode, show_latency
 
 
 def render_main_content(topic: str, max_results: int):
@@ -271,9 +412,75 @@ def render_main_content(topic: str, max_results: int):
     return True
 
 
-async def run_research(topic: str, max_results: int):
-    """Execute the research pipeline."""
-    team = initialize_team()
+def render_history():
+    """List past research jobs in the sidebar; selecting one shows its stored result."""
+    jobs = get_job_queue().store.recent(JOB_HISTORY_LIMIT)
+    if not jobs:
+        return
+    status_icons = {
+        JOB_QUEUED: "⏳", JOB_DONE: "✅", JOB_FAILED: "❌", JOB_CANCELLED: "🚫",
+    }
+    with st.sidebar:
+        st.markdown("---")
+        st.subheader("📜 History")
+        for job in jobs:
+            created = time.strftime("%Y-%m-%d %H:%M", time.localtime(job["created_at"]))
+            label = f"{status_icons.get(job['status'], '🔄')} {job['topic']} · {created}"
+            if st.button(label, key=f"job-{job['id']}", use_container_width=True):
+                st.session_state["job_id"] = job["id"]
+
+
+def render_stored_job(job: Dict):
+    """Render the stored papers and summary of a finished job."""
+    tab1, tab2 = st.tabs(["📚 Papers", "📝 Summary"])
+    with tab1:
+        if not display_papers_section(job["papers"]):
+            st.info("No papers were stored for this job.")
+    with tab2:
+        with display_summary():
+            st.markdown(job["summary"] or "")
+
+
+def render_job(job_id: str, show_latency: bool = False):
+    """
+    Show a research job: wait while it is queued, follow it while it runs,
+    and render its stored result once it has finished.
+    """
+    queue = get_job_queue()
+    with st.spinner("⏳ Waiting for a free research worker..."):
+        while True:
+            job = queue.store.get(job_id)
+            if job is None:
+                st.session_state.pop("job_id", None)
+                return
+            live = queue.live.get(job_id)
+            if live is not None or job["status"] in JOB_FINISHED_STATES:
+                break
+            time.sleep(RUNTIME_POLL_INTERVAL_SECONDS)
+    
+    st.caption(f"Job `{job_id}` · {job['topic']} · {job['mode']} mode · {job['max_results']} papers")
+    if live is not None:
+        stream_job(live, show_latency)
+        job = queue.store.get(job_id)
+    else:
+        render_stored_job(job)
+    
+    if job["status"] == JOB_DONE:
+        st.success("✅ Research completed successfully!")
+    elif job["status"] == JOB_CANCELLED:
+        st.warning("🚫 Research was cancelled.")
+    elif job["status"] == JOB_FAILED:
+        st.error(f"❌ An error occurred during research: {job['error']}")
+        if OPENAI_API_KEY_ENV in (job["error"] or ""):
+            st.info(
+                f"Please ensure your `.env` file contains the `{OPENAI_API_KEY_ENV}` variable."
+            )
+
+
+def stream_job(live: LiveJob, show_latency: bool = False):
+    """Render a running job's messages as they arrive, from the first one."""
+    # Imported here so page loads without a running job skip the agent framework
+    from autogen_agentchat.messages import ModelClientStreamingChunkEvent
     
     # Create tabs for different result views
     tab1, tab2 = st.tabs(["📚 Papers", "📝 Summary"])
@@ -282,49 +489,73 @@ async def run_research(topic: str, max_results: int):
         papers_placeholder = st.empty()
     
     with tab2:
-        summary_placeholder = st.empty()
+        summary = SummaryStream(display_summary())
     
     papers_data = None
-    full_output = ""
+    paper_parser = PaperStreamParser()
     all_messages = []
+    streamed = False
+    
+    def show_papers(papers):
+        with tab1:
+            with papers_placeholder.container():
+                display_papers_section(papers)
     
     # Stream results from the research pipeline
     with st.spinner("🔍 Researching papers and generating summary..."):
-        async for message in team.run_research(topic):
-            if message and hasattr(message, 'content'):
+        for message in live.follow():
+            # Token chunks are rendered as they arrive: summarizer chunks go to
+            # the summary, anything else may carry paper JSON and is parsed
+            # incrementally so cards appear one by one.
+            if isinstance(message, ModelClientStreamingChunkEvent):
+                if message.source == SUMMARIZER_AGENT_NAME:
+                    if papers_data is not None:
+                        summary.append(message.content)
+                        streamed = True
+                elif papers_data is None and paper_parser.feed(message.content):
+                    show_papers(paper_parser.papers)
+                continue
+            
+            # Tool call events carry structured (non-text) content; the tool
+            # result itself arrives as a text summary message.
+            if message and isinstance(getattr(message, 'content', None), str):
                 content = message.content
                 all_messages.append(content)
                 
-                # Try to extract JSON (papers data)
-                json_data = extract_json_from_text(content)
-                if json_data and papers_data is None:
-                    papers_data = json_data
-                    with tab1:
-                        with papers_placeholder.container():
-                            display_papers_section(papers_data)
+                # Try to extract JSON (papers data); the complete message
+                # supersedes any chunks streamed before it
+                if papers_data is None:
+                    papers_data = extract_json_from_text(content)
+                    paper_parser = PaperStreamParser()
+                    if papers_data:
+                        show_papers(papers_data)
                 
-                # Check if it's a summary (doesn't contain JSON)
-                if json_data is None and papers_data is not None:
-                    full_output += content + "\n"
-                    with tab2:
-                        with summary_placeholder.container():
-                            display_summary(full_output)
+                # Check if it's a summary (doesn't contain JSON); text already
+                # shown from streamed chunks is not rendered again
+                elif extract_json_from_text(content) is None:
+                    if not streamed:
+                        summary.append(content + "\n\n")
+                    streamed = False
+                    summary.flush()
     
     # Final display
     if papers_data:
         with tab1:
             st.success("✅ Papers loaded successfully!")
     
-    if full_output:
+    if summary.text:
         with tab2:
             st.success("✅ Summary generated successfully!")
+    
+    if show_latency and live.trace is not None:
+        display_latency_breakdown(live.trace)
 
 
 def main():
     """Main application entry point."""
     try:
         # Render sidebar and get user inputs
-        topic, max_results = render_sidebar()
+        topic, max_results, mode, summary_mode, show_latency = render_sidebar()
         
         # Render main content
         can_proceed = render_main_content(topic, max_results)
@@ -347,22 +578,20 @@ def main():
             )
         
         if clear_button:
+            cancel_research()
             st.rerun()
         
-        # Execute research when button is clicked
+        # Queue research when button is clicked; the run itself happens on the
+        # background workers and survives reruns of this script
         if research_button:
+            submit_research(topic, max_results, mode, summary_mode)
+        
+        render_history()
+        
+        job_id = st.session_state.get("job_id")
+        if job_id is not None:
             try:
-                # Run async research function using the event loop
-                loop = asyncio.get_event_loop()
-                loop.run_until_complete(run_research(topic, max_results))
-                
-                st.success("✅ Research completed successfully!")
-                
-            except ValueError as ve:
-                st.error(f"⚠️ Configuration Error: {str(ve)}")
-                st.info(
-                    "Please ensure your `.env` file contains the `OPENAI_API_KEY` variable."
-                )
+                render_job(job_id, show_latency)
             except Exception as e:
                 st.error(f"❌ An error occurred during research: {str(e)}")
                 logger.exception("Research execution failed")
@@ -0,0 +1,84 @@
+"""
+Throttled arXiv API client.
+This module holds the arxiv.Client subclass used for every arXiv request. It
+is kept apart from utils so that importing utils does not import arxiv and
+requests; utils.get_arxiv_client loads it on first use.
+"""
+
+import logging
+import time
+import arxiv
+import requests
+from constants import (
+    ARXIV_API_URL,
+    ARXIV_PAGE_SIZE,
+    ARXIV_MAX_RETRIES,
+    ARXIV_BACKOFF_BASE_SECONDS,
+    ARXIV_BACKOFF_MAX_SECONDS,
+)
+from metrics import REGISTRY
+from utils import AdaptiveRateLimiter, backoff_delay
+
+logger = logging.getLogger(__name__)
+
+
+class ThrottledArxivClient(arxiv.Client):
+    """
+    arXiv client governed by a shared AdaptiveRateLimiter.
+    
+    Every page request waits for the limiter (the wait is recorded as the
+    ``arxiv_queue_wait`` span); HTTP 429/503 responses, connection errors
+    and unexpectedly empty pages are retried with jittered backoff, and
+    429/503 also slow the limiter down. Pages never ask for more results than
+    the search still needs.
+    """
+    
+    def __init__(
+        self,
+        limiter: AdaptiveRateLimiter,
+        page_size: int = ARXIV_PAGE_SIZE,
+        delay_seconds: float = 0.0,
+        max_retries: int = ARXIV_MAX_RETRIES,
+    ):
+        """
+        Initialize the client.
+        
+        Args:
+            limiter (AdaptiveRateLimiter): Limiter shared by every client in the process.
+            page_size (int): Maximum results requested per API call.
+            delay_seconds (float): Extra spacing between this client's own requests.
+            max_retries (int): Retries per page on transient errors.
+        """
+        super().__init__(page_size=page_size, delay_seconds=delay_seconds, num_retries=0)
+        self.query_url_format = ARXIV_API_URL
+        self.limiter = limiter
+        self.max_retries = max_retries
+    
+    def _format_url(self, search: arxiv.Search, start: int, page_size: int) -> str:
+        if search.max_results:
+            page_size = max(1, min(page_size, search.max_results - start))
+        return super()._format_url(search, start, page_size)
+    
+    def _parse_feed(self, url: str, first_page: bool = True, _try_index: int = 0):
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            waited = self.limiter.acquire()
+            REGISTRY.record_span("arxiv_queue_wait", start, waited)
+            try:
+                feed = super()._parse_feed(url, first_page=first_page, _try_index=attempt)
+                self.limiter.succeeded()
+                return feed
+            except arxiv.HTTPError as e:
+                if e.status not in (429, 503) or attempt == self.max_retries:
+                    raise
+                self.limiter.throttled()
+                REGISTRY.inc("arxiv_throttled_total", status=e.status)
+                error = e
+            except (arxiv.UnexpectedEmptyPageError, requests.exceptions.ConnectionError) as e:
+                if attempt == self.max_retries:
+                    raise
+                error = e
+            REGISTRY.inc("arxiv_retries_total")
+            delay = backoff_delay(attempt + 1, ARXIV_BACKOFF_BASE_SECONDS, ARXIV_BACKOFF_MAX_SECONDS)
+            logger.warning(f"Retrying arXiv request in {delay:.2f}s after error: {error}")
+            time.sleep(delay)
@@ -0,0 +1,318 @@
+"""
+Batch research runner.
+This module researches many topics concurrently and writes one literature
+review per topic to disk, e.g. for nightly digests.
+
+With ``--incremental`` each topic keeps a watermark of the papers already
+digested: re-runs fetch the newest papers, summarize only those not seen
+before and put them on top of the previous review.
+
+Usage:
+    python batch.py "Agentic AI" "Large Language Models"
+    python batch.py --file topics.txt --concurrency 8 --output-dir digests
+    python batch.py --file topics.txt --incremental
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import time
+from datetime import date
+from typing import Dict, List, Optional
+from autogen_agentchat.messages import TextMessage
+from metrics import REGISTRY
+from paper import Paper
+from pipeline import TeamPool
+from routing import provider_limiter
+from query_planner import normalize_topic, search_papers
+from utils import AsyncRateLimiter
+from watermarks import WatermarkStore, merge_reviews
+from constants import (
+    BATCH_CONCURRENCY,
+    BATCH_OUTPUT_DIR,
+    INCREMENTAL_SORT_CRITERION,
+    ARXIV_SORT_CRITERION,
+    DEFAULT_MAX_RESULTS,
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_REQUEST_BURST,
+    PIPELINE_MODE_DIRECT,
+    SUMMARIZER_AGENT_NAME,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def load_topics(path: str) -> List[str]:
+    """
+    Read topics from a text file, one per line.
+
+    Blank lines and lines starting with ``#`` are ignored.
+
+    Args:
+        path (str): Path to the topics file.
+
+    Returns:
+        List[str]: Topics in file order.
+    """
+    with open(path, encoding="utf-8") as f:
+        return [
+            line.strip() for line in f
+            if line.strip() and not line.lstrip().startswith("#")
+        ]
+
+
+def topic_filename(topic: str) -> str:
+    """
+    Build a filesystem-safe Markdown file name for a topic.
+
+    Args:
+        topic (str): The research topic.
+
+    Returns:
+        str: File name such as ``large-language-models.md``.
+    """
+    slug = re.sub(r"[^a-z0-9]+", "-", topic.lower()).strip("-")
+    return f"{slug or 'topic'}.md"
+
+
+class BatchRunner:
+    """
+    Runs the direct research pipeline for many topics with bounded parallelism.
+
+    Topics with the same canonical form fetch papers once, and every LLM
+    request (map-reduce calls, retries and hedges included) is throttled per
+    provider so a large batch stays under the rate limit.
+    In incremental mode only papers missing from a topic's watermark are
+    summarized, so a topic without new papers costs no LLM call.
+    """
+
+    def __init__(
+        self,
+        output_dir: str = BATCH_OUTPUT_DIR,
+        max_results: int = DEFAULT_MAX_RESULTS,
+        concurrency: int = BATCH_CONCURRENCY,
+        requests_per_minute: float = LLM_REQUESTS_PER_MINUTE,
+        incremental: bool = False,
+        watermarks: Optional[WatermarkStore] = None,
+    ):
+        """
+        Initialize the batch runner.
+
+        Args:
+            output_dir (str): Directory the reviews are written to.
+            max_results (int): Number of papers fetched per topic. In
+                incremental mode, the newest papers looked at per run.
+            concurrency (int): Maximum number of topics in flight at once.
+            requests_per_minute (float): LLM requests allowed per provider per minute.
+            incremental (bool): Whether to digest only papers not seen before.
+            watermarks (Optional[WatermarkStore]): Store of per-topic
+                watermarks. Defaults to the one at WATERMARK_DB_PATH.
+        """
+        self.output_dir = output_dir
+        self.max_results = max_results
+        self.concurrency = concurrency
+        self.requests_per_minute = requests_per_minute
+        self.incremental = incremental
+        self.watermarks = watermarks
+        if incremental and watermarks is None:
+            self.watermarks = WatermarkStore()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._teams = TeamPool(concurrency)
+        self._limiters: Dict[str, AsyncRateLimiter] = {}
+        self._searches: Dict[str, asyncio.Task] = {}
+
+    def _limiter(self, provider: str) -> AsyncRateLimiter:
+        """Return the rate limiter for a provider base URL."""
+        if provider not in self._limiters:
+            self._limiters[provider] = AsyncRateLimiter(
+                self.requests_per_minute, burst=LLM_REQUEST_BURST
+            )
+        return self._limiters[provider]
+
+    def _search(self, topic: str) -> asyncio.Task:
+        """Return the shared arXiv search task for a topic's canonical form."""
+        key = normalize_topic(topic)
+        if key not in self._searches:
+            # Incremental digests look at the newest papers rather than the most relevant
+            sort_by = INCREMENTAL_SORT_CRITERION if self.incremental else ARXIV_SORT_CRITERION
+            self._searches[key] = asyncio.ensure_future(
+                search_papers(topic, max_results=self.max_results, sort_by=sort_by)
+            )
+        return self._searches[key]
+
+    async def _summarize(self, topic: str, papers: List[Paper]) -> str:
+        """Summarize papers with the direct pipeline and return the review."""
+        # Model calls made from here on (and from tasks started here) wait for
+        # the provider's limiter; cached summaries make no call and take no token
+        token = provider_limiter.set(self._limiter)
+        try:
+            parts = []
+            async with self._teams.team(self.max_results, mode=PIPELINE_MODE_DIRECT) as team:
+                async for msg in team.summarize_papers(papers, topic=topic):
+                    # Skip streamed token chunks; keep the complete messages
+                    if isinstance(msg, TextMessage) and msg.source == SUMMARIZER_AGENT_NAME:
+                        parts.append(msg.content)
+        finally:
+            provider_limiter.reset(token)
+        return "\n\n".join(parts)
+
+    async def _digest(self, topic: str, papers: List[Paper]) -> str:
+        """
+        Update a topic's review with the papers it has not seen yet.
+
+        Args:
+            topic (str): The research topic.
+            papers (List[Paper]): Newest papers on the topic.
+
+        Returns:
+            str: The review covering every paper digested so far.
+        """
+        watermark = self.watermarks.get(topic)
+        if watermark is None:
+            new_papers = papers
+            review = await self._summarize(topic, papers)
+        else:
+            new_papers = watermark.new_papers(papers)
+            if not new_papers:
+                REGISTRY.inc("digest_unchanged_total")
+                logger.info(f"No new papers for '{topic}' since {watermark.last_published}")
+                return watermark.review
+            review = merge_reviews(
+                await self._summarize(topic, new_papers), watermark.review, date.today()
+            )
+        REGISTRY.inc("digest_new_papers_total", len(new_papers))
+        logger.info(f"Digested {len(new_papers)} new papers for '{topic}'")
+        return self.watermarks.advance(topic, new_papers, review).review
+
+    async def _run_topic(self, topic: str) -> str:
+        """
+        Research one topic and write its review.
+
+        Args:
+            topic (str): The research topic.
+
+        Returns:
+            str: Path of the written Markdown file.
+        """
+        async with self._semaphore:
+            papers = await self._search(topic)
+            if self.incremental:
+                summary = await self._digest(topic, papers)
+            else:
+                summary = await self._summarize(topic, papers)
+
+        path = os.path.join(self.output_dir, topic_filename(topic))
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"# {topic}\n\n{summary}\n")
+        logger.info(f"Wrote review for '{topic}' to {path}")
+        return path
+
+    async def run(self, topics: List[str]) -> Dict[str, str]:
+        """
+        Research every topic and write the reviews to ``output_dir``.
+
+        Duplicate topics (same canonical form) are researched once. Failures
+        are logged and do not stop the rest of the batch.
+
+        Args:
+            topics (List[str]): Topics to research.
+
+        Returns:
+            Dict[str, str]: Output path per successfully researched topic.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        unique: Dict[str, str] = {}
+        for topic in topics:
+            unique.setdefault(normalize_topic(topic), topic)
+        batch = list(unique.values())
+
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(
+            *(self._run_topic(topic) for topic in batch), return_exceptions=True
+        )
+        elapsed = time.perf_counter() - started
+
+        results: Dict[str, str] = {}
+        for topic, outcome in zip(batch, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error(f"Batch research failed for '{topic}': {outcome}")
+            else:
+                results[topic] = outcome
+
+        throughput = len(results) / (elapsed / 60) if elapsed > 0 else 0.0
+        logger.info(
+            f"Batch finished: {len(results)}/{len(batch)} topics in {elapsed:.1f}s "
+            f"({throughput:.2f} topics/minute, {len(self._searches)} arXiv queries)"
+        )
+        return results
+
+
+async def run_batch(
+    topics: List[str],
+    output_dir: str = BATCH_OUTPUT_DIR,
+    max_results: int = DEFAULT_MAX_RESULTS,
+    concurrency: int = BATCH_CONCURRENCY,
+    requests_per_minute: float = LLM_REQUESTS_PER_MINUTE,
+    incremental: bool = False,
+) -> Dict[str, str]:
+    """
+    High-level function to research a batch of topics.
+
+    Args:
+        topics (List[str]): Topics to research.
+        output_dir (str): Directory the reviews are written to.
+        max_results (int): Number of papers fetched per topic.
+        concurrency (int): Maximum number of topics in flight at once.
+        requests_per_minute (float): LLM requests allowed per provider per minute.
+        incremental (bool): Whether to digest only papers not seen before.
+
+    Returns:
+        Dict[str, str]: Output path per successfully researched topic.
+    """
+    runner = BatchRunner(output_dir, max_results, concurrency, requests_per_minute, incremental)
+    return await runner.run(topics)
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Research many topics concurrently.")
+    parser.add_argument("topics", nargs="*", help="Topics to research.")
+    parser.add_argument("--file", help="Text file with one topic per line.")
+    parser.add_argument("--output-dir", default=BATCH_OUTPUT_DIR)
+    parser.add_argument("--max-results", type=int, default=DEFAULT_MAX_RESULTS)
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    parser.add_argument(
+        "--rpm", type=float, default=LLM_REQUESTS_PER_MINUTE,
+        help="LLM requests per minute per provider.",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Only summarize papers not digested before and merge them into the previous review.",
+    )
+    args = parser.parse_args()
+
+    topics = list(args.topics)
+    if args.file:
+        topics.extend(load_topics(args.file))
+    if not topics:
+        parser.error("no topics given")
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    results = asyncio.run(
+        run_batch(
+            topics, args.output_dir, args.max_results, args.concurrency, args.rpm, args.incremental
+        )
+    )
+    for topic, path in results.items():
+        print(f"{topic}: {path}")
+
+
+if __name__ == "__main__":
+    main()
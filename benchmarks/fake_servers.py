@@ -0,0 +1,275 @@
+"""
+Local stand-ins for OpenRouter and the arXiv API.
+This module runs an OpenAI-compatible chat completions server and an arXiv
+Atom-feed server on localhost, with configurable latency and token rate, so
+the pipeline can be benchmarked without network access or API costs.
+"""
+
+import hashlib
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+_WORDS = (
+    "agents language models planning retrieval reasoning benchmark evaluation "
+    "tool use memory alignment multimodal efficient training inference scaling"
+).split()
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    """Request handler that does not log every request to stderr."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload: Dict, status: int = 200) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeLLMHandler(_QuietHandler):
+    """
+    Minimal ``POST /chat/completions`` implementation.
+
+    When the request offers tools and the conversation has no tool result
+    yet, the reply is a call to the first tool with the last user message as
+    ``query``; otherwise it is ``completion_tokens`` words of text, streamed
+    as server-sent events if requested.
+    """
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        config = self.server.config
+        messages = request.get("messages", [])
+        prompt_tokens = max(1, len(json.dumps(messages)) // 4)
+        model = request.get("model", "fake")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+        time.sleep(config["latency"])
+
+        tools = request.get("tools") or []
+        if tools and not any(m.get("role") == "tool" for m in messages):
+            query = next(
+                (m.get("content") for m in reversed(messages) if m.get("role") == "user"), ""
+            )
+            tool_call = {
+                "id": f"call_{uuid.uuid4().hex[:8]}",
+                "type": "function",
+                "function": {
+                    "name": tools[0]["function"]["name"],
+                    "arguments": json.dumps({"query": str(query)[:200]}),
+                },
+            }
+            self._send_completion(
+                request, completion_id, model, prompt_tokens,
+                {"role": "assistant", "content": None, "tool_calls": [tool_call]},
+                "tool_calls", 20,
+            )
+            return
+
+        n_tokens = config["completion_tokens"]
+        words = [_WORDS[i % len(_WORDS)] for i in range(n_tokens)]
+        if not request.get("stream"):
+            time.sleep(n_tokens / config["tokens_per_second"])
+            self._send_completion(
+                request, completion_id, model, prompt_tokens,
+                {"role": "assistant", "content": " ".join(words)}, "stop", n_tokens,
+            )
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def chunk(choices: List[Dict], usage: Dict = None) -> None:
+            payload = {
+                "id": completion_id, "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": model, "choices": choices,
+            }
+            if usage is not None:
+                payload["usage"] = usage
+            data = f"data: {json.dumps(payload)}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        for i, word in enumerate(words):
+            delta = {"content": (" " if i else "") + word}
+            if i == 0:
+                delta["role"] = "assistant"
+            chunk([{"index": 0, "delta": delta, "finish_reason": None}])
+            time.sleep(1 / config["tokens_per_second"])
+        chunk([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if (request.get("stream_options") or {}).get("include_usage"):
+            chunk([], {
+                "prompt_tokens": prompt_tokens, "completion_tokens": n_tokens,
+                "total_tokens": prompt_tokens + n_tokens,
+            })
+        done = b"data: [DONE]\n\n"
+        self.wfile.write(f"{len(done):x}\r\n".encode("ascii") + done + b"\r\n0\r\n\r\n")
+        self.wfile.flush()
+
+    def _send_completion(self, request, completion_id, model, prompt_tokens, message, finish_reason, completion_tokens):
+        usage = {
+            "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        if not request.get("stream"):
+            self._send_json({
+                "id": completion_id, "object": "chat.completion", "created": int(time.time()),
+                "model": model, "usage": usage,
+                "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            })
+            return
+
+        # Streamed tool call: one delta carrying the whole call
+        delta = {"role": "assistant", "content": message.get("content")}
+        if "tool_calls" in message:
+            delta["tool_calls"] = [dict(call, index=i) for i, call in enumerate(message["tool_calls"])]
+        events = [
+            {"choices": [{"index": 0, "delta": delta, "finish_reason": None}]},
+            {"choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]},
+            {"choices": [], "usage": usage},
+        ]
+        body = b""
+        for event in events:
+            event.update(id=completion_id, object="chat.completion.chunk", created=int(time.time()), model=model)
+            body += f"data: {json.dumps(event)}\n\n".encode("utf-8")
+        body += b"data: [DONE]\n\n"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeArxivHandler(_QuietHandler):
+    """
+    Minimal arXiv ``GET /api/query`` implementation returning an Atom feed.
+
+    Results are deterministic per query, so repeated benchmark runs see the
+    same papers.
+    """
+
+    def do_GET(self):
+        params = parse_qs(urlparse(self.path).query)
+        query = params.get("search_query", [""])[0]
+        start = int(params.get("start", ["0"])[0])
+        page_size = int(params.get("max_results", ["10"])[0])
+        config = self.server.config
+        total = config["total_results"]
+        time.sleep(config["latency"])
+
+        seed = int(hashlib.sha1(query.encode("utf-8")).hexdigest()[:6], 16)
+        entries = []
+        for i in range(start, min(start + page_size, total)):
+            paper_id = f"{2400 + (seed + i) % 100:04d}.{(seed * 7 + i) % 100000:05d}"
+            published = (datetime(2024, 1, 1) + timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M:%SZ")
+            words = " ".join(_WORDS[(seed + i + k) % len(_WORDS)] for k in range(config["abstract_words"]))
+            authors = "".join(
+                f"<author><name>Author {i}-{k}</name></author>" for k in range(4)
+            )
+            entries.append(
+                "<entry>"
+                f"<id>http://arxiv.org/abs/{paper_id}v1</id>"
+                f"<updated>{published}</updated><published>{published}</published>"
+                f"<title>{escape(query[:40])} study {i}</title>"
+                f"<summary>{escape(words)}.</summary>{authors}"
+                f'<link href="http://arxiv.org/abs/{paper_id}v1" rel="alternate" type="text/html"/>'
+                f'<link title="pdf" href="http://arxiv.org/pdf/{paper_id}v1" rel="related" type="application/pdf"/>'
+                '<arxiv:primary_category term="cs.AI"/><category term="cs.AI"/>'
+                "</entry>"
+            )
+        body = (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<feed xmlns="http://www.w3.org/2005/Atom" '
+            'xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/" '
+            'xmlns:arxiv="http://arxiv.org/schemas/atom">'
+            f"<opensearch:totalResults>{total}</opensearch:totalResults>"
+            f"<opensearch:startIndex>{start}</opensearch:startIndex>"
+            f"<opensearch:itemsPerPage>{page_size}</opensearch:itemsPerPage>"
+            + "".join(entries) + "</feed>"
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/atom+xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeServer:
+    """
+    Runs a fake server on a background thread.
+    """
+
+    def __init__(self, handler, **config):
+        """
+        Start the server on a free localhost port.
+
+        Args:
+            handler: Request handler class (FakeLLMHandler or FakeArxivHandler).
+            **config: Settings read by the handler.
+        """
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        self.httpd.config = config
+        self.port = self.httpd.server_address[1]
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def start_fake_llm(latency: float = 0.2, tokens_per_second: float = 200.0, completion_tokens: int = 200) -> FakeServer:
+    """
+    Start the fake OpenAI-compatible server.
+
+    Args:
+        latency (float): Seconds before the first token.
+        tokens_per_second (float): Generation speed after the first token.
+        completion_tokens (int): Tokens in every text reply.
+
+    Returns:
+        FakeServer: Running server; its base URL for OpenAI clients is ``url + "/v1"``.
+    """
+    return FakeServer(
+        FakeLLMHandler, latency=latency, tokens_per_second=tokens_per_second,
+        completion_tokens=completion_tokens,
+    )
+
+
+def start_fake_arxiv(latency: float = 0.1, total_results: int = 1000, abstract_words: int = 150) -> FakeServer:
+    """
+    Start the fake arXiv API server.
+
+    Args:
+        latency (float): Seconds per request.
+        total_results (int): Results available for every query.
+        abstract_words (int): Words per abstract.
+
+    Returns:
+        FakeServer: Running server; the arxiv client URL format is ``url + "/api/query?{}"``.
+    """
+    return FakeServer(
+        FakeArxivHandler, latency=latency, total_results=total_results,
+        abstract_words=abstract_words,
+    )
@@ -0,0 +1,96 @@
+"""
+Import-time benchmark.
+This module measures how long the application's entry modules take to import
+in a fresh interpreter (``python -X importtime``), which is what a Streamlit
+session or API worker pays on a cold start, and lists the heaviest imports.
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --repeats 9 app server
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Sequence, Tuple
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRY_MODULES = ("app", "jobs", "pipeline", "server")
+
+
+def _import_tree(module: str) -> List[Tuple[int, int, str]]:
+    """
+    Import a module in a fresh interpreter and return its import tree.
+
+    Returns:
+        List[Tuple[int, int, str]]: (depth, cumulative microseconds, module
+            name) for every import, in the order Python reports them.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+
+    tree = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        tree.append((depth, int(cumulative), name.strip()))
+    return tree
+
+
+def measure_imports(modules: Sequence[str] = ENTRY_MODULES, repeats: int = 5, top: int = 5) -> Dict:
+    """
+    Measure the cold import time of modules.
+
+    Args:
+        modules (Sequence[str]): Modules to import, each in its own interpreter.
+        repeats (int): Fresh interpreters per module; the median is reported.
+        top (int): Heaviest direct imports listed per module.
+
+    Returns:
+        Dict: Per module, ``median_ms`` and ``min_ms`` of the import and
+            ``heaviest`` direct imports (name -> milliseconds, last run).
+    """
+    results: Dict = {}
+    for module in modules:
+        times = []
+        for _ in range(repeats):
+            tree = _import_tree(module)
+            times.append(next(us for depth, us, name in reversed(tree) if name == module and depth == 0))
+        direct = sorted(
+            ((us, name) for depth, us, name in tree if depth == 1),
+            reverse=True,
+        )[:top]
+        results[module] = {
+            "median_ms": statistics.median(times) / 1000,
+            "min_ms": min(times) / 1000,
+            "heaviest": {name: us / 1000 for us, name in direct},
+        }
+    return results
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Measure cold import time of the entry modules.")
+    parser.add_argument("modules", nargs="*", default=list(ENTRY_MODULES))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    for module, figures in measure_imports(args.modules, args.repeats, args.top).items():
+        print(f"{module:10} median {figures['median_ms']:8.1f} ms   min {figures['min_ms']:8.1f} ms")
+        for name, ms in figures["heaviest"].items():
+            print(f"    {name:40} {ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
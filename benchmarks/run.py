@@ -0,0 +1,203 @@
+"""
+Benchmark harness for the research pipeline.
+This module points the pipeline at local fake OpenRouter and arXiv servers
+and measures single-topic latency, concurrent-session throughput, memory and
+cold import time, writing a JSON report per commit that can be compared across commits.
+
+Usage:
+    python -m benchmarks.run
+    python -m benchmarks.run --concurrency 16 --llm-latency 0.5 --tps 50
+    python -m benchmarks.run --compare benchmarks/results/abc123.json benchmarks/results/def456.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List
+from benchmarks.fake_servers import start_fake_arxiv, start_fake_llm
+from benchmarks.import_time import measure_imports
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+TOPICS = ["Agentic AI", "Large Language Models", "Machine Learning", "Deep Learning"]
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    """Return the pct-th percentile of values (nearest rank)."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _git_commit() -> str:
+    """Return the short hash of HEAD, marking uncommitted changes."""
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+        dirty = subprocess.call(["git", "diff", "--quiet", "HEAD"]) != 0
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def _run_once(mode: str, topic: str, max_results: int) -> Dict:
+    """Run one research session and return its latency figures."""
+    from metrics import trace_run
+    from pipeline import ResearchTeam
+
+    team = ResearchTeam(max_results, mode=mode)
+    start = time.perf_counter()
+    with trace_run() as trace:
+        async for _ in team.run_research(topic):
+            pass
+    ttft = [s["seconds"] for s in trace.spans if s["name"] == "time_to_first_token"]
+    return {"total_s": time.perf_counter() - start, "ttft_s": ttft[0] if ttft else None}
+
+
+async def bench_single_topic(mode: str, iterations: int, max_results: int) -> Dict:
+    """Measure sequential single-topic latency."""
+    runs = [await _run_once(mode, TOPICS[i % len(TOPICS)], max_results) for i in range(iterations)]
+    totals = [r["total_s"] for r in runs]
+    ttfts = [r["ttft_s"] for r in runs if r["ttft_s"] is not None]
+    return {
+        "iterations": iterations,
+        "mean_s": statistics.mean(totals),
+        "p50_s": _percentile(totals, 50),
+        "p95_s": _percentile(totals, 95),
+        "ttft_p50_s": _percentile(ttfts, 50) if ttfts else None,
+    }
+
+
+async def bench_throughput(mode: str, sessions: int, max_results: int) -> Dict:
+    """Measure throughput of concurrent sessions sharing one event loop."""
+    start = time.perf_counter()
+    runs = await asyncio.gather(
+        *(_run_once(mode, TOPICS[i % len(TOPICS)], max_results) for i in range(sessions))
+    )
+    wall = time.perf_counter() - start
+    return {
+        "sessions": sessions,
+        "wall_s": wall,
+        "runs_per_s": sessions / wall,
+        "p95_s": _percentile([r["total_s"] for r in runs], 95),
+    }
+
+
+async def run_benchmarks(args) -> Dict:
+    """Run every benchmark for every pipeline mode."""
+    from agents import close_model_clients
+    from constants import PIPELINE_MODES
+
+    results: Dict = {"single_topic": {}, "throughput": {}}
+    for mode in PIPELINE_MODES:
+        results["single_topic"][mode] = await bench_single_topic(mode, args.iterations, args.max_results)
+
+    tracemalloc.start()
+    for mode in PIPELINE_MODES:
+        results["throughput"][mode] = await bench_throughput(mode, args.concurrency, args.max_results)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss_divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    results["memory"] = {
+        "tracemalloc_peak_mb": peak / (1024 * 1024),
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / rss_divisor,
+    }
+    await close_model_clients()
+    return results
+
+
+def compare(old_path: str, new_path: str) -> None:
+    """Print every numeric figure of two reports side by side."""
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+
+    def flatten(report: Dict, prefix: str = "") -> Dict[str, float]:
+        flat = {}
+        for key, value in report.items():
+            if isinstance(value, dict):
+                flat.update(flatten(value, f"{prefix}{key}."))
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                flat[prefix + key] = value
+        return flat
+
+    old_flat, new_flat = flatten(old["results"]), flatten(new["results"])
+    print(f"{'metric':45} {old['commit']:>14} {new['commit']:>14} {'change':>9}")
+    for key in sorted(set(old_flat) | set(new_flat)):
+        a, b = old_flat.get(key), new_flat.get(key)
+        change = f"{(b - a) / a * 100:+.1f}%" if a and b is not None else ""
+        fmt = lambda v: "-" if v is None else f"{v:.4g}"
+        print(f"{key:45} {fmt(a):>14} {fmt(b):>14} {change:>9}")
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark the research pipeline offline.")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-results", type=int, default=5)
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds to first token.")
+    parser.add_argument("--tps", type=float, default=200.0, help="Fake LLM tokens per second.")
+    parser.add_argument("--completion-tokens", type=int, default=200)
+    parser.add_argument("--arxiv-latency", type=float, default=0.1)
+    parser.add_argument(
+        "--import-repeats", type=int, default=3,
+        help="Fresh interpreters per entry module for the import-time figures.",
+    )
+    parser.add_argument("--output-dir", default=RESULTS_DIR)
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    llm = start_fake_llm(args.llm_latency, args.tps, args.completion_tokens)
+    arxiv_server = start_fake_arxiv(args.arxiv_latency)
+
+    # Configuration is read at import time, so set it before importing the pipeline.
+    # Caches and the arXiv rate limit are disabled so every run exercises the full path.
+    os.environ.update({
+        "OPENROUTER_BASE_URL": llm.url + "/v1",
+        "OPENROUTER_API_KEY": "benchmark",
+        "ARXIV_API_URL": arxiv_server.url + "/api/query?{}",
+        "ARXIV_DELAY_SECONDS": "0",
+        "RESEARCHPILOT_CACHE_DIR": tempfile.mkdtemp(prefix="researchpilot-bench-"),
+        "ARXIV_CACHE_ENABLED": "0",
+        "SUMMARY_CACHE_ENABLED": "0",
+        "VECTOR_INDEX_ENABLED": "0",
+    })
+    try:
+        results = asyncio.run(run_benchmarks(args))
+        results["import_time"] = measure_imports(repeats=args.import_repeats)
+    finally:
+        llm.close()
+        arxiv_server.close()
+
+    commit = _git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "config": {k: v for k, v in vars(args).items() if k not in ("output_dir", "compare")},
+        "results": results,
+    }
+    os.makedirs(args.output_dir, exist_ok=True)
+    path = os.path.join(args.output_dir, f"{commit}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(results, indent=2))
+    print(f"Report written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Persistent result cache.
+This module provides a small SQLite-backed key/value cache with TTL expiry,
+size-bounded LRU eviction and hit/miss counters, and the SQLite base class
+shared by the other on-disk stores (jobs, watermarks).
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from paper import dumps, loads
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteStore:
+    """
+    Base class for data kept in one SQLite database file.
+
+    Subclasses list their CREATE statements in ``_SCHEMA``. Safe to share
+    between threads; every operation runs under ``_lock`` on a single
+    connection.
+    """
+
+    _SCHEMA: Tuple[str, ...] = ()
+
+    def __init__(self, path: str):
+        """
+        Open (or create) the database and its tables.
+
+        Args:
+            path (str): Path to the SQLite database file.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        for statement in self._SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+
+class ResultCache(SQLiteStore):
+    """
+    SQLite-backed JSON cache with TTL expiry and LRU eviction.
+    """
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS cache ("
+        " key TEXT PRIMARY KEY,"
+        " value TEXT NOT NULL,"
+        " created_at REAL NOT NULL,"
+        " accessed_at REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache (accessed_at)",
+    )
+
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path (str): Path to the SQLite database file.
+            ttl_seconds (float): Age after which an entry is treated as a miss.
+            max_entries (int): Maximum number of entries kept before the least
+                recently used ones are evicted.
+        """
+        super().__init__(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a key, refreshing its LRU position on a hit.
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            Optional[Any]: The cached value, or None on a miss or expired entry.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        return loads(value)
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Store a JSON-serializable value and evict old entries if over capacity.
+
+        Args:
+            key (str): Cache key.
+            value (Any): JSON-serializable value to store.
+        """
+        now = time.time()
+        payload = dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, payload, now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        """Remove a single key from the cache."""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def retain_prefixes(self, prefixes: List[str]) -> int:
+        """
+        Remove every entry whose key starts with none of the given prefixes.
+        
+        Used to invalidate entries written under an older version of whatever
+        the prefixes encode (e.g. prompt hashes).
+        
+        Args:
+            prefixes (List[str]): Key prefixes to keep.
+            
+        Returns:
+            int: Number of entries removed.
+        """
+        with self._lock:
+            keys = [
+                key for (key,) in self._conn.execute("SELECT key FROM cache")
+                if not any(key.startswith(prefix) for prefix in prefixes)
+            ]
+            self._conn.executemany("DELETE FROM cache WHERE key = ?", [(k,) for k in keys])
+            self._conn.commit()
+        return len(keys)
+
+    def clear(self) -> None:
+        """Remove every entry and reset the counters."""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return cache counters.
+
+        Returns:
+            Dict[str, int]: Entry count, hits, misses and evictions.
+        """
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+        return {
+            "entries": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _evict(self) -> None:
+        """Drop expired entries, then the least recently used ones over capacity."""
+        if self.ttl_seconds:
+            cursor = self._conn.execute(
+                "DELETE FROM cache WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,),
+            )
+            self.evictions += max(cursor.rowcount, 0)
+
+        (size,) = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+        overflow = size - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN ("
+                " SELECT key FROM cache ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,),
+            )
+            self.evictions += overflow
+            logger.debug(f"Evicted {overflow} least recently used cache entries")
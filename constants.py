@@ -13,12 +13,84 @@ load_dotenv()
 OPENAI_MODEL = "nvidia/nemotron-3-nano-30b-a3b:free"
 OPENAI_MODEL2 = "nvidia/nemotron-3-nano-30b-a3b:free"
 OPENAI_API_KEY_ENV = "OPENROUTER_API_KEY"
-OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+
+# Model routing: fallback models tried in order after the agent's own model
+MODEL_FALLBACKS = [m.strip() for m in os.getenv("MODEL_FALLBACKS", "").split(",") if m.strip()]
+MODEL_TIMEOUT_SECONDS = float(os.getenv("MODEL_TIMEOUT_SECONDS", 120))
+MODEL_TIMEOUTS = {}  # Per-model overrides of MODEL_TIMEOUT_SECONDS, e.g. {"openai/gpt-4o-mini": 30}
+MODEL_MAX_RETRIES = int(os.getenv("MODEL_MAX_RETRIES", 2))  # Per model, on transient errors
+MODEL_BACKOFF_BASE_SECONDS = 0.5
+MODEL_BACKOFF_MAX_SECONDS = 8.0
+MODEL_HEDGING_ENABLED = os.getenv("MODEL_HEDGING_ENABLED", "0") == "1"
+MODEL_HEDGE_PERCENTILE = 95  # Hedge calls slower than this latency percentile
+MODEL_HEDGE_MIN_SAMPLES = 20  # Calls observed per model before hedging starts
 
 # ArXiv Search Configuration
+ARXIV_API_URL = os.getenv("ARXIV_API_URL", "https://export.arxiv.org/api/query?{}")
 DEFAULT_MAX_RESULTS = 5
 ARXIV_SORT_CRITERION = "Relevance"  # Options: Relevance, SubmittedDate, LastUpdatedDate
 ARXIV_SORT_ORDER = "Descending"  # Options: Ascending, Descending
+ARXIV_MAX_WORKERS = 4  # Threads used to run blocking arXiv searches
+ARXIV_SEARCH_TOOL_NAME = "arxiv_search"
+
+# Shared arXiv client: one token bucket per process. arXiv asks for at most one
+# request every 3 seconds; the bucket slows down further on 429/503 responses.
+ARXIV_PAGE_SIZE = 100
+ARXIV_DELAY_SECONDS = float(os.getenv("ARXIV_DELAY_SECONDS", 3.0))  # 0 disables limiting
+ARXIV_BURST = 1  # Requests allowed back to back; more than 1 breaks arXiv's 3-second rule
+ARXIV_MAX_RETRIES = 4  # Per page, on 429/503, connection errors and empty pages
+ARXIV_BACKOFF_BASE_SECONDS = 1.0
+ARXIV_BACKOFF_MAX_SECONDS = 30.0
+
+# Query planner: canonical topics are searched as field-qualified sub-queries
+QUERY_PLANNER_ENABLED = os.getenv("QUERY_PLANNER_ENABLED", "1") == "1"
+QUERY_PLANNER_MAX_SUBQUERIES = 3  # arXiv queries run concurrently per topic
+QUERY_PLANNER_INDEX_PATH = os.getenv("QUERY_PLANNER_INDEX_PATH", "")  # Optional JSON of extra topics
+
+# Cache Configuration
+CACHE_DIR = os.getenv("RESEARCHPILOT_CACHE_DIR", ".cache")
+ARXIV_CACHE_ENABLED = os.getenv("ARXIV_CACHE_ENABLED", "1") == "1"
+ARXIV_CACHE_PATH = os.path.join(CACHE_DIR, "arxiv_results.sqlite3")
+ARXIV_CACHE_TTL_SECONDS = int(os.getenv("ARXIV_CACHE_TTL_SECONDS", 6 * 60 * 60))
+ARXIV_CACHE_MAX_ENTRIES = int(os.getenv("ARXIV_CACHE_MAX_ENTRIES", 500))
+SUMMARY_CACHE_ENABLED = os.getenv("SUMMARY_CACHE_ENABLED", "1") == "1"
+SUMMARY_CACHE_PATH = os.path.join(CACHE_DIR, "summaries.sqlite3")
+SUMMARY_CACHE_TTL_SECONDS = int(os.getenv("SUMMARY_CACHE_TTL_SECONDS", 24 * 60 * 60))
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", 200))
+
+# Local Vector Index Configuration
+VECTOR_INDEX_ENABLED = os.getenv("VECTOR_INDEX_ENABLED", "1") == "1"
+VECTOR_INDEX_DIR = os.path.join(CACHE_DIR, "vector_index")
+VECTOR_INDEX_DIM = 512
+VECTOR_INDEX_LSH_BITS = 12
+VECTOR_INDEX_MIN_SCORE = 0.35  # Cosine similarity needed to answer from the local corpus
+
+# Full-text mode: PDFs are downloaded and the text chunks most relevant to the
+# topic are sent to the summarizer along with each abstract (needs pypdf)
+FULLTEXT_ENABLED = os.getenv("FULLTEXT_ENABLED", "0") == "1"
+FULLTEXT_PDF_URL = os.getenv("FULLTEXT_PDF_URL", "https://arxiv.org/pdf/{}")  # Formatted with the versioned arXiv ID
+FULLTEXT_PDF_DIR = os.path.join(CACHE_DIR, "pdfs")
+FULLTEXT_MAX_PDF_BYTES = 50 * 1024 * 1024
+FULLTEXT_DOWNLOAD_WORKERS = 4
+FULLTEXT_DOWNLOAD_TIMEOUT_SECONDS = 60
+FULLTEXT_EXTRACT_WORKERS = min(4, os.cpu_count() or 1)  # Processes extracting PDF text
+FULLTEXT_MAX_PAGES = 30
+FULLTEXT_CHUNK_WORDS = 250
+FULLTEXT_MAX_CHUNKS = 80  # Per paper
+FULLTEXT_TOP_CHUNKS = 3  # Chunks per paper sent to the summarizer
+FULLTEXT_CACHE_PATH = os.path.join(CACHE_DIR, "fulltext_chunks.sqlite3")
+FULLTEXT_CACHE_MAX_ENTRIES = 2000
+
+# Harvest Configuration
+HARVEST_DIR = os.path.join(CACHE_DIR, "corpus")
+HARVEST_PAGE_SIZE = 500  # arXiv allows at most 2000 results per page
+HARVEST_DELAY_SECONDS = 3.0  # arXiv asks for at least 3 seconds between requests
+HARVEST_NUM_RETRIES = 5
+HARVEST_MAX_RESULTS = 10000  # arXiv does not page past 10,000 results per query
+
+# Metrics Configuration
+METRICS_JSONL_PATH = os.getenv("METRICS_JSONL_PATH", "")  # Append metric events here if set
 
 # Agent Names
 ARXIV_RESEARCH_AGENT_NAME = "ArxivResearchAgent"
@@ -26,11 +98,68 @@ SUMMARIZER_AGENT_NAME = "SummarizerAgent"
 
 # Team Configuration
 MAX_TURNS = 2
+SUMMARIZER_STREAMING = True  # Stream summary tokens as they are generated
+
+# Pipeline Modes
+# "team": ArxivResearchAgent and SummarizerAgent take turns in a group chat.
+# "direct": arXiv is searched without an LLM turn and only SummarizerAgent runs.
+PIPELINE_MODE_TEAM = "team"
+PIPELINE_MODE_DIRECT = "direct"
+PIPELINE_MODES = (PIPELINE_MODE_TEAM, PIPELINE_MODE_DIRECT)
+DEFAULT_PIPELINE_MODE = os.getenv("RESEARCHPILOT_PIPELINE_MODE", PIPELINE_MODE_TEAM)
+
+# Summary Modes (direct pipeline only)
+# "single": one SummarizerAgent prompt covers every paper.
+# "map_reduce": papers are summarized concurrently, then synthesized once.
+SUMMARY_MODE_SINGLE = "single"
+SUMMARY_MODE_MAP_REDUCE = "map_reduce"
+SUMMARY_MODES = (SUMMARY_MODE_SINGLE, SUMMARY_MODE_MAP_REDUCE)
+DEFAULT_SUMMARY_MODE = os.getenv("RESEARCHPILOT_SUMMARY_MODE", SUMMARY_MODE_SINGLE)
+MAP_REDUCE_CONCURRENCY = 4  # Per-paper LLM calls in flight at once
+
+# Background runtime: how often the UI thread checks a job for progress
+RUNTIME_POLL_INTERVAL_SECONDS = 0.1
+
+# Background research jobs
+JOBS_DB_PATH = os.path.join(CACHE_DIR, "jobs.sqlite3")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 4))
+JOB_HISTORY_LIMIT = 20  # Past jobs listed in the sidebar
+JOB_HEARTBEAT_SECONDS = 10  # How often a process marks its running jobs as alive
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", 60))  # Silence after which another process takes a running job over
+
+# Headless HTTP API (server.py)
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", 8000))
+API_MAX_CONCURRENT_RUNS = int(os.getenv("API_MAX_CONCURRENT_RUNS", 8))  # Per worker process
+API_MAX_PENDING_RUNS = int(os.getenv("API_MAX_PENDING_RUNS", 16))  # Waiting runs before 503
+API_MAX_RESULTS = 20
+API_HEARTBEAT_SECONDS = 15.0  # SSE comment sent on idle connections
+
+# Prompt packing: token budget for the papers sent to the summarizer
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", 6000))  # For models not in PROMPT_TOKEN_BUDGETS
+PROMPT_TOKEN_BUDGETS = {}  # Per-model budgets, e.g. {"openai/gpt-4o-mini": 12000}
+PROMPT_MAX_AUTHORS = 5  # Further authors are listed as "et al."
+PROMPT_MIN_ABSTRACT_SENTENCES = 2  # Abstracts are never trimmed below this
+PROMPT_TOKENIZER_ENCODING = "cl100k_base"  # tiktoken encoding; estimated locally if unavailable
+
+# Share one run between concurrent identical requests (same topic and settings)
+COALESCE_RESEARCH_RUNS = os.getenv("COALESCE_RESEARCH_RUNS", "1") == "1"
+
+# Batch Configuration
+BATCH_CONCURRENCY = 4  # Topics researched at the same time
+BATCH_OUTPUT_DIR = "digests"
+LLM_REQUESTS_PER_MINUTE = 20  # Per provider; OpenRouter free tier allows 20/min
+LLM_REQUEST_BURST = 2
+
+# Incremental digests (batch.py --incremental)
+WATERMARK_DB_PATH = os.path.join(CACHE_DIR, "watermarks.sqlite3")
+INCREMENTAL_SORT_CRITERION = "SubmittedDate"  # Newest papers first
 
 # Streamlit UI Configuration
 APP_TITLE = "ArXiv Research Paper Assistant"
 APP_LAYOUT = "wide"
 INITIAL_SIDEBAR_STATE = "expanded"
+SUMMARY_RENDER_INTERVAL_SECONDS = 0.1  # Minimum delay between partial summary renders
 
 # Default Research Topics
 DEFAULT_RESEARCH_TOPICS = [
@@ -0,0 +1,388 @@
+"""
+Full-text ingestion.
+This module downloads paper PDFs into a local content-addressed store,
+extracts their text in a process pool, caches the text chunks per arXiv ID
+and version, and picks the chunks most relevant to a topic so the summarizer
+can see more than the abstract.
+
+PDFs are streamed to disk block by block and read back page by page, so
+memory use does not grow with the size of a paper. Text extraction needs the
+optional ``pypdf`` package.
+"""
+
+import asyncio
+import contextvars
+import functools
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote
+import numpy as np
+import requests
+from cache import ResultCache
+from paper import Paper
+from metrics import REGISTRY
+from utils import get_arxiv_limiter
+from vector_index import embed
+from constants import (
+    FULLTEXT_PDF_URL,
+    FULLTEXT_PDF_DIR,
+    FULLTEXT_MAX_PDF_BYTES,
+    FULLTEXT_DOWNLOAD_WORKERS,
+    FULLTEXT_DOWNLOAD_TIMEOUT_SECONDS,
+    FULLTEXT_EXTRACT_WORKERS,
+    FULLTEXT_MAX_PAGES,
+    FULLTEXT_CHUNK_WORDS,
+    FULLTEXT_MAX_CHUNKS,
+    FULLTEXT_TOP_CHUNKS,
+    FULLTEXT_CACHE_PATH,
+    FULLTEXT_CACHE_MAX_ENTRIES,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from the network and written to disk at a time
+_DOWNLOAD_BLOCK_BYTES = 64 * 1024
+
+_chunk_cache: Optional[ResultCache] = None
+_pdf_store: Optional["PdfStore"] = None
+_extract_executor: Optional[ProcessPoolExecutor] = None
+_lock = threading.Lock()
+_sessions = threading.local()
+
+# Downloads are blocking network I/O; extraction is CPU-bound and runs in
+# worker processes (see get_extract_executor).
+_download_executor = ThreadPoolExecutor(
+    max_workers=FULLTEXT_DOWNLOAD_WORKERS, thread_name_prefix="pdf"
+)
+
+
+def pdf_url(paper: Paper) -> str:
+    """Return the PDF URL of a paper, pinned to its arXiv version."""
+    return FULLTEXT_PDF_URL.format(paper.arxiv_id)
+
+
+def _session() -> requests.Session:
+    """Return this thread's HTTP session, so connections to arXiv are reused."""
+    session = getattr(_sessions, "session", None)
+    if session is None:
+        session = _sessions.session = requests.Session()
+    return session
+
+
+class PdfStore:
+    """
+    Content-addressed store of downloaded PDFs.
+
+    Files in ``directory``:
+        - ``objects/<sha256>.pdf``: PDF contents, named by their hash
+        - ``refs/<arXiv ID>``: hash of the PDF of that arXiv ID and version
+    """
+
+    def __init__(self, directory: str, max_bytes: int = FULLTEXT_MAX_PDF_BYTES):
+        """
+        Open (or create) the store.
+
+        Args:
+            directory (str): Directory holding the store.
+            max_bytes (int): Largest PDF accepted; bigger downloads are aborted.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(directory, "refs"), exist_ok=True)
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "objects", f"{digest}.pdf")
+
+    def _ref_path(self, arxiv_id: str) -> str:
+        # Old-style IDs such as hep-th/9901001v1 contain a slash
+        return os.path.join(self.directory, "refs", quote(arxiv_id, safe=""))
+
+    def get(self, arxiv_id: str) -> Optional[str]:
+        """
+        Look up the stored PDF of an arXiv ID.
+
+        Args:
+            arxiv_id (str): arXiv ID including version.
+
+        Returns:
+            Optional[str]: Path of the PDF, or None if it was never downloaded.
+        """
+        try:
+            with open(self._ref_path(arxiv_id), encoding="utf-8") as f:
+                path = self._object_path(f.read().strip())
+        except FileNotFoundError:
+            return None
+        return path if os.path.exists(path) else None
+
+    def fetch(self, arxiv_id: str, url: str) -> str:
+        """
+        Return the stored PDF of an arXiv ID, downloading it if needed.
+
+        The response is streamed into a temporary file while it is hashed,
+        then moved to its content address; the whole file is never held in
+        memory.
+
+        Args:
+            arxiv_id (str): arXiv ID including version.
+            url (str): URL to download the PDF from.
+
+        Returns:
+            str: Path of the PDF.
+
+        Raises:
+            requests.RequestException: If the download fails.
+            ValueError: If the PDF is larger than ``max_bytes``.
+        """
+        path = self.get(arxiv_id)
+        if path is not None:
+            return path
+
+        get_arxiv_limiter().acquire()
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f, _session().get(
+                url, stream=True, timeout=FULLTEXT_DOWNLOAD_TIMEOUT_SECONDS
+            ) as response:
+                response.raise_for_status()
+                for block in response.iter_content(_DOWNLOAD_BLOCK_BYTES):
+                    size += len(block)
+                    if size > self.max_bytes:
+                        raise ValueError(f"PDF of {arxiv_id} is larger than {self.max_bytes} bytes")
+                    digest.update(block)
+                    f.write(block)
+            path = self._object_path(digest.hexdigest())
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        fd, temp_ref = tempfile.mkstemp(dir=self.directory, suffix=".ref")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(digest.hexdigest())
+        os.replace(temp_ref, self._ref_path(arxiv_id))
+        REGISTRY.inc("pdf_downloaded_bytes_total", size)
+        logger.info(f"Downloaded PDF of {arxiv_id} ({size} bytes)")
+        return path
+
+
+def extract_chunks(
+    path: str,
+    chunk_words: int = FULLTEXT_CHUNK_WORDS,
+    max_pages: int = FULLTEXT_MAX_PAGES,
+    max_chunks: int = FULLTEXT_MAX_CHUNKS,
+) -> List[str]:
+    """
+    Extract the text of a PDF as chunks of about ``chunk_words`` words.
+
+    Pages are read one at a time and only the unfinished chunk is carried
+    between pages. Runs in a worker process, so it must stay a module-level
+    function.
+
+    Args:
+        path (str): Path of the PDF.
+        chunk_words (int): Words per chunk.
+        max_pages (int): Pages read at most (references and appendices at the
+            end of long papers are rarely worth summarizing).
+        max_chunks (int): Chunks returned at most.
+
+    Returns:
+        List[str]: Text chunks in document order.
+
+    Raises:
+        RuntimeError: If pypdf is not installed.
+    """
+    try:
+        from pypdf import PdfReader
+    except ImportError as e:
+        raise RuntimeError("Full-text mode needs the pypdf package (pip install pypdf).") from e
+
+    reader = PdfReader(path)
+    chunks: List[str] = []
+    words: List[str] = []
+    for index in range(min(len(reader.pages), max_pages)):
+        text = reader.pages[index].extract_text() or ""
+        # Re-join words hyphenated across line breaks
+        words.extend(text.replace("-\n", "").split())
+        while len(words) >= chunk_words and len(chunks) < max_chunks:
+            chunks.append(" ".join(words[:chunk_words]))
+            del words[:chunk_words]
+        if len(chunks) >= max_chunks:
+            return chunks
+    if words:
+        chunks.append(" ".join(words))
+    return chunks
+
+
+def select_chunks(chunks: List[str], query: str, k: int = FULLTEXT_TOP_CHUNKS) -> List[str]:
+    """
+    Pick the chunks most similar to a query.
+
+    Args:
+        chunks (List[str]): Text chunks of one paper.
+        query (str): Text the chunks are ranked against.
+        k (int): Chunks to keep.
+
+    Returns:
+        List[str]: At most ``k`` chunks, in document order.
+    """
+    if len(chunks) <= k:
+        return list(chunks)
+    query_vector = embed(query)
+    scores = np.array([embed(chunk) @ query_vector for chunk in chunks])
+    keep = sorted(np.argsort(-scores, kind="stable")[:k])
+    return [chunks[i] for i in keep]
+
+
+def get_chunk_cache() -> ResultCache:
+    """
+    Return the process-wide chunk cache, opening it on first use.
+
+    Entries never expire: an arXiv ID with its version always names the same
+    PDF.
+    """
+    global _chunk_cache
+    with _lock:
+        if _chunk_cache is None:
+            _chunk_cache = ResultCache(
+                FULLTEXT_CACHE_PATH, ttl_seconds=0, max_entries=FULLTEXT_CACHE_MAX_ENTRIES
+            )
+        return _chunk_cache
+
+
+def get_pdf_store() -> PdfStore:
+    """Return the process-wide PDF store, creating it on first use."""
+    global _pdf_store
+    with _lock:
+        if _pdf_store is None:
+            _pdf_store = PdfStore(FULLTEXT_PDF_DIR)
+        return _pdf_store
+
+
+def get_extract_executor() -> ProcessPoolExecutor:
+    """
+    Return the process pool used for text extraction, starting it on first use.
+
+    Workers are spawned rather than forked because the parent runs event
+    loops and thread pools that a forked child would inherit half-copied.
+    """
+    global _extract_executor
+    with _lock:
+        if _extract_executor is None:
+            _extract_executor = ProcessPoolExecutor(
+                max_workers=FULLTEXT_EXTRACT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _extract_executor
+
+
+def _discard_extract_executor(executor: ProcessPoolExecutor) -> None:
+    """Drop a broken process pool so the next extraction starts a new one."""
+    global _extract_executor
+    with _lock:
+        if _extract_executor is executor:
+            _extract_executor = None
+    executor.shutdown(wait=False)
+
+
+async def paper_chunks(paper: Paper) -> List[str]:
+    """
+    Return every text chunk of a paper, from the cache or its PDF.
+
+    Args:
+        paper (Paper): Paper with an arXiv ID.
+
+    Returns:
+        List[str]: Text chunks in document order.
+
+    Raises:
+        Exception: If the PDF cannot be downloaded or read.
+    """
+    cache = get_chunk_cache()
+    key = f"chunks:{paper.arxiv_id}"
+    cached = cache.get(key)
+    REGISTRY.inc("cache_hits_total" if cached is not None else "cache_misses_total", cache="fulltext")
+    if cached is not None:
+        return cached
+
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    with REGISTRY.span("pdf_download"):
+        path = await loop.run_in_executor(
+            _download_executor,
+            functools.partial(context.run, get_pdf_store().fetch, paper.arxiv_id, pdf_url(paper)),
+        )
+    executor = get_extract_executor()
+    with REGISTRY.span("pdf_extract"):
+        try:
+            chunks = await loop.run_in_executor(executor, extract_chunks, path)
+        except BrokenProcessPool:
+            _discard_extract_executor(executor)
+            raise
+    cache.set(key, chunks)
+    return chunks
+
+
+async def fetch_excerpts(
+    papers: List[Paper], query: Optional[str] = None, k: int = FULLTEXT_TOP_CHUNKS
+) -> Dict[str, List[str]]:
+    """
+    Fetch the full-text chunks of each paper that are most relevant to a query.
+
+    Papers are processed concurrently. A paper without an arXiv ID, or whose
+    PDF cannot be downloaded or read, is left out and summarized from its
+    abstract alone.
+
+    Args:
+        papers (List[Paper]): Papers to read.
+        query (Optional[str]): Text to rank chunks against, usually the topic.
+            Defaults to each paper's own title and abstract.
+        k (int): Chunks kept per paper.
+
+    Returns:
+        Dict[str, List[str]]: Selected chunks keyed by Paper.key.
+    """
+    readable = [p for p in papers if p.arxiv_id]
+    results = await asyncio.gather(*(paper_chunks(p) for p in readable), return_exceptions=True)
+
+    excerpts: Dict[str, List[str]] = {}
+    for paper, result in zip(readable, results):
+        if isinstance(result, BaseException):
+            if isinstance(result, asyncio.CancelledError):
+                raise result
+            REGISTRY.inc("fulltext_errors_total")
+            logger.warning(f"Falling back to the abstract of {paper.arxiv_id}: {result!r}")
+            continue
+        if result:
+            excerpts[paper.key] = select_chunks(result, query or f"{paper.title} {paper.abstract}", k)
+    return excerpts
+
+
+def with_excerpts(papers: List[Paper], excerpts: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+    """
+    Return the dictionary forms of papers with their full-text excerpts added.
+
+    Args:
+        papers (List[Paper]): Papers to convert.
+        excerpts (Dict[str, List[str]]): Chunks keyed by Paper.key, as
+            returned by fetch_excerpts().
+
+    Returns:
+        List[Dict[str, Any]]: Papers; those with excerpts get an ``excerpts`` list.
+    """
+    items = []
+    for paper in papers:
+        item = paper.to_dict()
+        if paper.key in excerpts:
+            item["excerpts"] = excerpts[paper.key]
+        items.append(item)
+    return items
@@ -0,0 +1,352 @@
+"""
+Bulk arXiv harvesting into a local corpus.
+This module pages through large arXiv result sets (e.g. a whole category over
+a date range), checkpointing progress so an interrupted harvest resumes where
+it stopped, and stores the papers in a JSONL file with an offset index that
+can be searched without network calls.
+
+Usage:
+    python harvest.py --category cs.AI --from 2024-01-01 --to 2024-06-30
+    python harvest.py --search "tool-using agents"
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Tuple
+import arxiv
+from paper import Paper, dumps, loads
+from arxiv_client import ThrottledArxivClient
+from utils import get_arxiv_limiter
+from vector_index import get_paper_index, tokenize
+from constants import (
+    HARVEST_DIR,
+    HARVEST_PAGE_SIZE,
+    HARVEST_DELAY_SECONDS,
+    HARVEST_NUM_RETRIES,
+    HARVEST_MAX_RESULTS,
+    DEFAULT_MAX_RESULTS,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def build_harvest_query(
+    category: Optional[str] = None,
+    query: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> str:
+    """
+    Build an arXiv query string for a category, free-text query and date range.
+
+    Args:
+        category (Optional[str]): arXiv category such as ``cs.AI``.
+        query (Optional[str]): Additional free-text query.
+        start_date (Optional[date]): First submission date (inclusive).
+        end_date (Optional[date]): Last submission date (inclusive).
+
+    Returns:
+        str: Query string for arxiv.Search.
+
+    Raises:
+        ValueError: If neither a category nor a query is given.
+    """
+    parts = []
+    if category:
+        parts.append(f"cat:{category}")
+    if query:
+        parts.append(f"({query})")
+    if not parts:
+        raise ValueError("A harvest needs a category or a query.")
+    if start_date or end_date:
+        start = (start_date or date(1991, 1, 1)).strftime("%Y%m%d")
+        end = (end_date or date.today()).strftime("%Y%m%d")
+        parts.append(f"submittedDate:[{start}0000 TO {end}2359]")
+    return " AND ".join(parts)
+
+
+class LocalCorpus:
+    """
+    Append-only JSONL store of papers with a byte-offset index.
+
+    Files in ``directory``:
+        - ``corpus.jsonl``: one paper (dictionary form) per line
+        - ``corpus.idx.json``: arXiv ID -> byte offset, plus how many bytes of
+          the JSONL file the index covers (the rest is re-scanned on open)
+    """
+
+    def __init__(self, directory: str = HARVEST_DIR):
+        """
+        Open (or create) the corpus.
+
+        Args:
+            directory (str): Directory holding the corpus files.
+        """
+        self.directory = directory
+        self.data_path = os.path.join(directory, "corpus.jsonl")
+        self.index_path = os.path.join(directory, "corpus.idx.json")
+        os.makedirs(directory, exist_ok=True)
+
+        self.offsets: Dict[str, int] = {}
+        indexed_size = 0
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding="utf-8") as f:
+                saved = json.load(f)
+            self.offsets = saved["offsets"]
+            indexed_size = saved["size"]
+        self._catch_up(indexed_size)
+        self._file = open(self.data_path, "ab")
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __contains__(self, arxiv_id: str) -> bool:
+        return arxiv_id in self.offsets
+
+    def add(self, paper: Paper) -> bool:
+        """
+        Append a paper unless it is already stored.
+
+        Args:
+            paper (Paper): Paper with an ``arxiv_id``.
+
+        Returns:
+            bool: True if the paper was added.
+        """
+        arxiv_id = paper.arxiv_id
+        if arxiv_id in self.offsets:
+            return False
+        self.offsets[arxiv_id] = self._file.tell()
+        self._file.write((dumps(paper) + "\n").encode("utf-8"))
+        return True
+
+    def get(self, arxiv_id: str) -> Optional[Paper]:
+        """
+        Read one paper by arXiv ID.
+
+        Args:
+            arxiv_id (str): Short arXiv ID.
+
+        Returns:
+            Optional[Paper]: The paper, or None if it is not stored.
+        """
+        offset = self.offsets.get(arxiv_id)
+        if offset is None:
+            return None
+        self._file.flush()
+        with open(self.data_path, "rb") as f:
+            f.seek(offset)
+            return Paper.from_dict(loads(f.readline()))
+
+    def __iter__(self) -> Iterator[Paper]:
+        """Stream every stored paper without loading the corpus into memory."""
+        self._file.flush()
+        with open(self.data_path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    yield Paper.from_dict(loads(line))
+
+    def search(self, query: str, max_results: int = DEFAULT_MAX_RESULTS) -> List[Paper]:
+        """
+        Keyword search over the local corpus (no network).
+
+        Papers are scored by how many query terms appear in the title (weighted
+        double) and abstract.
+
+        Args:
+            query (str): Free-text query.
+            max_results (int): Number of papers to return.
+
+        Returns:
+            List[Paper]: Best matching papers, best first.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        scored: List[Tuple[int, Paper]] = []
+        for paper in self:
+            title_terms = set(tokenize(paper.title))
+            abstract_terms = set(tokenize(paper.abstract))
+            score = 2 * len(terms & title_terms) + len(terms & abstract_terms)
+            if score:
+                scored.append((score, paper))
+                if len(scored) > 4 * max_results:
+                    scored.sort(key=lambda item: -item[0])
+                    del scored[max_results:]
+        scored.sort(key=lambda item: -item[0])
+        return [paper for _, paper in scored[:max_results]]
+
+    def flush(self) -> None:
+        """Flush appended papers and persist the offset index atomically."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"size": self._file.tell(), "offsets": self.offsets}, f)
+        os.replace(tmp_path, self.index_path)
+
+    def close(self) -> None:
+        """Flush and close the corpus."""
+        self.flush()
+        self._file.close()
+
+    def _catch_up(self, indexed_size: int) -> None:
+        """Index records appended after the last saved index, dropping a torn last line."""
+        if not os.path.exists(self.data_path):
+            return
+        with open(self.data_path, "r+b") as f:
+            f.seek(indexed_size)
+            offset = indexed_size
+            for line in iter(f.readline, b""):
+                try:
+                    record = loads(line)
+                except ValueError:
+                    logger.warning(f"Dropping incomplete record at byte {offset}")
+                    f.truncate(offset)
+                    break
+                self.offsets[record["arxiv_id"]] = offset
+                offset += len(line)
+
+
+class Harvester:
+    """
+    Pages through an arXiv query and stores every result in a LocalCorpus.
+
+    Results are requested oldest-first so papers submitted during a harvest
+    land at the end and never shift the offsets of pages still to fetch.
+    Progress is checkpointed after every page.
+    """
+
+    def __init__(
+        self,
+        corpus: LocalCorpus,
+        page_size: int = HARVEST_PAGE_SIZE,
+        delay_seconds: float = HARVEST_DELAY_SECONDS,
+        num_retries: int = HARVEST_NUM_RETRIES,
+        index_papers: bool = True,
+    ):
+        """
+        Initialize the harvester.
+
+        Args:
+            corpus (LocalCorpus): Corpus the papers are written to.
+            page_size (int): Results requested per arXiv API call.
+            delay_seconds (float): Minimum delay between this harvester's
+                API calls, on top of the process-wide arXiv rate limit.
+            num_retries (int): Retries per page before giving up.
+            index_papers (bool): Also add papers to the local vector index.
+        """
+        self.corpus = corpus
+        self.page_size = page_size
+        self.index_papers = index_papers
+        self.client = ThrottledArxivClient(
+            get_arxiv_limiter(), page_size=page_size, delay_seconds=delay_seconds,
+            max_retries=num_retries,
+        )
+
+    def _checkpoint_path(self, query: str) -> str:
+        """Return the checkpoint file for a query."""
+        digest = hashlib.sha1(query.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.corpus.directory, f"checkpoint-{digest}.json")
+
+    def _load_checkpoint(self, query: str) -> Dict:
+        """Load the checkpoint for a query, or a fresh one."""
+        path = self._checkpoint_path(query)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        return {"query": query, "offset": 0, "done": False}
+
+    def _save_checkpoint(self, checkpoint: Dict) -> None:
+        """Persist the corpus and then the checkpoint, in that order."""
+        self.corpus.flush()
+        path = self._checkpoint_path(checkpoint["query"])
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f)
+        os.replace(path + ".tmp", path)
+
+    def harvest(self, query: str, max_results: int = HARVEST_MAX_RESULTS) -> Iterator[Paper]:
+        """
+        Harvest a query, resuming from its checkpoint.
+
+        Args:
+            query (str): arXiv query, e.g. from build_harvest_query.
+            max_results (int): Maximum number of results to walk through.
+
+        Yields:
+            Paper: Each paper newly added to the corpus.
+        """
+        checkpoint = self._load_checkpoint(query)
+        if checkpoint["done"]:
+            logger.info(f"Harvest already complete for query: {query}")
+            return
+        if checkpoint["offset"]:
+            logger.info(f"Resuming harvest at result {checkpoint['offset']} for query: {query}")
+
+        search = arxiv.Search(
+            query=query,
+            max_results=max_results,
+            sort_by=arxiv.SortCriterion.SubmittedDate,
+            sort_order=arxiv.SortOrder.Ascending,
+        )
+        page: List[Paper] = []
+        for result in self.client.results(search, offset=checkpoint["offset"]):
+            paper = Paper.from_result(result)
+            if self.corpus.add(paper):
+                page.append(paper)
+                yield paper
+            checkpoint["offset"] += 1
+            if checkpoint["offset"] % self.page_size == 0:
+                self._finish_page(checkpoint, page)
+                page = []
+
+        checkpoint["done"] = True
+        self._finish_page(checkpoint, page)
+        logger.info(f"Harvest complete: {checkpoint['offset']} results for query: {query}")
+
+    def _finish_page(self, checkpoint: Dict, page: List[Paper]) -> None:
+        """Index a page of new papers and checkpoint progress."""
+        if self.index_papers and page:
+            get_paper_index().add(page)
+        self._save_checkpoint(checkpoint)
+        logger.info(f"Harvested {checkpoint['offset']} results ({len(self.corpus)} papers stored)")
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Harvest arXiv papers into a local corpus.")
+    parser.add_argument("--category", help="arXiv category, e.g. cs.AI")
+    parser.add_argument("--query", help="Free-text arXiv query")
+    parser.add_argument("--from", dest="start_date", type=date.fromisoformat)
+    parser.add_argument("--to", dest="end_date", type=date.fromisoformat)
+    parser.add_argument("--max-results", type=int, default=HARVEST_MAX_RESULTS)
+    parser.add_argument("--page-size", type=int, default=HARVEST_PAGE_SIZE)
+    parser.add_argument("--corpus-dir", default=HARVEST_DIR)
+    parser.add_argument("--search", help="Search the local corpus instead of harvesting")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    corpus = LocalCorpus(args.corpus_dir)
+    try:
+        if args.search:
+            for paper in corpus.search(args.search):
+                print(f"{paper.arxiv_id}  {paper.published}  {paper.title}")
+            return
+
+        query = build_harvest_query(args.category, args.query, args.start_date, args.end_date)
+        harvester = Harvester(corpus, page_size=args.page_size)
+        added = sum(1 for _ in harvester.harvest(query, args.max_results))
+        print(f"Added {added} papers; corpus now holds {len(corpus)}.")
+    finally:
+        corpus.close()
+
+
+if __name__ == "__main__":
+    main()
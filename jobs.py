@@ -0,0 +1,457 @@
+"""
+Background research jobs.
+This module queues research runs in a SQLite table and processes them with a
+pool of workers on the shared background runtime. Each job keeps its status,
+papers and summary, so the UI can reattach to a running job after a rerun,
+show past reviews instantly and avoid recomputing them.
+"""
+
+import asyncio
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional
+from cache import SQLiteStore
+from metrics import REGISTRY, RunTrace, trace_run
+from paper import PaperStreamParser, dumps, loads, papers_from_dicts
+from runtime import get_runtime
+from constants import (
+    JOBS_DB_PATH,
+    JOB_WORKERS,
+    JOB_HEARTBEAT_SECONDS,
+    JOB_STALE_SECONDS,
+    RUNTIME_POLL_INTERVAL_SECONDS,
+    SUMMARIZER_AGENT_NAME,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+JOB_FINISHED_STATES = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+
+class JobStore(SQLiteStore):
+    """
+    SQLite table of research jobs.
+
+    Several processes can share the table. A job is claimed atomically by one
+    store, whose ``owner`` ID is recorded with it; the owner refreshes
+    ``heartbeat_at`` while the job runs, and a running job whose heartbeat
+    has gone stale is put back in the queue for another process.
+    """
+
+    _COLUMNS = (
+        "id", "topic", "max_results", "mode", "summary_mode", "status",
+        "papers", "summary", "error", "created_at", "started_at", "finished_at",
+        "owner", "heartbeat_at",
+    )
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS jobs ("
+        " id TEXT PRIMARY KEY,"
+        " topic TEXT NOT NULL,"
+        " max_results INTEGER NOT NULL,"
+        " mode TEXT NOT NULL,"
+        " summary_mode TEXT NOT NULL,"
+        " status TEXT NOT NULL,"
+        " papers TEXT,"
+        " summary TEXT,"
+        " error TEXT,"
+        " created_at REAL NOT NULL,"
+        " started_at REAL,"
+        " finished_at REAL,"
+        " owner TEXT,"
+        " heartbeat_at REAL)",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)",
+    )
+    # Columns added after the table was first released, with their types
+    _ADDED_COLUMNS = (("owner", "TEXT"), ("heartbeat_at", "REAL"))
+
+    def __init__(self, path: str = JOBS_DB_PATH):
+        """
+        Open (or create) the job database.
+
+        Args:
+            path (str): Path to the SQLite database file.
+        """
+        super().__init__(path)
+        self.owner = uuid.uuid4().hex[:12]
+        with self._lock:
+            existing = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            for column, column_type in self._ADDED_COLUMNS:
+                if column not in existing:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+            self._conn.commit()
+
+    def _row_to_job(self, row) -> Dict[str, Any]:
+        """Convert a database row to a job dictionary."""
+        job = dict(zip(self._COLUMNS, row))
+        job["papers"] = papers_from_dicts(loads(job["papers"])) if job["papers"] else None
+        return job
+
+    def create(self, topic: str, max_results: int, mode: str, summary_mode: str) -> str:
+        """
+        Add a queued job.
+
+        Args:
+            topic (str): Research topic.
+            max_results (int): Number of papers.
+            mode (str): Pipeline mode.
+            summary_mode (str): Summary mode.
+
+        Returns:
+            str: The new job ID.
+        """
+        job_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, topic, max_results, mode, summary_mode, status, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, topic, max_results, mode, summary_mode, JOB_QUEUED, time.time()),
+            )
+            self._conn.commit()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a job.
+
+        Args:
+            job_id (str): Job ID.
+
+        Returns:
+            Optional[Dict[str, Any]]: The job, or None if it does not exist.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(self._COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Return the most recently created jobs, newest first.
+
+        Args:
+            limit (int): Maximum number of jobs.
+
+        Returns:
+            List[Dict[str, Any]]: Jobs.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(self._COLUMNS)} FROM jobs ORDER BY created_at DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def claim_next(self) -> Optional[Dict[str, Any]]:
+        """
+        Mark the oldest queued job as running and return it.
+
+        The job is selected and claimed in one statement, so two processes
+        never claim the same job.
+
+        Returns:
+            Optional[Dict[str, Any]]: The claimed job, or None if the queue is empty.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ?, owner = ?, heartbeat_at = ?"
+                " WHERE id = (SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1)"
+                f" AND status = ? RETURNING {', '.join(self._COLUMNS)}",
+                (JOB_RUNNING, now, self.owner, now, JOB_QUEUED, JOB_QUEUED),
+            ).fetchone()
+            self._conn.commit()
+        return self._row_to_job(row) if row else None
+
+    def update(self, job_id: str, **fields) -> None:
+        """
+        Update columns of a job.
+
+        Args:
+            job_id (str): Job ID.
+            **fields: Column values; ``papers`` is stored as JSON.
+        """
+        if "papers" in fields and fields["papers"] is not None:
+            fields["papers"] = dumps(fields["papers"])
+        if fields.get("status") in JOB_FINISHED_STATES:
+            fields.setdefault("finished_at", time.time())
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id)
+            )
+            self._conn.commit()
+
+    def cancel_queued(self, job_id: str) -> bool:
+        """
+        Cancel a job that has not started yet.
+
+        Args:
+            job_id (str): Job ID.
+
+        Returns:
+            bool: True if the job was still queued.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                (JOB_CANCELLED, time.time(), job_id, JOB_QUEUED),
+            )
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def heartbeat(self) -> None:
+        """Mark the jobs this store is running as alive."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status = ?",
+                (time.time(), self.owner, JOB_RUNNING),
+            )
+            self._conn.commit()
+
+    def requeue_interrupted(self, stale_after: float = JOB_STALE_SECONDS) -> int:
+        """
+        Put running jobs whose process stopped back in the queue.
+
+        Jobs of a process that is still alive keep their heartbeat fresh and
+        are left alone.
+
+        Args:
+            stale_after (float): Seconds without a heartbeat after which a
+                running job is considered interrupted.
+
+        Returns:
+            int: Number of jobs requeued.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL, owner = NULL, heartbeat_at = NULL"
+                " WHERE status = ? AND owner IS NOT ? AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+                (JOB_QUEUED, JOB_RUNNING, self.owner, time.time() - stale_after),
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+
+class LiveJob:
+    """
+    In-memory message log of a job being processed in this process.
+
+    Any number of readers can follow it from the first message, which is how
+    a rerun Streamlit session reattaches to a running job.
+    """
+
+    def __init__(self):
+        """Initialize an empty log."""
+        self.messages: List = []
+        self.finished = False
+        self.trace: Optional[RunTrace] = None
+        self.task: Optional[asyncio.Task] = None
+        self._condition = threading.Condition()
+
+    def append(self, message) -> None:
+        """Add a message and wake up readers."""
+        with self._condition:
+            self.messages.append(message)
+            self._condition.notify_all()
+
+    def finish(self) -> None:
+        """Mark the log complete and wake up readers."""
+        with self._condition:
+            self.finished = True
+            self._condition.notify_all()
+
+    def follow(self) -> Iterator:
+        """
+        Yield every message from the start, blocking until the job finishes.
+
+        Yields:
+            Any: Each message of the job.
+        """
+        index = 0
+        while True:
+            with self._condition:
+                while index >= len(self.messages) and not self.finished:
+                    self._condition.wait(RUNTIME_POLL_INTERVAL_SECONDS)
+                pending = self.messages[index:]
+                finished = self.finished
+            index += len(pending)
+            yield from pending
+            if finished and index >= len(self.messages):
+                return
+
+
+class JobQueue:
+    """
+    Runs queued research jobs with a fixed pool of workers.
+
+    Workers are coroutines on the shared background runtime; jobs borrow a
+    ResearchTeam from a pool on that runtime, so a team is reset and reused
+    rather than rebuilt for every job (model clients are pooled
+    process-wide). The research pipeline is imported on a background thread
+    when the queue starts, so creating the queue (e.g. on the UI's first page
+    load) stays fast.
+    """
+
+    def __init__(self, store: JobStore, workers: int = JOB_WORKERS):
+        """
+        Start the workers.
+
+        Args:
+            store (JobStore): Persistent job table.
+            workers (int): Number of jobs processed concurrently.
+        """
+        self.store = store
+        self.live: Dict[str, LiveJob] = {}
+        self.workers = workers
+        self._teams = None
+        self._runtime = get_runtime()
+        self._wakeup = asyncio.Event()
+        requeued = store.requeue_interrupted()
+        if requeued:
+            logger.info(f"Requeued {requeued} interrupted jobs")
+        threading.Thread(target=self._preload, name="pipeline-preload", daemon=True).start()
+        self._runtime.submit(self._heartbeat())
+        for _ in range(workers):
+            self._runtime.submit(self._worker())
+
+    @staticmethod
+    def _preload() -> None:
+        """Import the research pipeline ahead of the first job."""
+        try:
+            import pipeline
+
+            pipeline.preload()
+        except Exception as e:
+            # The first job imports it again and reports the error
+            logger.warning(f"Could not preload the research pipeline: {str(e)}")
+
+    def submit(self, topic: str, max_results: int, mode: str, summary_mode: str) -> str:
+        """
+        Queue a research run.
+
+        Args:
+            topic (str): Research topic.
+            max_results (int): Number of papers.
+            mode (str): Pipeline mode.
+            summary_mode (str): Summary mode.
+
+        Returns:
+            str: The job ID.
+        """
+        job_id = self.store.create(topic, max_results, mode, summary_mode)
+        REGISTRY.inc("jobs_submitted_total", mode=mode)
+        self._runtime.loop.call_soon_threadsafe(self._wakeup.set)
+        return job_id
+
+    def cancel(self, job_id: str) -> None:
+        """
+        Cancel a queued or running job.
+
+        Args:
+            job_id (str): Job ID.
+        """
+        if self.store.cancel_queued(job_id):
+            return
+        live = self.live.get(job_id)
+        if live is not None and live.task is not None:
+            self._runtime.loop.call_soon_threadsafe(live.task.cancel)
+
+    async def _heartbeat(self) -> None:
+        """Keep this process's jobs alive and take over jobs of processes that stopped."""
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+            try:
+                self.store.heartbeat()
+                requeued = self.store.requeue_interrupted()
+            except Exception as e:
+                logger.warning(f"Job heartbeat failed: {str(e)}")
+                continue
+            if requeued:
+                logger.info(f"Requeued {requeued} jobs of a stopped process")
+                self._wakeup.set()
+
+    async def _worker(self) -> None:
+        """Process jobs until the runtime stops."""
+        while True:
+            job = self.store.claim_next()
+            if job is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            live = LiveJob()
+            self.live[job["id"]] = live
+            live.task = asyncio.create_task(self._process(job, live))
+            # A cancelled job must not stop the worker, so wait without raising
+            await asyncio.wait([live.task])
+
+    async def _process(self, job: Dict[str, Any], live: LiveJob) -> None:
+        """Run one job, recording its messages, papers and summary."""
+        from autogen_agentchat.messages import ModelClientStreamingChunkEvent, TextMessage
+        from pipeline import TeamPool, coalesced_research
+
+        if self._teams is None:
+            self._teams = TeamPool(self.workers)
+        job_id = job["id"]
+        papers = None
+        summary_parts: List[str] = []
+        logger.info(f"Job {job_id} started: {job['topic']}")
+        try:
+            with trace_run() as trace:
+                live.trace = trace
+                async with self._teams.team(
+                    job["max_results"], mode=job["mode"], summary_mode=job["summary_mode"]
+                ) as team:
+                    async for message in coalesced_research(team, job["topic"], job["max_results"]):
+                        live.append(message)
+                        content = getattr(message, "content", None)
+                        if isinstance(message, ModelClientStreamingChunkEvent) or not isinstance(content, str):
+                            continue
+                        if isinstance(message, TextMessage) and message.source == SUMMARIZER_AGENT_NAME:
+                            summary_parts.append(content)
+                        elif papers is None:
+                            parser = PaperStreamParser()
+                            parser.feed(content)
+                            if parser.papers:
+                                papers = parser.papers
+                                self.store.update(job_id, papers=papers)
+            self.store.update(job_id, status=JOB_DONE, summary="\n\n".join(summary_parts))
+            REGISTRY.inc("jobs_finished_total", status=JOB_DONE)
+            logger.info(f"Job {job_id} done")
+        except asyncio.CancelledError:
+            self.store.update(job_id, status=JOB_CANCELLED, summary="\n\n".join(summary_parts))
+            REGISTRY.inc("jobs_finished_total", status=JOB_CANCELLED)
+            logger.info(f"Job {job_id} cancelled")
+            raise
+        except Exception as e:
+            self.store.update(job_id, status=JOB_FAILED, error=str(e))
+            REGISTRY.inc("jobs_finished_total", status=JOB_FAILED)
+            logger.error(f"Job {job_id} failed: {str(e)}")
+        finally:
+            live.finish()
+            self.live.pop(job_id, None)
+
+
+_job_queue: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """
+    Return the process-wide job queue, starting its workers on first use.
+
+    Returns:
+        JobQueue: The shared queue.
+    """
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue(JobStore())
+        return _job_queue
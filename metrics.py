@@ -0,0 +1,273 @@
+"""
+Pipeline instrumentation.
+This module records timing spans, counters and token usage for the research
+pipeline and exposes them as Prometheus text, as JSON lines, and as a per-run
+trace the UI can show as a latency breakdown. Everything works offline.
+"""
+
+import contextvars
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from constants import METRICS_JSONL_PATH
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    """Return a hashable, ordered form of a label set."""
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: str = "") -> str:
+    """Format a label set in Prometheus exposition syntax."""
+    parts = [f'{k}="{v}"' for k, v in key]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class RunTrace:
+    """
+    Spans and token counts recorded during a single research run.
+    """
+
+    def __init__(self):
+        """Initialize an empty trace."""
+        self.started_at = time.perf_counter()
+        self.spans: List[Dict] = []
+        self.tokens: Dict[str, Dict[str, int]] = {}
+        self.counters: Dict[str, float] = {}
+
+    def breakdown(self) -> List[Dict]:
+        """
+        Return the spans as table rows, in the order they finished.
+
+        Returns:
+            List[Dict]: Rows with stage, labels, start offset and duration.
+        """
+        return [
+            {
+                "stage": span["name"],
+                "labels": ", ".join(f"{k}={v}" for k, v in span["labels"].items()),
+                "start_s": round(span["start"] - self.started_at, 3),
+                "duration_s": round(span["seconds"], 3),
+            }
+            for span in self.spans
+        ]
+
+
+_current_trace: contextvars.ContextVar[Optional[RunTrace]] = contextvars.ContextVar(
+    "current_trace", default=None
+)
+
+
+class Metrics:
+    """
+    Thread-safe registry of counters and latency histograms.
+
+    Listeners receive every span and counter update as a dictionary event,
+    which is how the JSON-lines exporter is attached.
+    """
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, List[float]]] = {}
+        self._listeners: List[Callable[[Dict], None]] = []
+
+    def add_listener(self, listener: Callable[[Dict], None]) -> None:
+        """
+        Register a callback for metric events.
+
+        Args:
+            listener (Callable[[Dict], None]): Called with each event dictionary.
+        """
+        self._listeners.append(listener)
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """
+        Increment a counter.
+
+        Args:
+            name (str): Counter name, e.g. ``cache_hits_total``.
+            value (float): Amount to add.
+            **labels: Label values, e.g. ``cache="arxiv"``.
+        """
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0) + value
+        trace = _current_trace.get()
+        if trace is not None:
+            trace_key = name + _format_labels(_label_key(labels))
+            trace.counters[trace_key] = trace.counters.get(trace_key, 0) + value
+        self._emit({"type": "counter", "name": name, "value": value, "labels": labels})
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        """
+        Record a duration in a latency histogram.
+
+        Args:
+            name (str): Histogram name, e.g. ``stage_seconds``.
+            seconds (float): Observed duration.
+            **labels: Label values.
+        """
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            buckets = series.setdefault(_label_key(labels), [0.0] * (len(LATENCY_BUCKETS) + 2))
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    buckets[i] += 1
+            buckets[-2] += 1  # count
+            buckets[-1] += seconds  # sum
+
+    def record_span(self, name: str, start: float, seconds: float, **labels) -> None:
+        """
+        Record a finished span in the stage histogram and the current trace.
+
+        Args:
+            name (str): Stage name, e.g. ``arxiv_fetch``.
+            start (float): ``time.perf_counter()`` value at the start of the span.
+            seconds (float): Span duration.
+            **labels: Label values.
+        """
+        self.observe("stage_seconds", seconds, stage=name, **labels)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.spans.append({"name": name, "start": start, "seconds": seconds, "labels": labels})
+        self._emit({"type": "span", "name": name, "seconds": seconds, "labels": labels})
+
+    @contextmanager
+    def span(self, name: str, **labels) -> Iterator[None]:
+        """
+        Time a block of code as a pipeline stage.
+
+        Args:
+            name (str): Stage name.
+            **labels: Label values.
+        """
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            self.record_span(name, start, time.perf_counter() - start, status=status, **labels)
+
+    def record_tokens(self, model: str, prompt_tokens: int, completion_tokens: int) -> None:
+        """
+        Count tokens sent to and received from a model.
+
+        Args:
+            model (str): Model name.
+            prompt_tokens (int): Input tokens.
+            completion_tokens (int): Output tokens.
+        """
+        self.inc("tokens_total", prompt_tokens, model=model, direction="in")
+        self.inc("tokens_total", completion_tokens, model=model, direction="out")
+        trace = _current_trace.get()
+        if trace is not None:
+            usage = trace.tokens.setdefault(model, {"in": 0, "out": 0})
+            usage["in"] += prompt_tokens
+            usage["out"] += completion_tokens
+
+    def to_prometheus(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: Exposition text.
+        """
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for key, buckets in series.items():
+                    for bound, count in zip(LATENCY_BUCKETS, buckets):
+                        le = 'le="%s"' % bound
+                        lines.append(f"{name}_bucket{_format_labels(key, le)} {count:g}")
+                    le = 'le="+Inf"'
+                    lines.append(f"{name}_bucket{_format_labels(key, le)} {buckets[-2]:g}")
+                    lines.append(f"{name}_count{_format_labels(key)} {buckets[-2]:g}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {buckets[-1]:.6f}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Drop every recorded value."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def _emit(self, event: Dict) -> None:
+        """Send an event to every listener, never letting one break the pipeline."""
+        if not self._listeners:
+            return
+        event["ts"] = time.time()
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                logger.warning(f"Metrics listener failed: {str(e)}")
+
+
+class JsonLinesExporter:
+    """
+    Metrics listener that appends every event to a JSON-lines file.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open the output file.
+
+        Args:
+            path (str): File the events are appended to.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def __call__(self, event: Dict) -> None:
+        """Write one event."""
+        with self._lock:
+            self._file.write(json.dumps(event, default=str) + "\n")
+            self._file.flush()
+
+
+@contextmanager
+def trace_run() -> Iterator[RunTrace]:
+    """
+    Collect the spans of everything run inside the block into a RunTrace.
+
+    The trace follows the current context, so it covers awaited coroutines
+    and executor calls that copy the context.
+
+    Yields:
+        RunTrace: The trace being recorded.
+    """
+    trace = RunTrace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+REGISTRY = Metrics()
+if METRICS_JSONL_PATH:
+    REGISTRY.add_listener(JsonLinesExporter(METRICS_JSONL_PATH))
@@ -0,0 +1,273 @@
+"""
+Token-budget-aware prompt packing.
+This module builds the paper payload sent to the summarizer: compact JSON
+(no indentation, short author lists, no redundant fields) that is trimmed to
+the model's token budget by dropping full-text excerpts first and then the
+least salient abstract sentences.
+"""
+
+import math
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from paper import Paper, dumps, papers_from_json
+from fulltext import with_excerpts
+from metrics import REGISTRY
+from vector_index import embed
+from constants import (
+    PROMPT_TOKEN_BUDGET,
+    PROMPT_TOKEN_BUDGETS,
+    PROMPT_MAX_AUTHORS,
+    PROMPT_MIN_ABSTRACT_SENTENCES,
+    PROMPT_TOKENIZER_ENCODING,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9(\[])")
+_PIECE_RE = re.compile(r"[A-Za-z0-9]+|[^A-Za-z0-9\s]")
+# Salience bonus of an abstract's first sentence, which usually states the problem
+_FIRST_SENTENCE_BONUS = 0.25
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """Return the tiktoken encoding, or None if tiktoken or its data is unavailable."""
+    global _encoding, _encoding_loaded
+    with _encoding_lock:
+        if not _encoding_loaded:
+            _encoding_loaded = True
+            try:
+                import tiktoken
+
+                _encoding = tiktoken.get_encoding(PROMPT_TOKENIZER_ENCODING)
+            except Exception as e:
+                logger.info(f"Estimating token counts locally (tiktoken unavailable: {e!r})")
+        return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count the tokens of a text without calling the model.
+
+    Uses tiktoken when it is installed and its encoding can be loaded;
+    otherwise estimates one token per punctuation mark and per four
+    characters of every word.
+
+    Args:
+        text (str): Text to count.
+
+    Returns:
+        int: Number of tokens.
+    """
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return sum(math.ceil(len(piece) / 4) for piece in _PIECE_RE.findall(text))
+
+
+def token_budget(model_name: str) -> int:
+    """Return the paper payload token budget of a model."""
+    return PROMPT_TOKEN_BUDGETS.get(model_name, PROMPT_TOKEN_BUDGET)
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences at terminal punctuation."""
+    return [s for s in _SENTENCE_RE.split(" ".join(text.split())) if s]
+
+
+def sentence_salience(sentences: List[str], query: str) -> List[float]:
+    """
+    Score sentences by how much they say about the paper and the query.
+
+    Each sentence is compared with the whole text (centrality) and with the
+    query (relevance); the first sentence gets a small bonus.
+
+    Args:
+        sentences (List[str]): Sentences of one abstract.
+        query (str): Topic or title the abstract should stay relevant to.
+
+    Returns:
+        List[float]: One score per sentence, higher is more salient.
+    """
+    whole = embed(" ".join(sentences))
+    target = embed(query)
+    scores = []
+    for index, sentence in enumerate(sentences):
+        vector = embed(sentence)
+        score = float(vector @ whole) + float(vector @ target)
+        if index == 0:
+            score += _FIRST_SENTENCE_BONUS
+        scores.append(score)
+    return scores
+
+
+def compact_paper(paper: Paper, max_authors: int = PROMPT_MAX_AUTHORS) -> Dict[str, Any]:
+    """
+    Return the smallest dictionary form of a paper the summarizer needs.
+
+    Authors beyond ``max_authors`` become "et al.", the publication date is
+    reduced to its year and the arXiv ID (already part of the URL) is left out.
+
+    Args:
+        paper (Paper): Paper to compact.
+        max_authors (int): Authors listed before "et al.".
+
+    Returns:
+        Dict[str, Any]: Paper with title, authors, abstract, arxiv_url and,
+            if known, year.
+    """
+    authors = list(paper.authors[:max_authors])
+    if len(paper.authors) > max_authors:
+        authors.append("et al.")
+    item = {
+        "title": paper.title,
+        "authors": authors,
+        "abstract": paper.abstract.strip(),
+        "arxiv_url": paper.arxiv_url,
+    }
+    if paper.year:
+        item["year"] = paper.year
+    return item
+
+
+@dataclass(frozen=True, slots=True)
+class PackedPrompt:
+    """
+    Paper payload fitted to a token budget.
+
+    Attributes:
+        content (str): Compact JSON list of papers.
+        tokens (int): Tokens of ``content``.
+        original_tokens (int): Tokens of the papers as indented JSON.
+    """
+
+    content: str
+    tokens: int
+    original_tokens: int
+
+    @property
+    def saved(self) -> int:
+        """Tokens saved by packing."""
+        return max(0, self.original_tokens - self.tokens)
+
+
+class _Entry:
+    """One paper being packed, with its abstract sentences and their salience."""
+
+    def __init__(self, item: Dict[str, Any], query: str):
+        self.item = item
+        self.sentences = split_sentences(item["abstract"])
+        self.scores = sentence_salience(self.sentences, query) if len(self.sentences) > 1 else [0.0]
+        self.kept = list(range(len(self.sentences)))
+        self.tokens = count_tokens(dumps(item))
+
+    def drop_excerpt(self) -> bool:
+        """Drop the last full-text excerpt; return False if there is none."""
+        excerpts = self.item.get("excerpts")
+        if not excerpts:
+            return False
+        excerpts.pop()
+        if not excerpts:
+            del self.item["excerpts"]
+        self.tokens = count_tokens(dumps(self.item))
+        return True
+
+    def drop_sentence(self, keep_at_least: int) -> bool:
+        """Drop the least salient abstract sentence; return False if none can go."""
+        if len(self.kept) <= keep_at_least:
+            return False
+        self.kept.remove(min(self.kept, key=lambda i: self.scores[i]))
+        self.item["abstract"] = " ".join(self.sentences[i] for i in self.kept)
+        self.tokens = count_tokens(dumps(self.item))
+        return True
+
+
+def pack_papers(
+    papers: List[Paper],
+    model_name: str,
+    query: Optional[str] = None,
+    excerpts: Optional[Dict[str, List[str]]] = None,
+    budget: Optional[int] = None,
+    max_authors: int = PROMPT_MAX_AUTHORS,
+) -> PackedPrompt:
+    """
+    Build the paper payload for the summarizer within a token budget.
+
+    Papers are compacted first. While the payload is over budget, full-text
+    excerpts are dropped from the largest paper, then its least salient
+    abstract sentence, keeping at least PROMPT_MIN_ABSTRACT_SENTENCES per
+    abstract. Sentences stay in their original order.
+
+    Args:
+        papers (List[Paper]): Papers to send.
+        model_name (str): Summarizer model, for its budget and metrics.
+        query (Optional[str]): Topic used to judge sentence salience.
+            Defaults to each paper's title.
+        excerpts (Optional[Dict[str, List[str]]]): Full-text chunks keyed by
+            Paper.key (see fulltext.fetch_excerpts).
+        budget (Optional[int]): Token budget. Defaults to the model's budget.
+        max_authors (int): Authors listed per paper before "et al.".
+
+    Returns:
+        PackedPrompt: The payload and its token counts.
+    """
+    excerpts = excerpts or {}
+    budget = budget if budget is not None else token_budget(model_name)
+    original_tokens = count_tokens(dumps(with_excerpts(papers, excerpts), indent=True))
+
+    entries = []
+    for paper in papers:
+        item = compact_paper(paper, max_authors)
+        if paper.key in excerpts:
+            item["excerpts"] = list(excerpts[paper.key])
+        entries.append(_Entry(item, query or paper.title))
+
+    def total() -> int:
+        # Brackets and separators of the list
+        return sum(entry.tokens for entry in entries) + len(entries) + 1
+
+    for shrink in (
+        lambda entry: entry.drop_excerpt(),
+        lambda entry: entry.drop_sentence(PROMPT_MIN_ABSTRACT_SENTENCES),
+    ):
+        candidates = list(entries)
+        while candidates and total() > budget:
+            largest = max(candidates, key=lambda entry: entry.tokens)
+            if not shrink(largest):
+                candidates.remove(largest)
+
+    content = dumps([entry.item for entry in entries])
+    packed = PackedPrompt(content, count_tokens(content), original_tokens)
+    if packed.tokens > budget:
+        logger.warning(f"Papers still take {packed.tokens} tokens, over the budget of {budget}")
+    REGISTRY.inc("prompt_tokens_saved_total", packed.saved, model=model_name)
+    logger.info(
+        f"Packed {len(papers)} papers into {packed.tokens} tokens "
+        f"(saved {packed.saved} of {original_tokens})"
+    )
+    return packed
+
+
+def pack_paper_message(content: str, model_name: str, query: Optional[str] = None) -> Optional[PackedPrompt]:
+    """
+    Pack a message whose text is a JSON list of papers (e.g. the arXiv tool result).
+
+    Args:
+        content (str): Message text.
+        model_name (str): Model the message is sent to, for its budget.
+        query (Optional[str]): Topic used to judge sentence salience.
+
+    Returns:
+        Optional[PackedPrompt]: The packed papers, or None if the message is
+            not a list of papers.
+    """
+    papers = papers_from_json(content)
+    if papers is None:
+        return None
+    return pack_papers(papers, model_name, query)
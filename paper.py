@@ -0,0 +1,282 @@
+"""
+Paper records.
+This module defines the immutable record used for a paper everywhere in the
+pipeline, with its publication date parsed once, JSON (de)serialization that
+uses orjson when it is installed, and an incremental parser for papers in
+streamed agent text. It only needs the standard library, so the UI can load
+it without the agent framework.
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up; the standard library is the fallback
+    orjson = None
+
+_VERSION_RE = re.compile(r"v\d+$")
+
+
+@dataclass(frozen=True, slots=True)
+class Paper:
+    """
+    A paper from arXiv (or from agent output describing one).
+
+    Attributes:
+        title (str): Paper title.
+        authors (Tuple[str, ...]): Author names.
+        abstract (str): Paper summary.
+        arxiv_url (str): URL of the paper's abstract page.
+        published (Optional[date]): Publication date, if known.
+        arxiv_id (str): Short arXiv ID including version, e.g. 2401.01234v2.
+        categories (Tuple[str, ...]): arXiv categories (e.g. cs.CL), if known.
+    """
+
+    title: str
+    authors: Tuple[str, ...]
+    abstract: str
+    arxiv_url: str
+    published: Optional[date]
+    arxiv_id: str = ""
+    categories: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_result(cls, result) -> "Paper":
+        """
+        Build a paper from an arxiv.Result.
+
+        Args:
+            result (arxiv.Result): Search result from the arxiv client.
+
+        Returns:
+            Paper: The paper.
+        """
+        return cls(
+            title=result.title,
+            authors=tuple(author.name for author in result.authors),
+            abstract=result.summary,
+            arxiv_url=result.entry_id,
+            published=result.published.date(),
+            arxiv_id=result.get_short_id(),
+            categories=tuple(result.categories),
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Paper":
+        """
+        Build a paper from its dictionary form.
+
+        Missing or malformed fields (e.g. in papers written by an LLM) become
+        empty values rather than errors.
+
+        Args:
+            data (Dict[str, Any]): Dictionary as produced by to_dict().
+
+        Returns:
+            Paper: The paper.
+        """
+        authors = data.get("authors") or ()
+        if isinstance(authors, str):
+            authors = (authors,)
+        categories = data.get("categories") or ()
+        if isinstance(categories, str):
+            categories = (categories,)
+        try:
+            published = date.fromisoformat(str(data.get("published", ""))[:10])
+        except ValueError:
+            published = None
+        return cls(
+            title=str(data.get("title") or ""),
+            authors=tuple(str(author) for author in authors),
+            abstract=str(data.get("abstract") or ""),
+            arxiv_url=str(data.get("arxiv_url") or ""),
+            published=published,
+            arxiv_id=str(data.get("arxiv_id") or ""),
+            categories=tuple(str(category) for category in categories),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Return the dictionary form sent to agents and stored on disk.
+
+        Returns:
+            Dict[str, Any]: Paper with title, authors, abstract, arxiv_url,
+                published (YYYY-MM-DD), arxiv_id and, if known, categories.
+        """
+        data = {
+            "title": self.title,
+            "authors": list(self.authors),
+            "abstract": self.abstract,
+            "arxiv_url": self.arxiv_url,
+            "published": self.published.isoformat() if self.published else "",
+            "arxiv_id": self.arxiv_id,
+        }
+        if self.categories:
+            data["categories"] = list(self.categories)
+        return data
+
+    @property
+    def key(self) -> str:
+        """Stable identity: the arXiv ID, falling back to the URL or title."""
+        return self.arxiv_id or self.arxiv_url or self.title
+
+    @property
+    def base_id(self) -> str:
+        """Identity across revisions: the arXiv ID without its version, else the key."""
+        return _VERSION_RE.sub("", self.arxiv_id) if self.arxiv_id else self.key
+
+    @property
+    def year(self) -> Optional[int]:
+        """Publication year, if known."""
+        return self.published.year if self.published else None
+
+
+def _default(value: Any) -> Any:
+    """Serialize the types the standard json module does not know."""
+    if isinstance(value, Paper):
+        return value.to_dict()
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any, indent: bool = False) -> str:
+    """
+    Serialize a value, including Paper records, to JSON text.
+
+    Args:
+        value (Any): Value to serialize.
+        indent (bool): Indent by two spaces (for text shown to people or LLMs).
+
+    Returns:
+        str: JSON text; non-ASCII characters are kept as is.
+    """
+    if orjson is not None:
+        # Paper goes through _default so its dictionary form stays identical
+        option = orjson.OPT_PASSTHROUGH_DATACLASS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(value, default=_default, option=option).decode("utf-8")
+    return json.dumps(value, default=_default, ensure_ascii=False, indent=2 if indent else None)
+
+
+def loads(text) -> Any:
+    """
+    Parse JSON text or bytes.
+
+    Raises:
+        ValueError: If the text is not valid JSON.
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def papers_from_dicts(items: Iterable[Dict[str, Any]]) -> List[Paper]:
+    """Convert dictionaries (e.g. parsed JSON) to Paper records."""
+    return [Paper.from_dict(item) for item in items]
+
+
+def papers_from_json(text: str) -> Optional[List[Paper]]:
+    """
+    Parse text that is a JSON list of papers (e.g. the arXiv tool result).
+
+    Returns:
+        Optional[List[Paper]]: The papers, or None if the text is not a
+            non-empty list of paper objects.
+    """
+    try:
+        items = loads(text)
+    except ValueError:
+        return None
+    if not items or not isinstance(items, list):
+        return None
+    if not all(isinstance(item, dict) and "title" in item for item in items):
+        return None
+    return papers_from_dicts(items)
+
+
+class PaperStreamParser:
+    """
+    Incrementally extract paper objects from streamed agent text.
+
+    Text is fed in chunks as it arrives and every character is examined once.
+    The first JSON array of objects found in the text is tracked with a small
+    bracket/string state machine, and each object is decoded as soon as its
+    closing brace arrives. Surrounding prose, code fences and brackets inside
+    JSON strings (e.g. in abstracts) are handled.
+    """
+
+    def __init__(self):
+        """Initialize an empty parser."""
+        self.papers: List[Paper] = []
+        self.complete = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._object: List[str] = []
+        self._capturing = False
+
+    def feed(self, chunk: str) -> List[Paper]:
+        """
+        Consume the next piece of text.
+
+        Args:
+            chunk (str): Newly received text.
+
+        Returns:
+            List[Paper]: Papers completed by this chunk, in order.
+        """
+        completed: List[Paper] = []
+        if self.complete:
+            return completed
+
+        for char in chunk:
+            if self._depth == 0:
+                if char == "[":
+                    self._depth = 1
+                continue
+
+            if self._capturing:
+                self._object.append(char)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "[{":
+                self._depth += 1
+                if char == "{" and self._depth == 2:
+                    self._capturing = True
+                    self._object = [char]
+            elif char in "]}":
+                self._depth -= 1
+                if self._capturing and self._depth == 1:
+                    self._capturing = False
+                    paper = self._decode("".join(self._object))
+                    if paper is not None:
+                        self.papers.append(paper)
+                        completed.append(paper)
+                elif self._depth == 0 and self.papers:
+                    self.complete = True
+                    break
+
+        return completed
+
+    @staticmethod
+    def _decode(text: str) -> Optional[Paper]:
+        """Decode one captured object, ignoring anything that is not a JSON object."""
+        try:
+            value = loads(text)
+        except ValueError:
+            return None
+        return Paper.from_dict(value) if isinstance(value, dict) else None
@@ -4,73 +4,611 @@ This module manages the multi-agent collaboration for research tasks.
 """
 
 import asyncio
-from typing import AsyncGenerator
-from autogen_agentchat.teams import RoundRobinGroupChat
-from autogen_agentchat.agents import AssistantAgent
-from agents import create_arxiv_research_agent, create_summarizer_agent
-from constants import MAX_TURNS
+import importlib
+import sys
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncGenerator, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from constants import (
+    MAX_TURNS,
+    DEFAULT_MAX_RESULTS,
+    ARXIV_RESEARCH_AGENT_NAME,
+    SUMMARIZER_AGENT_NAME,
+    OPENAI_MODEL,
+    OPENAI_MODEL2,
+    SUMMARY_CACHE_ENABLED,
+    PIPELINE_MODES,
+    PIPELINE_MODE_TEAM,
+    PIPELINE_MODE_DIRECT,
+    DEFAULT_PIPELINE_MODE,
+    SUMMARY_MODES,
+    SUMMARY_MODE_MAP_REDUCE,
+    DEFAULT_SUMMARY_MODE,
+    COALESCE_RESEARCH_RUNS,
+    FULLTEXT_ENABLED,
+)
+from prompts import SUMMARIZER_AGENT_SYSTEM_MESSAGE, MAP_REDUCE_SUMMARY_PROMPT
+from paper import Paper, dumps
+from metrics import REGISTRY
+from query_planner import normalize_topic, search_papers
+from utils import get_summary_cache, summary_cache_key
 import logging
 
+if TYPE_CHECKING:
+    from autogen_agentchat.teams import RoundRobinGroupChat
+
 logger = logging.getLogger(__name__)
 
+# The agent framework, model clients and full-text tooling take most of a
+# second to import, so they are imported when a team is first built rather
+# than when this module is loaded (see preload()).
+_DEFERRED_MODULES = (
+    "autogen_agentchat.messages",
+    "autogen_agentchat.teams",
+    "agents",
+    "summarize",
+    "fulltext",
+    "arxiv_client",
+    "vector_index",
+)
+
+# Model behind each agent, for token accounting
+AGENT_MODELS = {
+    ARXIV_RESEARCH_AGENT_NAME: OPENAI_MODEL,
+    SUMMARIZER_AGENT_NAME: OPENAI_MODEL2,
+}
+
+
+async def instrument_stream(stream: AsyncGenerator, mode: str) -> AsyncGenerator[str, None]:
+    """
+    Record timing and token metrics for a stream of agent messages.
+    
+    Each chat message from an agent closes an ``agent_turn`` span that began
+    when the previous turn ended; the first streamed chunk of each agent is
+    recorded as ``time_to_first_token`` from the start of the run; token usage
+    reported on messages is counted per model.
+    
+    Args:
+        stream (AsyncGenerator): Messages from the team or the direct pipeline.
+        mode (str): Pipeline mode, used as a label.
+        
+    Yields:
+        str: The messages of the stream, unchanged.
+    """
+    from autogen_agentchat.messages import BaseChatMessage, ModelClientStreamingChunkEvent
+    
+    run_start = turn_start = time.perf_counter()
+    first_token_seen = set()
+    async for msg in stream:
+        now = time.perf_counter()
+        source = getattr(msg, "source", None)
+        usage = getattr(msg, "models_usage", None)
+        if usage is not None and source in AGENT_MODELS:
+            REGISTRY.record_tokens(AGENT_MODELS[source], usage.prompt_tokens, usage.completion_tokens)
+        
+        if isinstance(msg, ModelClientStreamingChunkEvent):
+            if source not in first_token_seen:
+                first_token_seen.add(source)
+                REGISTRY.record_span(
+                    "time_to_first_token", run_start, now - run_start, agent=source, mode=mode
+                )
+        elif isinstance(msg, BaseChatMessage) and source in AGENT_MODELS:
+            REGISTRY.record_span("agent_turn", turn_start, now - turn_start, agent=source, mode=mode)
+            turn_start = now
+        yield msg
+
 
 class ResearchTeam:
     """
     Manages the research team and orchestrates agent collaboration.
+    
+    The research agent and the group chat are only built in team mode; the
+    direct pipeline needs just SummarizerAgent.
     """
     
-    def __init__(self):
-        """Initialize the research team with agents."""
-        self.arxiv_agent = create_arxiv_research_agent()
-        self.summarizer_agent = create_summarizer_agent()
-        self.team = self._create_team()
+    def __init__(
+        self,
+        max_results: int = DEFAULT_MAX_RESULTS,
+        mode: str = DEFAULT_PIPELINE_MODE,
+        summary_mode: str = DEFAULT_SUMMARY_MODE,
+        full_text: bool = FULLTEXT_ENABLED,
+    ):
+        """
+        Initialize the research team with agents.
+        
+        Args:
+            max_results (int): Number of papers the research agent fetches.
+            mode (str): PIPELINE_MODE_TEAM to let ArxivResearchAgent drive the
+                search, or PIPELINE_MODE_DIRECT to search without an LLM turn
+                and send the papers straight to SummarizerAgent.
+            summary_mode (str): SUMMARY_MODE_SINGLE for one summarizer prompt,
+                or SUMMARY_MODE_MAP_REDUCE for per-paper summaries plus a
+                synthesis pass. Only used when papers are summarized directly;
+                team mode always uses SummarizerAgent.
+            full_text (bool): Whether to send SummarizerAgent the most relevant
+                passages of each paper's PDF along with its abstract. Only
+                used when papers are summarized directly.
+                
+        Raises:
+            ValueError: If mode or summary_mode is not recognised.
+        """
+        from agents import create_arxiv_research_agent, create_summarizer_agent
+        
+        if mode not in PIPELINE_MODES:
+            raise ValueError(f"Unknown pipeline mode: {mode}")
+        if summary_mode not in SUMMARY_MODES:
+            raise ValueError(f"Unknown summary mode: {summary_mode}")
+        self.max_results = max_results
+        self.mode = mode
+        self.summary_mode = summary_mode
+        self.full_text = full_text
+        self.running = False
+        self.arxiv_agent = None
+        self.team: Optional["RoundRobinGroupChat"] = None
+        self.summarizer_agent = create_summarizer_agent(
+            pack_paper_messages=mode == PIPELINE_MODE_TEAM,
+            use_cache=mode == PIPELINE_MODE_TEAM and SUMMARY_CACHE_ENABLED,
+        )
+        if mode == PIPELINE_MODE_TEAM:
+            self.arxiv_agent = create_arxiv_research_agent(max_results)
+            self.team = self._create_team()
     
-    def _create_team(self) -> RoundRobinGroupChat:
+    def _create_team(self) -> "RoundRobinGroupChat":
         """
         Create and configure the team for round-robin collaboration.
         
         Returns:
             RoundRobinGroupChat: Configured team for agent collaboration.
         """
+        from autogen_agentchat.teams import RoundRobinGroupChat
+        
         return RoundRobinGroupChat(
             participants=[self.arxiv_agent, self.summarizer_agent],
             max_turns=MAX_TURNS
         )
     
-    async def run_research(self, topic: str) -> AsyncGenerator[str, None]:
+    async def reset(self) -> None:
+        """
+        Clear conversation state so the team can be reused for another run.
+        
+        Resetting is much cheaper than building a new ResearchTeam: the agents,
+        the team and their pooled model clients are all kept (see TeamPool).
+        """
+        from autogen_core import CancellationToken
+        
+        if self.team is not None:
+            await self.team.reset()
+        else:
+            await self.summarizer_agent.on_reset(CancellationToken())
+    
+    def set_max_results(self, max_results: int) -> None:
+        """
+        Change how many papers the research agent fetches.
+        
+        In team mode only the research agent and the team wrapper are
+        rebuilt; model clients come from the shared pool.
+        
+        Args:
+            max_results (int): Number of papers to fetch.
+        """
+        from agents import create_arxiv_research_agent
+        
+        if max_results == self.max_results:
+            return
+        self.max_results = max_results
+        if self.team is not None:
+            self.arxiv_agent = create_arxiv_research_agent(max_results)
+            self.team = self._create_team()
+    
+    async def fetch_papers(self, topic: str) -> List[Paper]:
+        """
+        Search arXiv for a topic without involving the research agent.
+        
+        Args:
+            topic (str): The research topic to investigate.
+            
+        Returns:
+            List[Paper]: Papers from the query planner (query_planner.search_papers).
+        """
+        return await search_papers(topic, max_results=self.max_results)
+    
+    async def summarize_papers(
+        self,
+        papers: List[Paper],
+        use_cache: bool = SUMMARY_CACHE_ENABLED,
+        topic: Optional[str] = None,
+    ) -> AsyncGenerator[str, None]:
+        """
+        Send already-fetched papers to SummarizerAgent.
+        
+        The papers are first yielded as a message from ArxivResearchAgent so
+        consumers see the same message sequence as in team mode. A summary
+        cached for the same paper set, model and prompt is returned as a
+        single SummarizerAgent message without calling the model. The
+        summarizer receives the papers packed into the model's token budget
+        (see packing.pack_papers), with excerpts of each PDF in full-text mode.
+        
+        Args:
+            papers (List[Paper]): Papers to summarize.
+            use_cache (bool): Whether to read and populate the summary cache.
+            topic (Optional[str]): Research topic, used to pick the full-text
+                excerpts and abstract sentences most relevant to it.
+            
+        Yields:
+            str: The papers message, then messages from SummarizerAgent.
+        """
+        from autogen_agentchat.messages import TextMessage
+        from agents import get_model_client
+        from fulltext import fetch_excerpts
+        from packing import pack_papers
+        from summarize import MapReduceSummarizer
+        
+        papers_message = TextMessage(
+            source=ARXIV_RESEARCH_AGENT_NAME,
+            content=dumps(papers, indent=True),
+        )
+        yield papers_message
+        
+        if self.summary_mode == SUMMARY_MODE_MAP_REDUCE:
+            prompt = MAP_REDUCE_SUMMARY_PROMPT
+        else:
+            prompt = SUMMARIZER_AGENT_SYSTEM_MESSAGE
+        cache_key = summary_cache_key(
+            papers, OPENAI_MODEL2, prompt, "fulltext" if self.full_text else ""
+        )
+        if use_cache:
+            cache = get_summary_cache()
+            cached = cache.get(cache_key)
+            REGISTRY.inc("cache_hits_total" if cached is not None else "cache_misses_total", cache="summary")
+            if cached is not None:
+                logger.info(f"Summary cache hit for {len(papers)} papers")
+                yield TextMessage(source=SUMMARIZER_AGENT_NAME, content=cached)
+                return
+        
+        excerpts = {}
+        if self.full_text:
+            with REGISTRY.span("full_text"):
+                excerpts = await fetch_excerpts(papers, topic)
+        
+        task_message = None
+        if self.summary_mode == SUMMARY_MODE_MAP_REDUCE:
+            summarizer = MapReduceSummarizer(
+                get_model_client(OPENAI_MODEL2), use_cache=use_cache, excerpts=excerpts, query=topic
+            )
+            stream = summarizer.run(papers)
+        else:
+            packed = pack_papers(papers, OPENAI_MODEL2, topic, excerpts)
+            task_message = TextMessage(source=ARXIV_RESEARCH_AGENT_NAME, content=packed.content)
+            stream = self.summarizer_agent.run_stream(task=task_message)
+        
+        parts = []
+        async for msg in stream:
+            # run_stream echoes the task message first; the papers were already yielded
+            if msg is task_message:
+                continue
+            if isinstance(msg, TextMessage) and msg.source == SUMMARIZER_AGENT_NAME:
+                parts.append(msg.content)
+            yield msg
+        
+        if use_cache and parts:
+            cache.set(cache_key, "\n\n".join(parts))
+    
+    async def _run_direct(self, topic: str) -> AsyncGenerator[str, None]:
+        """
+        Fast path: search directly and only spend an LLM turn on the summary.
+        
+        Args:
+            topic (str): The research topic to investigate.
+            
+        Yields:
+            str: The papers message, then messages from SummarizerAgent.
+        """
+        papers = await self.fetch_papers(topic)
+        async for msg in self.summarize_papers(papers, topic=topic):
+            yield msg
+    
+    async def run_research(
+        self, topic: str, max_results: Optional[int] = None
+    ) -> AsyncGenerator[str, None]:
         """
         Execute the research pipeline for a given topic.
         
         Args:
             topic (str): The research topic to investigate.
+            max_results (Optional[int]): Number of papers to fetch. Defaults to
+                the value the team was built with.
             
         Yields:
             str: Messages from the agents during execution.
         """
+        if max_results is not None:
+            self.set_max_results(max_results)
+        
         # Pass only the topic name to the agents, not the full task template
-        logger.info(f"Starting research for topic: {topic}")
+        logger.info(f"Starting research for topic: {topic} (mode: {self.mode})")
         
+        self.running = True
         try:
-            async for msg in self.team.run_stream(task=topic):
-                yield msg
+            if self.mode == PIPELINE_MODE_DIRECT:
+                stream = self._run_direct(topic)
+            else:
+                stream = self.team.run_stream(task=topic)
+            with REGISTRY.span("research_run", mode=self.mode):
+                async for msg in instrument_stream(stream, self.mode):
+                    yield msg
             logger.info(f"Completed research for topic: {topic}")
         except Exception as e:
             logger.error(f"Error during research execution: {str(e)}")
             raise
+        finally:
+            self.running = False
+
+
+class TeamPool:
+    """
+    Idle research teams kept for reuse between runs.
+    
+    A team that finished its run is reset and handed to the next run with
+    the same modes, so runs do not rebuild agents, tools and group chats. A
+    team whose run failed, was cancelled or is still driving a coalesced run
+    for other subscribers is dropped instead. Teams are used on one event
+    loop, so every long-lived owner (the job queue, an API worker, a batch)
+    keeps its own pool.
+    """
+    
+    def __init__(self, max_idle: int):
+        """
+        Initialize an empty pool.
+        
+        Args:
+            max_idle (int): Idle teams kept per combination of modes.
+        """
+        self.max_idle = max_idle
+        self._idle: Dict[Tuple[str, str, bool], List[ResearchTeam]] = {}
+    
+    @asynccontextmanager
+    async def team(
+        self,
+        max_results: int = DEFAULT_MAX_RESULTS,
+        mode: str = DEFAULT_PIPELINE_MODE,
+        summary_mode: str = DEFAULT_SUMMARY_MODE,
+        full_text: bool = FULLTEXT_ENABLED,
+    ) -> AsyncIterator[ResearchTeam]:
+        """
+        Lend a team for one run, building it if none is idle.
+        
+        Args:
+            max_results (int): Number of papers the team fetches.
+            mode (str): Pipeline mode, see ResearchTeam.
+            summary_mode (str): Summary mode, see ResearchTeam.
+            full_text (bool): Whether full-text mode is on.
+            
+        Yields:
+            ResearchTeam: A team in its initial state.
+            
+        Raises:
+            ValueError: If a mode is not recognised or the API key is missing.
+        """
+        key = (mode, summary_mode, full_text)
+        idle = self._idle.get(key)
+        if idle:
+            team = idle.pop()
+            team.set_max_results(max_results)
+        else:
+            team = ResearchTeam(max_results, mode, summary_mode, full_text)
+        # Not reached if the run raised or was cancelled: the team is dropped
+        yield team
+        if team.running:
+            return
+        try:
+            await team.reset()
+        except Exception as e:
+            logger.warning(f"Dropping research team that could not be reset: {str(e)}")
+            return
+        idle = self._idle.setdefault(key, [])
+        if len(idle) < self.max_idle:
+            idle.append(team)
+
+
+class _FlightEnd:
+    """Marks the end of a coalesced run, carrying its error if it failed."""
+    
+    def __init__(self, error: Optional[BaseException] = None):
+        self.error = error
+
+
+class _Flight:
+    """State of one in-flight research run shared by several subscribers."""
+    
+    def __init__(self):
+        self.messages: List = []
+        self.subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+        self.task: Optional[asyncio.Task] = None
+
+
+class ResearchCoalescer:
+    """
+    Process-wide single-flight layer for research runs.
+    
+    Concurrent requests with the same key share one run: the first caller
+    (the leader) starts it, later callers receive the messages produced so far
+    and then every new message as it arrives. Subscribers may live on
+    different event loops (e.g. different Streamlit sessions); messages are
+    handed over with ``call_soon_threadsafe``. The run is driven on the
+    leader's event loop and is cancelled once every subscriber has left.
+    """
+    
+    def __init__(self):
+        """Initialize with no runs in flight."""
+        self._lock = threading.Lock()
+        self._flights: Dict[Tuple, _Flight] = {}
+    
+    def in_flight(self) -> int:
+        """Return the number of runs currently in flight."""
+        with self._lock:
+            return len(self._flights)
+    
+    async def run(
+        self, key: Tuple, start: Callable[[], AsyncGenerator]
+    ) -> AsyncGenerator[str, None]:
+        """
+        Join the run for a key, starting it if none is in flight.
+        
+        Args:
+            key (Tuple): Identity of the run; equal keys share one run.
+            start (Callable[[], AsyncGenerator]): Creates the message stream if
+                this caller becomes the leader.
+            
+        Yields:
+            str: Every message of the shared run, from the beginning.
+            
+        Raises:
+            Exception: Whatever the shared run raised.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        subscriber = (loop, queue)
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+            for msg in flight.messages:
+                queue.put_nowait(msg)
+            flight.subscribers.append(subscriber)
+        
+        if leader:
+            flight.task = loop.create_task(self._drive(key, flight, start()))
+        else:
+            REGISTRY.inc("coalesced_requests_total")
+            logger.info(f"Joined in-flight research run: {key}")
+        
+        try:
+            while True:
+                item = await queue.get()
+                if isinstance(item, _FlightEnd):
+                    if item.error is not None:
+                        raise item.error
+                    return
+                yield item
+        finally:
+            with self._lock:
+                flight.subscribers.remove(subscriber)
+                abandoned = not flight.subscribers
+            if abandoned and flight.task is not None and not flight.task.done():
+                flight.task.get_loop().call_soon_threadsafe(flight.task.cancel)
+    
+    async def _drive(self, key: Tuple, flight: _Flight, stream: AsyncGenerator) -> None:
+        """Consume the leader's stream and fan every message out to subscribers."""
+        end = _FlightEnd()
+        try:
+            async for msg in stream:
+                with self._lock:
+                    flight.messages.append(msg)
+                    subscribers = list(flight.subscribers)
+                self._deliver(subscribers, msg)
+        except BaseException as e:
+            end = _FlightEnd(e)
+            if not isinstance(e, asyncio.CancelledError):
+                logger.error(f"Coalesced research run failed: {str(e)}")
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+                subscribers = list(flight.subscribers)
+            self._deliver(subscribers, end)
+    
+    @staticmethod
+    def _deliver(subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]], item) -> None:
+        """Put an item on every subscriber queue, on the queue's own loop."""
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                # The subscriber's loop is closed; it is no longer listening
+                pass
+
+
+COALESCER = ResearchCoalescer()
+
+
+def research_key(
+    topic: str, max_results: int, mode: str, summary_mode: str, full_text: bool = False
+) -> Tuple:
+    """
+    Build the coalescing key for a research request.
+    
+    Args:
+        topic (str): The research topic.
+        max_results (int): Number of papers.
+        mode (str): Pipeline mode.
+        summary_mode (str): Summary mode.
+        full_text (bool): Whether full-text mode is on.
+        
+    Returns:
+        Tuple: Key shared by requests that would produce the same run.
+    """
+    return (normalize_topic(topic), max_results, mode, summary_mode, full_text)
+
+
+async def coalesced_research(
+    team: ResearchTeam, topic: str, max_results: Optional[int] = None
+) -> AsyncGenerator[str, None]:
+    """
+    Run research through the process-wide single-flight layer.
+    
+    If an identical request (same canonical topic and settings) is already
+    running, its messages are shared instead of starting another run; the
+    given team is then left untouched.
+    
+    Args:
+        team (ResearchTeam): Team used if this request starts the run.
+        topic (str): The research topic to investigate.
+        max_results (Optional[int]): Number of papers to fetch.
+        
+    Yields:
+        str: Messages from the agents during execution.
+    """
+    if max_results is None:
+        max_results = team.max_results
+    if not COALESCE_RESEARCH_RUNS:
+        async for msg in team.run_research(topic, max_results):
+            yield msg
+        return
+    
+    key = research_key(topic, max_results, team.mode, team.summary_mode, team.full_text)
+    async for msg in COALESCER.run(key, lambda: team.run_research(topic, max_results)):
+        yield msg
+
+
+def preload() -> None:
+    """
+    Import the modules deferred until the first research run.
+    
+    Long-lived processes (the UI's job queue, API workers) call this on a
+    background thread at startup so neither their first page load nor their
+    first run waits for the agent framework to import.
+    """
+    started = time.perf_counter()
+    for name in _DEFERRED_MODULES:
+        importlib.import_module(name)
+    logger.info(f"Preloaded research pipeline modules in {time.perf_counter() - started:.2f}s")
 
 
-async def run_research_pipeline(topic: str) -> None:
+async def run_research_pipeline(topic: str, mode: str = DEFAULT_PIPELINE_MODE) -> None:
     """
     High-level function to run the research pipeline.
     
     Args:
         topic (str): The research topic to investigate.
+        mode (str): Pipeline mode, see ResearchTeam.
     """
-    team = ResearchTeam()
+    team = ResearchTeam(mode=mode)
     async for message in team.run_research(topic):
         print(message)
         print("\n" + "="*80 + "\n")
 
 
 if __name__ == "__main__":
-    asyncio.run(run_research_pipeline("Agentic AI"))
+    asyncio.run(run_research_pipeline(" ".join(sys.argv[1:]) or "Agentic AI"))
@@ -9,9 +9,8 @@ ARXIV_RESEARCH_AGENT_SYSTEM_MESSAGE = (
     "When given a research topic, you MUST:\n"
     "1. Extract only the topic name (ignore any surrounding text like 'Research and summarize')\n"
     "2. Think of the best arXiv query for this topic\n"
-    "3. Search for the top 5 most relevant and recent papers\n"
-    "4. For each paper, return a JSON object with fields: title, authors (as a list), abstract, arxiv_url, and published\n"
-    "5. Return ONLY a JSON list of the 5 paper objects with proper formatting, nothing else"
+    "3. Call the arxiv_search tool exactly once with that query\n"
+    "4. Do not write the papers yourself; the tool result is returned to the team as-is"
 )
 
 # Summarizer Agent System Message
@@ -39,8 +38,50 @@ SUMMARIZER_AGENT_SYSTEM_MESSAGE = (
     "- Use clear, professional language\n"
     "- Format as proper Markdown\n"
     "- Focus on quality over length\n"
+    "- If a paper has an \"excerpts\" list (passages from its full text), use it for "
+    "specifics such as methods and results\n"
     "- Return ONLY the Markdown content, no JSON or raw text"
 )
 
+# Map-Reduce Summarization: per-paper (map) step
+PAPER_SUMMARY_SYSTEM_MESSAGE = (
+    "You are an expert researcher and technical writer. "
+    "You receive ONE paper as a JSON list holding a single object. Write its section of a literature review "
+    "in Markdown:\n"
+    "- Start with a level-3 heading containing the paper title as a clickable link\n"
+    "- List all authors (separate with commas)\n"
+    "- Explain the specific problem it addresses\n"
+    "- Describe its key contributions\n"
+    "- Add a brief impact statement\n\n"
+    "If the paper has an \"excerpts\" list (passages from its full text), use it for "
+    "specifics such as methods and results. "
+    "Be concise and return ONLY the Markdown section."
+)
+
+# Map-Reduce Summarization: synthesis (reduce) step
+SYNTHESIS_SYSTEM_MESSAGE = (
+    "You are an expert researcher and technical writer. "
+    "You receive short Markdown summaries of several papers on one research topic. "
+    "Write the closing part of a literature review in Markdown:\n\n"
+    "1. **Overall Insights** (2-3 paragraphs):\n"
+    "   - Summarize the common themes across papers\n"
+    "   - Highlight major research directions\n"
+    "   - Discuss interdependencies and relationships\n\n"
+    "2. **Future Directions** (2-3 bullet points):\n"
+    "   - Suggest potential research gaps\n"
+    "   - Propose new research opportunities\n"
+    "   - Identify emerging challenges\n\n"
+    "Use level-2 headings for both parts and return ONLY the Markdown content."
+)
+
+# Every prompt whose output is cached; cache entries written for any other
+# version of these prompts are invalidated.
+MAP_REDUCE_SUMMARY_PROMPT = PAPER_SUMMARY_SYSTEM_MESSAGE + "\n" + SYNTHESIS_SYSTEM_MESSAGE
+CACHED_SUMMARY_PROMPTS = (
+    SUMMARIZER_AGENT_SYSTEM_MESSAGE,
+    PAPER_SUMMARY_SYSTEM_MESSAGE,
+    MAP_REDUCE_SUMMARY_PROMPT,
+)
+
 # Task Template
 RESEARCH_TASK_TEMPLATE = "Research and summarize recent papers on '{topic}'."
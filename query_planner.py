@@ -0,0 +1,353 @@
+"""
+Topic normalization and query planning.
+This module turns a free-text research topic into a canonical form, so the
+same intent written as "LLMs", "Large Language Models" or "large language
+model" shares one cache, coalescing and watermark key, and plans
+field-qualified arXiv sub-queries (``ti:``, ``abs:``, ``cat:``) from a local
+index of topics. The canonical form is only a key: arXiv is searched with the
+index's phrases or the user's own words. The sub-queries run concurrently and
+their results are merged and deduplicated by arXiv ID.
+"""
+
+import asyncio
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from paper import Paper, loads
+from metrics import REGISTRY
+from utils import arxiv_research_async, search_local_corpus
+from constants import (
+    ARXIV_SORT_CRITERION,
+    ARXIV_SORT_ORDER,
+    ARXIV_CACHE_ENABLED,
+    DEFAULT_MAX_RESULTS,
+    QUERY_PLANNER_ENABLED,
+    QUERY_PLANNER_INDEX_PATH,
+    QUERY_PLANNER_MAX_SUBQUERIES,
+    VECTOR_INDEX_ENABLED,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# Words ending in "s" that are not plurals
+_NOT_PLURAL = ("ss", "us", "is", "ics")
+# Queries already written in arXiv syntax (field prefixes, boolean operators,
+# quoted phrases or grouping) are sent as they are
+_STRUCTURED_RE = re.compile(r'\b(?:ti|au|abs|co|jr|cat|rn|id|all):|\b(?:AND|OR|ANDNOT)\b|["()]')
+
+# Abbreviations expanded before lookup
+ACRONYMS: Dict[str, str] = {
+    "llm": "large language model",
+    "vlm": "vision language model",
+    "mllm": "multimodal large language model",
+    "nlp": "natural language processing",
+    "ml": "machine learning",
+    "dl": "deep learning",
+    "rl": "reinforcement learning",
+    "rlhf": "reinforcement learning from human feedback",
+    "cv": "computer vision",
+    "gnn": "graph neural network",
+    "rag": "retrieval augmented generation",
+    "mas": "multi agent system",
+}
+
+# Canonical topic -> arXiv categories and phrases searched in titles. The
+# first phrase is also searched in abstracts.
+TOPIC_INDEX: Dict[str, Dict[str, List[str]]] = {
+    "agentic ai": {
+        "categories": ["cs.AI", "cs.MA", "cs.CL"],
+        "phrases": ["agentic AI", "LLM agents", "autonomous agents"],
+    },
+    "large language model": {
+        "categories": ["cs.CL", "cs.AI", "cs.LG"],
+        "phrases": ["large language models", "LLM"],
+    },
+    "multimodal large language model": {
+        "categories": ["cs.CV", "cs.CL"],
+        "phrases": ["multimodal large language models", "MLLM"],
+    },
+    "vision language model": {
+        "categories": ["cs.CV", "cs.CL"],
+        "phrases": ["vision language models", "VLM"],
+    },
+    "machine learning": {
+        "categories": ["cs.LG", "stat.ML"],
+        "phrases": ["machine learning"],
+    },
+    "deep learning": {
+        "categories": ["cs.LG", "cs.CV", "cs.NE"],
+        "phrases": ["deep learning", "deep neural networks"],
+    },
+    "natural language processing": {
+        "categories": ["cs.CL"],
+        "phrases": ["natural language processing", "NLP"],
+    },
+    "reinforcement learning": {
+        "categories": ["cs.LG", "cs.AI"],
+        "phrases": ["reinforcement learning"],
+    },
+    "reinforcement learning from human feedback": {
+        "categories": ["cs.LG", "cs.CL"],
+        "phrases": ["reinforcement learning from human feedback", "RLHF"],
+    },
+    "computer vision": {
+        "categories": ["cs.CV"],
+        "phrases": ["computer vision"],
+    },
+    "graph neural network": {
+        "categories": ["cs.LG", "cs.SI"],
+        "phrases": ["graph neural networks", "GNN"],
+    },
+    "retrieval augmented generation": {
+        "categories": ["cs.CL", "cs.IR"],
+        "phrases": ["retrieval augmented generation", "RAG"],
+    },
+    "multi agent system": {
+        "categories": ["cs.MA", "cs.AI"],
+        "phrases": ["multi-agent systems", "multi-agent"],
+    },
+    "diffusion model": {
+        "categories": ["cs.CV", "cs.LG"],
+        "phrases": ["diffusion models"],
+    },
+}
+
+
+def _load_extra_index(path: str) -> None:
+    """Merge topics from a JSON file (same shape as TOPIC_INDEX) into the index."""
+    if not path or not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        extra = loads(f.read())
+    for topic, entry in extra.items():
+        TOPIC_INDEX[normalize_topic(topic)] = entry
+    logger.info(f"Loaded {len(extra)} topics from {path}")
+
+
+def _singular(word: str) -> str:
+    """
+    Strip a plural ending from a lower-case word.
+
+    Only good enough for matching keys ("series" becomes "sery"); never used
+    for text sent to arXiv.
+    """
+    if len(word) <= 3 or not word.endswith("s") or word.endswith(_NOT_PLURAL):
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    return word[:-1]
+
+
+def normalize_topic(topic: str) -> str:
+    """
+    Reduce a topic to its canonical form.
+
+    Lower-cases it, drops punctuation, makes words singular and expands the
+    abbreviations in ACRONYMS, so "LLMs", "Large Language Models" and
+    "large-language model" all become "large language model". The result is
+    a lookup key, not a search query.
+
+    Args:
+        topic (str): Raw research topic.
+
+    Returns:
+        str: Canonical topic.
+    """
+    words = []
+    for word in _WORD_RE.findall(topic.lower()):
+        word = _singular(word)
+        words.append(ACRONYMS.get(word, word))
+    return " ".join(words)
+
+
+def is_structured(query: str) -> bool:
+    """Tell whether a query is already written in arXiv query syntax."""
+    return _STRUCTURED_RE.search(query) is not None
+
+
+@dataclass(frozen=True, slots=True)
+class QueryPlan:
+    """
+    arXiv sub-queries planned for one topic.
+
+    Attributes:
+        topic (str): Canonical topic (the lookup key).
+        phrase (str): The topic as searched: lower-cased with whitespace
+            collapsed, or as given if it is already in arXiv syntax.
+        subqueries (Tuple[str, ...]): arXiv queries, best first.
+        categories (Tuple[str, ...]): arXiv categories of the topic, if indexed.
+    """
+
+    topic: str
+    phrase: str
+    subqueries: Tuple[str, ...]
+    categories: Tuple[str, ...] = ()
+
+
+def plan_query(topic: str, max_subqueries: int = QUERY_PLANNER_MAX_SUBQUERIES) -> QueryPlan:
+    """
+    Plan the arXiv sub-queries for a topic.
+
+    An indexed topic is searched by its first phrase in titles, by the same
+    phrase in abstracts within its categories, and by its other phrases in
+    titles within its categories. Other topics are searched with the user's
+    words as a phrase in titles and abstracts, and as plain words in every
+    field. Queries already in arXiv syntax (e.g. an agent's
+    ``ti:"agentic workflows" AND cat:cs.AI``) are not planned.
+
+    Args:
+        topic (str): Raw research topic.
+        max_subqueries (int): Sub-queries kept at most.
+
+    Returns:
+        QueryPlan: The plan.
+    """
+    canonical = normalize_topic(topic)
+    if not canonical or is_structured(topic):
+        return QueryPlan(canonical, topic.strip(), (topic.strip(),))
+    phrase = " ".join(topic.lower().split())
+    entry = TOPIC_INDEX.get(canonical)
+    if entry is None:
+        subqueries = [f'ti:"{phrase}"', f'abs:"{phrase}"', phrase]
+        return QueryPlan(canonical, phrase, tuple(subqueries[:max_subqueries]))
+
+    phrases = entry["phrases"]
+    categories = " OR ".join(f"cat:{category}" for category in entry["categories"])
+    subqueries = [f'ti:"{phrases[0]}"', f'abs:"{phrases[0]}" AND ({categories})']
+    if len(phrases) > 1:
+        titles = " OR ".join(f'ti:"{phrase}"' for phrase in phrases[1:])
+        subqueries.append(f"({titles}) AND ({categories})")
+    return QueryPlan(canonical, phrase, tuple(subqueries[:max_subqueries]), tuple(entry["categories"]))
+
+
+def merge_results(
+    results: List[List[Paper]], max_results: int, sort_by: str = ARXIV_SORT_CRITERION
+) -> List[Paper]:
+    """
+    Merge the results of several sub-queries, keeping each paper once.
+
+    Relevance results are interleaved rank by rank, so every sub-query
+    contributes its best papers; date-sorted results are merged newest first.
+
+    Args:
+        results (List[List[Paper]]): Papers of each sub-query, best first.
+        max_results (int): Papers kept.
+        sort_by (str): arxiv.SortCriterion member name the sub-queries used.
+
+    Returns:
+        List[Paper]: Unique papers (by arXiv ID without version).
+    """
+    if sort_by == "Relevance":
+        ordered = [
+            papers[rank]
+            for rank in range(max((len(papers) for papers in results), default=0))
+            for papers in results
+            if rank < len(papers)
+        ]
+    else:
+        ordered = sorted(
+            (paper for papers in results for paper in papers),
+            key=lambda p: (p.published is not None, p.published),
+            reverse=True,
+        )
+    seen = set()
+    merged = []
+    for paper in ordered:
+        if paper.base_id not in seen:
+            seen.add(paper.base_id)
+            merged.append(paper)
+    return merged[:max_results]
+
+
+async def search_papers(
+    topic: str,
+    max_results: int = DEFAULT_MAX_RESULTS,
+    sort_by: str = ARXIV_SORT_CRITERION,
+    sort_order: str = ARXIV_SORT_ORDER,
+    use_cache: bool = ARXIV_CACHE_ENABLED,
+    enabled: bool = QUERY_PLANNER_ENABLED,
+) -> List[Paper]:
+    """
+    Search arXiv for a topic through the query planner.
+
+    For relevance searches the local paper index is asked once, with the
+    topic phrase and the planned categories; if it cannot answer, the planned
+    sub-queries run concurrently (each through the result cache and the
+    shared arXiv client), their papers are indexed, and the merged results
+    are re-ranked against the topic phrase. Queries in arXiv syntax keep
+    arXiv's ranking. A failed sub-query is skipped unless every one fails.
+
+    Args:
+        topic (str): Research topic or free-text query.
+        max_results (int): Number of papers to return.
+        sort_by (str): arxiv.SortCriterion member name.
+        sort_order (str): arxiv.SortOrder member name.
+        use_cache (bool): Whether to read and populate the result cache.
+        enabled (bool): Whether to plan at all; if not, the topic is sent to
+            arXiv as is.
+
+    Returns:
+        List[Paper]: The papers found, best first.
+
+    Raises:
+        Exception: The first error if every sub-query failed.
+    """
+    if not enabled:
+        return await arxiv_research_async(topic, max_results, sort_by, sort_order, use_cache)
+
+    plan = plan_query(topic)
+    loop = asyncio.get_running_loop()
+    # Field prefixes and operators would be embedded as words, so only plain
+    # phrases are looked up and ranked locally
+    rank_locally = (
+        VECTOR_INDEX_ENABLED and sort_by == "Relevance" and bool(plan.phrase) and not is_structured(topic)
+    )
+    if rank_locally:
+        local = await loop.run_in_executor(
+            None, search_local_corpus, plan.phrase, max_results, plan.categories
+        )
+        if local is not None:
+            REGISTRY.inc("cache_hits_total", cache="local_corpus")
+            logger.info(f"Answered topic from local corpus: {topic}")
+            return local
+
+    logger.info(f"Planned {len(plan.subqueries)} arXiv queries for '{topic}': {plan.subqueries}")
+    outcomes = await asyncio.gather(
+        *(
+            arxiv_research_async(query, max_results, sort_by, sort_order, use_cache, use_index=False)
+            for query in plan.subqueries
+        ),
+        return_exceptions=True,
+    )
+    results = []
+    for query, outcome in zip(plan.subqueries, outcomes):
+        if isinstance(outcome, BaseException):
+            if isinstance(outcome, asyncio.CancelledError):
+                raise outcome
+            logger.warning(f"arXiv sub-query failed: {query}: {outcome!r}")
+        else:
+            results.append(outcome)
+    if not results:
+        raise outcomes[0]
+
+    papers = merge_results(results, max_results, sort_by)
+    if VECTOR_INDEX_ENABLED:
+        papers = await loop.run_in_executor(
+            None, _index_and_rank, results, papers, plan.phrase if rank_locally else None
+        )
+    return papers
+
+
+def _index_and_rank(results: List[List[Paper]], papers: List[Paper], phrase: Optional[str]) -> List[Paper]:
+    """Add fetched papers to the local index and re-rank the merged ones against a phrase, if given."""
+    from vector_index import get_paper_index
+
+    index = get_paper_index()
+    index.add([paper for result in results for paper in result])
+    return index.rerank(phrase, papers) if phrase else papers
+
+
+_load_extra_index(QUERY_PLANNER_INDEX_PATH)
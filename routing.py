@@ -0,0 +1,299 @@
+"""
+Model routing.
+This module wraps several chat completion clients behind one client that
+tries models in order, applies a timeout per model, retries transient errors
+with jittered exponential backoff and can hedge slow calls by firing a second
+request once the first has taken longer than the usual latency.
+"""
+
+import asyncio
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, AsyncGenerator, Callable, Deque, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+import openai
+from autogen_core.models import (
+    ChatCompletionClient,
+    CreateResult,
+    LLMMessage,
+    ModelCapabilities,
+    ModelInfo,
+    RequestUsage,
+)
+from metrics import REGISTRY
+from utils import AsyncRateLimiter, backoff_delay
+from constants import (
+    MODEL_TIMEOUT_SECONDS,
+    MODEL_MAX_RETRIES,
+    MODEL_BACKOFF_BASE_SECONDS,
+    MODEL_BACKOFF_MAX_SECONDS,
+    MODEL_HEDGING_ENABLED,
+    MODEL_HEDGE_PERCENTILE,
+    MODEL_HEDGE_MIN_SAMPLES,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Latency samples kept per model for the hedging threshold
+_LATENCY_WINDOW = 200
+
+# Returns the rate limiter of a provider (by base URL) for model calls made in
+# the current context. Set by callers that must stay under a provider's rate
+# limit (e.g. batch.BatchRunner); when unset, calls are not throttled.
+provider_limiter: ContextVar[Optional[Callable[[str], AsyncRateLimiter]]] = ContextVar(
+    "provider_limiter", default=None
+)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Tell whether a failed model call is worth retrying.
+
+    Timeouts, connection errors, rate limits and server errors are transient;
+    anything else (bad request, authentication, unknown model) is not.
+
+    Args:
+        error (BaseException): The error raised by the call.
+
+    Returns:
+        bool: True if the call may succeed when repeated.
+    """
+    if isinstance(error, (asyncio.TimeoutError, openai.APIConnectionError, openai.RateLimitError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+class RoutedModelClient(ChatCompletionClient):
+    """
+    Chat completion client that routes calls over an ordered list of models.
+
+    Each model is tried up to ``max_retries + 1`` times on transient errors,
+    then the next model takes over. Non-streaming calls can be hedged: once a
+    call has run longer than the ``hedge_percentile`` of recent latencies, a
+    second request goes to the next model (or the same one if it is the last)
+    and whichever finishes first wins. Streaming calls are retried only until
+    their first chunk arrives; the timeout then applies between chunks.
+
+    Every request sent to a model, including retries and hedges, first waits
+    for the provider's rate limiter when ``provider_limiter`` is set.
+    """
+
+    def __init__(
+        self,
+        clients: Sequence[Tuple[str, ChatCompletionClient]],
+        timeouts: Optional[Mapping[str, float]] = None,
+        default_timeout: float = MODEL_TIMEOUT_SECONDS,
+        max_retries: int = MODEL_MAX_RETRIES,
+        backoff_base: float = MODEL_BACKOFF_BASE_SECONDS,
+        backoff_max: float = MODEL_BACKOFF_MAX_SECONDS,
+        hedging: bool = MODEL_HEDGING_ENABLED,
+        hedge_percentile: float = MODEL_HEDGE_PERCENTILE,
+        hedge_min_samples: int = MODEL_HEDGE_MIN_SAMPLES,
+        provider: str = "",
+    ):
+        """
+        Initialize the router.
+
+        Args:
+            clients (Sequence[Tuple[str, ChatCompletionClient]]): (model name,
+                client) pairs in order of preference.
+            timeouts (Optional[Mapping[str, float]]): Per-model timeouts in seconds.
+            default_timeout (float): Timeout for models not in ``timeouts``.
+            max_retries (int): Retries per model on transient errors.
+            backoff_base (float): Backoff scale in seconds.
+            backoff_max (float): Maximum backoff in seconds.
+            hedging (bool): Whether to hedge slow non-streaming calls.
+            hedge_percentile (float): Latency percentile after which to hedge.
+            hedge_min_samples (int): Calls observed before hedging starts.
+            provider (str): Base URL of the provider serving the models, used
+                to pick its rate limiter.
+
+        Raises:
+            ValueError: If no clients are given.
+        """
+        if not clients:
+            raise ValueError("RoutedModelClient needs at least one model.")
+        self.models: List[str] = [model for model, _ in clients]
+        self._clients: List[ChatCompletionClient] = [client for _, client in clients]
+        self.timeouts: Dict[str, float] = dict(timeouts or {})
+        self.default_timeout = default_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedging = hedging
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.provider = provider
+        self._latencies: Dict[str, Deque[float]] = {
+            model: deque(maxlen=_LATENCY_WINDOW) for model in self.models
+        }
+
+    def _timeout(self, index: int) -> float:
+        """Return the timeout of the model at index."""
+        return self.timeouts.get(self.models[index], self.default_timeout)
+
+    def _hedge_threshold(self, index: int) -> Optional[float]:
+        """Return the latency after which to hedge a call, or None to not hedge."""
+        samples = self._latencies[self.models[index]]
+        if not self.hedging or len(samples) < self.hedge_min_samples:
+            return None
+        ordered = sorted(samples)
+        position = min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile / 100))
+        return ordered[position]
+
+    async def _throttle(self) -> None:
+        """Wait for the provider's rate limiter, if the caller set one."""
+        get_limiter = provider_limiter.get()
+        if get_limiter is not None:
+            await get_limiter(self.provider).acquire()
+
+    async def _call(self, index: int, messages: Sequence[LLMMessage], kwargs: Dict[str, Any]) -> CreateResult:
+        """Call one model with its timeout, recording the latency of successful calls."""
+        await self._throttle()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        result = await asyncio.wait_for(
+            self._clients[index].create(messages, **kwargs), self._timeout(index)
+        )
+        self._latencies[self.models[index]].append(loop.time() - start)
+        return result
+
+    async def _call_hedged(self, index: int, messages: Sequence[LLMMessage], kwargs: Dict[str, Any]) -> CreateResult:
+        """Call a model, adding a hedge request if it is slower than usual."""
+        threshold = self._hedge_threshold(index)
+        primary = asyncio.ensure_future(self._call(index, messages, kwargs))
+        if threshold is None:
+            return await primary
+
+        tasks = [primary]
+        try:
+            # asyncio.wait does not cancel what it waits for, so a cancelled
+            # caller must cancel the requests itself (see finally)
+            done, _ = await asyncio.wait([primary], timeout=threshold)
+            if done:
+                return primary.result()
+
+            hedge_index = min(index + 1, len(self.models) - 1)
+            REGISTRY.inc("model_hedges_total", model=self.models[hedge_index])
+            logger.info(f"Hedging {self.models[index]} call after {threshold:.2f}s with {self.models[hedge_index]}")
+            tasks.append(asyncio.ensure_future(self._call(hedge_index, messages, kwargs)))
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _before_retry(self, index: int, attempt: int, error: BaseException) -> None:
+        """Log and count a retry, then back off."""
+        model = self.models[index]
+        REGISTRY.inc("model_retries_total", model=model)
+        delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+        logger.warning(f"Retrying {model} in {delay:.2f}s after error: {error!r}")
+        await asyncio.sleep(delay)
+
+    def _fall_back(self, index: int, error: BaseException) -> None:
+        """Log and count a switch to the next model."""
+        if index + 1 < len(self.models):
+            REGISTRY.inc("model_fallbacks_total", model=self.models[index])
+            logger.warning(
+                f"Falling back from {self.models[index]} to {self.models[index + 1]} after error: {error!r}"
+            )
+
+    async def create(self, messages: Sequence[LLMMessage], **kwargs) -> CreateResult:
+        """
+        Create a completion, routing over the models.
+
+        Raises:
+            Exception: The last error if every model and retry failed.
+        """
+        last_error: Optional[BaseException] = None
+        for index in range(len(self.models)):
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    await self._before_retry(index, attempt, last_error)
+                try:
+                    return await self._call_hedged(index, messages, kwargs)
+                except Exception as e:
+                    last_error = e
+                    if not is_retryable(e):
+                        break
+            self._fall_back(index, last_error)
+        raise last_error
+
+    async def create_stream(
+        self, messages: Sequence[LLMMessage], **kwargs
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        """
+        Stream a completion, routing over the models until the first chunk arrives.
+
+        Raises:
+            Exception: The last error if every model and retry failed, or any
+                error after streaming has started.
+        """
+        last_error: Optional[BaseException] = None
+        for index in range(len(self.models)):
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    await self._before_retry(index, attempt, last_error)
+                await self._throttle()
+                stream = self._clients[index].create_stream(messages, **kwargs)
+                started = False
+                try:
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(stream.__anext__(), self._timeout(index))
+                        except StopAsyncIteration:
+                            return
+                        started = True
+                        yield chunk
+                except Exception as e:
+                    if started:
+                        raise
+                    last_error = e
+                    if not is_retryable(e):
+                        break
+                finally:
+                    await stream.aclose()
+            self._fall_back(index, last_error)
+        raise last_error
+
+    async def close(self) -> None:
+        """Close every underlying client."""
+        for client in self._clients:
+            await client.close()
+
+    def actual_usage(self) -> RequestUsage:
+        return self._sum_usage([client.actual_usage() for client in self._clients])
+
+    def total_usage(self) -> RequestUsage:
+        return self._sum_usage([client.total_usage() for client in self._clients])
+
+    @staticmethod
+    def _sum_usage(usages: List[RequestUsage]) -> RequestUsage:
+        return RequestUsage(
+            prompt_tokens=sum(u.prompt_tokens for u in usages),
+            completion_tokens=sum(u.completion_tokens for u in usages),
+        )
+
+    def count_tokens(self, messages: Sequence[LLMMessage], **kwargs) -> int:
+        return self._clients[0].count_tokens(messages, **kwargs)
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], **kwargs) -> int:
+        return self._clients[0].remaining_tokens(messages, **kwargs)
+
+    @property
+    def capabilities(self) -> ModelCapabilities:
+        return self._clients[0].capabilities
+
+    @property
+    def model_info(self) -> ModelInfo:
+        return self._clients[0].model_info
@@ -0,0 +1,83 @@
+"""
+Background async runtime.
+This module runs one long-lived asyncio event loop on a daemon thread, shared
+by every Streamlit session in the process. All pipeline runs and the pooled
+model clients live on that loop; the UI thread only submits work and reads
+results, so sessions never block or re-enter each other's event loops.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRuntime:
+    """
+    An event loop running forever on a daemon thread.
+    """
+
+    def __init__(self):
+        """Start the loop thread."""
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run, name="researchpilot-runtime", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        """Thread body: run the loop until it is stopped."""
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro: Coroutine) -> Future:
+        """
+        Schedule a coroutine on the runtime loop.
+
+        Args:
+            coro (Coroutine): Coroutine to run.
+
+        Returns:
+            Future: Thread-safe future of the result; cancelling it cancels the task.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine on the runtime loop and wait for its result.
+
+        Args:
+            coro (Coroutine): Coroutine to run.
+            timeout (Optional[float]): Seconds to wait.
+
+        Returns:
+            Any: The coroutine's result.
+        """
+        return self.submit(coro).result(timeout)
+
+    def stop(self) -> None:
+        """Stop the loop and wait for the thread to exit."""
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+
+_runtime: Optional[AsyncRuntime] = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime() -> AsyncRuntime:
+    """
+    Return the process-wide runtime, starting it on first use.
+
+    Returns:
+        AsyncRuntime: The shared runtime.
+    """
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = AsyncRuntime()
+            logger.info("Background async runtime started")
+        return _runtime
@@ -0,0 +1,327 @@
+"""
+Headless HTTP API for the research pipeline.
+This module serves research runs over ASGI with Server-Sent Events, so other
+services can call the pipeline without Streamlit. All requests share one
+event loop per worker process and the process-wide model client pool;
+identical concurrent requests are coalesced, and the number of runs in
+flight is bounded so overload is rejected early instead of queuing forever.
+
+Usage:
+    python server.py --port 8000 --workers 2
+    curl -N -X POST localhost:8000/research -d '{"topic": "Agentic AI"}'
+"""
+
+import argparse
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, Dict, Optional
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+from metrics import REGISTRY, trace_run
+from pipeline import TeamPool, coalesced_research, preload
+from constants import (
+    API_HOST,
+    API_PORT,
+    API_MAX_CONCURRENT_RUNS,
+    API_MAX_PENDING_RUNS,
+    API_MAX_RESULTS,
+    API_HEARTBEAT_SECONDS,
+    DEFAULT_MAX_RESULTS,
+    DEFAULT_PIPELINE_MODE,
+    DEFAULT_SUMMARY_MODE,
+    PIPELINE_MODES,
+    SUMMARY_MODES,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RunLimiter:
+    """
+    Admission control for research runs.
+
+    At most ``max_concurrent`` runs execute at once and at most
+    ``max_pending`` more wait for a slot; anything beyond that is refused.
+    """
+
+    def __init__(self, max_concurrent: int, max_pending: int):
+        """
+        Initialize the limiter.
+
+        Args:
+            max_concurrent (int): Runs executing at once.
+            max_pending (int): Runs allowed to wait for a slot.
+        """
+        self.max_concurrent = max_concurrent
+        self.max_pending = max_pending
+        self.admitted = 0
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+    def try_admit(self) -> bool:
+        """
+        Reserve a place for a run, if there is room.
+
+        Returns:
+            bool: True if the run was admitted; it must call release() when done.
+        """
+        if self.admitted >= self.max_concurrent + self.max_pending:
+            return False
+        self.admitted += 1
+        return True
+
+    def release(self) -> None:
+        """Give back a place reserved by try_admit()."""
+        self.admitted -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        """Wait for and hold one of the execution slots."""
+        async with self._semaphore:
+            yield
+
+
+def message_to_event(message) -> Optional[Dict]:
+    """
+    Convert an agent message to an SSE event payload.
+
+    Args:
+        message: Message yielded by the pipeline.
+
+    Returns:
+        Optional[Dict]: Event with ``event`` name and ``data``, or None for
+            items that are not agent messages (e.g. the final TaskResult).
+    """
+    from autogen_agentchat.messages import ModelClientStreamingChunkEvent
+
+    source = getattr(message, "source", None)
+    if source is None:
+        return None
+    content = getattr(message, "content", None)
+    event = "chunk" if isinstance(message, ModelClientStreamingChunkEvent) else "message"
+    return {
+        "event": event,
+        "data": {
+            "type": type(message).__name__,
+            "source": source,
+            "content": content if isinstance(content, str) else str(content),
+        },
+    }
+
+
+def format_sse(event: str, data: Dict) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def with_heartbeat(stream: AsyncGenerator, interval: float) -> AsyncGenerator:
+    """
+    Pass items through, yielding None whenever the stream is idle for ``interval``.
+
+    Keeps proxies and load balancers from closing quiet connections while an
+    LLM call is in progress.
+    """
+    pending = asyncio.ensure_future(stream.__anext__())
+    try:
+        while True:
+            done, _ = await asyncio.wait([pending], timeout=interval)
+            if not done:
+                yield None
+                continue
+            try:
+                item = pending.result()
+            except StopAsyncIteration:
+                return
+            yield item
+            pending = asyncio.ensure_future(stream.__anext__())
+    finally:
+        pending.cancel()
+        # The cancelled __anext__ must finish before the stream can be closed
+        try:
+            await pending
+        except (asyncio.CancelledError, StopAsyncIteration):
+            pass
+        await stream.aclose()
+
+
+async def research_events(
+    limiter: RunLimiter,
+    teams: TeamPool,
+    topic: str,
+    max_results: int,
+    mode: str,
+    summary_mode: str,
+) -> AsyncGenerator[str, None]:
+    """
+    Run the research pipeline and yield its messages as SSE text.
+
+    The admission reserved for this request is released by the
+    AdmittedStreamingResponse that streams it, since this generator may
+    never start if the client disconnects early.
+    """
+    yield format_sse("status", {"status": "queued"})
+    async with limiter.slot():
+        yield format_sse("status", {"status": "running"})
+        with trace_run() as trace:
+            try:
+                async with teams.team(max_results, mode=mode, summary_mode=summary_mode) as team:
+                    stream = coalesced_research(team, topic, max_results)
+                    async for message in with_heartbeat(stream, API_HEARTBEAT_SECONDS):
+                        if message is None:
+                            yield ": ping\n\n"
+                            continue
+                        event = message_to_event(message)
+                        if event is not None:
+                            yield format_sse(event["event"], event["data"])
+            except Exception as e:
+                logger.error(f"API research run failed: {str(e)}")
+                yield format_sse("error", {"error": str(e)})
+                return
+        yield format_sse("done", {"breakdown": trace.breakdown(), "tokens": trace.tokens})
+
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that holds a RunLimiter admission.
+
+    The admission is released and the body generator closed however the
+    response ends, including a client that disconnects before the first
+    chunk is produced.
+    """
+
+    def __init__(self, limiter: RunLimiter, content: AsyncGenerator, **kwargs):
+        """
+        Initialize the response.
+
+        Args:
+            limiter (RunLimiter): Limiter the admission was reserved from.
+            content (AsyncGenerator): Body of the response.
+            **kwargs: Passed to StreamingResponse.
+        """
+        super().__init__(content, **kwargs)
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            try:
+                await self.body_iterator.aclose()
+            finally:
+                self.limiter.release()
+
+
+async def research(request: Request) -> Response:
+    """``POST /research``: stream a research run as Server-Sent Events."""
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        return JSONResponse({"error": "Request body must be JSON."}, status_code=400)
+    if not isinstance(body, dict):
+        return JSONResponse({"error": "Request body must be a JSON object."}, status_code=400)
+
+    topic = str(body.get("topic", "")).strip()
+    max_results = body.get("max_results", DEFAULT_MAX_RESULTS)
+    mode = body.get("mode", DEFAULT_PIPELINE_MODE)
+    summary_mode = body.get("summary_mode", DEFAULT_SUMMARY_MODE)
+    if not topic:
+        return JSONResponse({"error": "topic is required."}, status_code=400)
+    # bool is an int subclass, but "max_results": true is not a count
+    if (
+        not isinstance(max_results, int)
+        or isinstance(max_results, bool)
+        or not 1 <= max_results <= API_MAX_RESULTS
+    ):
+        return JSONResponse(
+            {"error": f"max_results must be an integer from 1 to {API_MAX_RESULTS}."},
+            status_code=400,
+        )
+    if mode not in PIPELINE_MODES:
+        return JSONResponse({"error": f"mode must be one of {list(PIPELINE_MODES)}."}, status_code=400)
+    if summary_mode not in SUMMARY_MODES:
+        return JSONResponse(
+            {"error": f"summary_mode must be one of {list(SUMMARY_MODES)}."}, status_code=400
+        )
+
+    limiter: RunLimiter = request.app.state.limiter
+    if not limiter.try_admit():
+        REGISTRY.inc("api_rejected_total")
+        return JSONResponse(
+            {"error": "Too many research runs in progress, retry later."},
+            status_code=503,
+            headers={"Retry-After": "5"},
+        )
+    REGISTRY.inc("api_requests_total", mode=mode)
+    return AdmittedStreamingResponse(
+        limiter,
+        research_events(limiter, request.app.state.teams, topic, max_results, mode, summary_mode),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def prometheus_metrics(request: Request) -> Response:
+    """``GET /metrics``: Prometheus metrics of this worker."""
+    return PlainTextResponse(REGISTRY.to_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+async def health(request: Request) -> Response:
+    """``GET /healthz``: liveness and current load."""
+    limiter: RunLimiter = request.app.state.limiter
+    return JSONResponse({"status": "ok", "admitted_runs": limiter.admitted})
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    """
+    Create the run limiter and team pool on startup and close pooled clients
+    on shutdown.
+
+    The research pipeline is imported in the background, so the worker
+    accepts connections (and answers /healthz) right away.
+    """
+    app.state.limiter = RunLimiter(API_MAX_CONCURRENT_RUNS, API_MAX_PENDING_RUNS)
+    app.state.teams = TeamPool(API_MAX_CONCURRENT_RUNS)
+    preloading = asyncio.get_running_loop().run_in_executor(None, preload)
+    yield
+    try:
+        await preloading
+    except Exception as e:
+        logger.warning(f"Could not preload the research pipeline: {str(e)}")
+    from agents import close_model_clients
+
+    await close_model_clients()
+
+
+app = Starlette(
+    routes=[
+        Route("/research", research, methods=["POST"]),
+        Route("/metrics", prometheus_metrics, methods=["GET"]),
+        Route("/healthz", health, methods=["GET"]),
+    ],
+    lifespan=lifespan,
+)
+
+
+def main() -> None:
+    """Command-line entry point."""
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the research pipeline over HTTP.")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    uvicorn.run("server:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
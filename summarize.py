@@ -0,0 +1,158 @@
+"""
+Hierarchical (map-reduce) summarization.
+This module summarizes each paper with its own bounded-parallel LLM call and
+then runs a single synthesis pass, so wall-clock time follows the slowest
+paper instead of the total abstract length, and no prompt has to hold every
+paper at once.
+"""
+
+import asyncio
+from typing import AsyncGenerator, Dict, List, Optional
+from autogen_agentchat.messages import ModelClientStreamingChunkEvent, TextMessage
+from autogen_core.models import ChatCompletionClient, CreateResult, SystemMessage, UserMessage
+from paper import Paper
+from packing import pack_papers
+from prompts import PAPER_SUMMARY_SYSTEM_MESSAGE, SYNTHESIS_SYSTEM_MESSAGE
+from utils import get_summary_cache, summary_cache_key
+from metrics import REGISTRY
+from constants import (
+    OPENAI_MODEL2,
+    SUMMARIZER_AGENT_NAME,
+    SUMMARIZER_STREAMING,
+    SUMMARY_CACHE_ENABLED,
+    MAP_REDUCE_CONCURRENCY,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MapReduceSummarizer:
+    """
+    Summarizes papers one by one (map) and then synthesizes them (reduce).
+
+    Per-paper summaries are cached individually in the summary cache, so a
+    paper that shows up under several topics is only summarized once.
+    """
+
+    def __init__(
+        self,
+        model_client: ChatCompletionClient,
+        model_name: str = OPENAI_MODEL2,
+        concurrency: int = MAP_REDUCE_CONCURRENCY,
+        use_cache: bool = SUMMARY_CACHE_ENABLED,
+        excerpts: Optional[Dict[str, List[str]]] = None,
+        query: Optional[str] = None,
+    ):
+        """
+        Initialize the summarizer.
+
+        Args:
+            model_client (ChatCompletionClient): Client used for every LLM call.
+            model_name (str): Model name, used in cache keys.
+            concurrency (int): Maximum number of per-paper calls in flight.
+            use_cache (bool): Whether to read and populate the summary cache.
+            excerpts (Optional[Dict[str, List[str]]]): Full-text chunks keyed by
+                Paper.key, sent along with the papers that have them.
+            query (Optional[str]): Research topic, used to decide which
+                abstract sentences to keep if a paper is over the token budget.
+        """
+        self.model_client = model_client
+        self.model_name = model_name
+        self.concurrency = concurrency
+        self.use_cache = use_cache
+        self.excerpts = excerpts or {}
+        self.query = query
+
+    def _record_usage(self, result: CreateResult) -> None:
+        """Count the tokens of one model call."""
+        if result.usage is not None:
+            REGISTRY.record_tokens(
+                self.model_name, result.usage.prompt_tokens, result.usage.completion_tokens
+            )
+
+    async def summarize_paper(self, paper: Paper, semaphore: asyncio.Semaphore) -> str:
+        """
+        Summarize a single paper.
+
+        Args:
+            paper (Paper): Paper to summarize.
+            semaphore (asyncio.Semaphore): Bounds concurrent LLM calls.
+
+        Returns:
+            str: Markdown section for the paper.
+        """
+        full_text = paper.key in self.excerpts
+        key = summary_cache_key(
+            [paper], self.model_name, PAPER_SUMMARY_SYSTEM_MESSAGE, "fulltext" if full_text else ""
+        )
+        if self.use_cache:
+            cache = get_summary_cache()
+            cached = cache.get(key)
+            REGISTRY.inc(
+                "cache_hits_total" if cached is not None else "cache_misses_total",
+                cache="paper_summary",
+            )
+            if cached is not None:
+                return cached
+
+        packed = pack_papers([paper], self.model_name, self.query, self.excerpts)
+        async with semaphore:
+            with REGISTRY.span("paper_summary"):
+                result = await self.model_client.create([
+                    SystemMessage(content=PAPER_SUMMARY_SYSTEM_MESSAGE),
+                    UserMessage(content=packed.content, source="user"),
+                ])
+        self._record_usage(result)
+        section = str(result.content).strip()
+        if self.use_cache:
+            cache.set(key, section)
+        return section
+
+    async def run(self, papers: List[Paper]) -> AsyncGenerator[str, None]:
+        """
+        Summarize papers and synthesize the overall insights.
+
+        Args:
+            papers (List[Paper]): Papers to summarize.
+
+        Yields:
+            str: One SummarizerAgent message per paper section (in paper order,
+                as soon as each is ready), then the synthesis, streamed as
+                chunk events when SUMMARIZER_STREAMING is enabled.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = [
+            asyncio.ensure_future(self.summarize_paper(paper, semaphore))
+            for paper in papers
+        ]
+        sections: List[str] = []
+        try:
+            yield TextMessage(source=SUMMARIZER_AGENT_NAME, content="## Paper Summary")
+            for task in tasks:
+                section = await task
+                sections.append(section)
+                yield TextMessage(source=SUMMARIZER_AGENT_NAME, content=section)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        messages = [
+            SystemMessage(content=SYNTHESIS_SYSTEM_MESSAGE),
+            UserMessage(content="\n\n".join(sections), source="user"),
+        ]
+        if not SUMMARIZER_STREAMING:
+            with REGISTRY.span("synthesis"):
+                result = await self.model_client.create(messages)
+            self._record_usage(result)
+            yield TextMessage(source=SUMMARIZER_AGENT_NAME, content=str(result.content))
+            return
+
+        with REGISTRY.span("synthesis"):
+            async for chunk in self.model_client.create_stream(messages):
+                if isinstance(chunk, str):
+                    yield ModelClientStreamingChunkEvent(source=SUMMARIZER_AGENT_NAME, content=chunk)
+                else:
+                    self._record_usage(chunk)
+                    yield TextMessage(source=SUMMARIZER_AGENT_NAME, content=str(chunk.content))
+        logger.info(f"Map-reduce summary finished for {len(papers)} papers")
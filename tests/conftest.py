@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The application is a set of flat modules at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
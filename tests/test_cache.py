@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+from cache import ResultCache
+from utils import arxiv_cache_key, normalize_query
+
+
+def test_round_trip_and_counters(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=60, max_entries=10)
+    assert cache.get("missing") is None
+    cache.set("key", {"papers": [1, 2]})
+    assert cache.get("key") == {"papers": [1, 2]}
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1, "evictions": 0}
+
+
+def test_expired_entry_is_a_miss(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=10, max_entries=10)
+    cache.set("key", "value")
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert cache.get("key") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_zero_ttl_never_expires(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=0, max_entries=10)
+    cache.set("key", "value")
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 10 ** 9)
+    assert cache.get("key") == "value"
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=0, max_entries=2)
+    cache.set("a", 1)
+    time.sleep(0.01)
+    cache.set("b", 2)
+    time.sleep(0.01)
+    assert cache.get("a") == 1
+    time.sleep(0.01)
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_retain_prefixes(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=0, max_entries=10)
+    cache.set("v1:a", 1)
+    cache.set("v2:a", 2)
+    assert cache.retain_prefixes(["v2:"]) == 1
+    assert cache.get("v1:a") is None
+    assert cache.get("v2:a") == 2
+
+
+def test_reopened_cache_keeps_entries(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    ResultCache(path, ttl_seconds=60, max_entries=10).set("key", [1])
+    assert ResultCache(path, ttl_seconds=60, max_entries=10).get("key") == [1]
+
+
+def test_query_key_ignores_case_and_spacing():
+    assert normalize_query("  Agentic   AI ") == "agentic ai"
+    assert arxiv_cache_key("Agentic AI", 5, "Relevance", "Descending") == arxiv_cache_key(
+        "agentic  ai", 5, "Relevance", "Descending"
+    )
+
+
+def test_query_key_keeps_boolean_operators():
+    assert normalize_query("Agents AND Tools") == "agents AND tools"
+    assert arxiv_cache_key("a AND b", 5, "Relevance", "Descending") != arxiv_cache_key(
+        "a and b", 5, "Relevance", "Descending"
+    )
+
+
+def test_query_key_includes_search_settings():
+    base = arxiv_cache_key("llm", 5, "Relevance", "Descending")
+    assert base != arxiv_cache_key("llm", 10, "Relevance", "Descending")
+    assert base != arxiv_cache_key("llm", 5, "SubmittedDate", "Descending")
+
+
+def test_team_summarizer_answers_repeated_papers_from_cache(tmp_path, monkeypatch):
+    from autogen_agentchat.messages import TextMessage, ToolCallSummaryMessage
+    from autogen_core import CancellationToken
+    from autogen_ext.models.replay import ReplayChatCompletionClient
+
+    import utils
+    from agents import CachedSummarizerAgent
+    from constants import ARXIV_RESEARCH_AGENT_NAME
+    from paper import Paper, dumps
+
+    cache = ResultCache(str(tmp_path / "summaries.sqlite3"), ttl_seconds=60, max_entries=10)
+    monkeypatch.setattr(utils, "_summary_cache", cache)
+    papers = [Paper("Agents", ("A. Author",), "Abstract.", "http://arxiv.org/abs/1v1", None, "1v1")]
+    model_client = ReplayChatCompletionClient(["The summary."])
+
+    async def summarize():
+        agent = CachedSummarizerAgent("SummarizerAgent", model_client=model_client)
+        message = ToolCallSummaryMessage(
+            source=ARXIV_RESEARCH_AGENT_NAME, content=dumps(papers), tool_calls=[], results=[]
+        )
+        response = await agent.on_messages([message], CancellationToken())
+        return response.chat_message
+
+    first = asyncio.run(summarize())
+    second = asyncio.run(summarize())
+    assert isinstance(second, TextMessage)
+    assert first.content == second.content == "The summary."
+    # The second answer came from the cache, not the (one-shot) model
+    assert len(model_client.create_calls) == 1
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from pipeline import ResearchCoalescer
+
+
+def make_source(messages, gate: asyncio.Event, log: list):
+    """Return a stream factory that yields messages, pausing on the gate after the first."""
+
+    async def stream():
+        log.append("started")
+        try:
+            for index, message in enumerate(messages):
+                if index == 1:
+                    await gate.wait()
+                yield message
+        except asyncio.CancelledError:
+            log.append("cancelled")
+            raise
+
+    return stream
+
+
+async def collect(stream, results: list, limit=None):
+    async for message in stream:
+        results.append(message)
+        if limit is not None and len(results) >= limit:
+            break
+
+
+@pytest.mark.asyncio
+async def test_follower_gets_every_message_from_one_run():
+    coalescer = ResearchCoalescer()
+    gate, log = asyncio.Event(), []
+    start = make_source(["papers", "summary", "done"], gate, log)
+    leader, follower = [], []
+
+    leading = asyncio.ensure_future(collect(coalescer.run("key", start), leader))
+    await asyncio.sleep(0.01)
+    following = asyncio.ensure_future(collect(coalescer.run("key", start), follower))
+    await asyncio.sleep(0.01)
+    gate.set()
+    await asyncio.gather(leading, following)
+
+    assert leader == follower == ["papers", "summary", "done"]
+    assert log == ["started"]
+    assert coalescer.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_run_continues_when_leader_leaves_early():
+    coalescer = ResearchCoalescer()
+    gate, log = asyncio.Event(), []
+    start = make_source(["papers", "summary", "done"], gate, log)
+    leader, follower = [], []
+
+    await collect(coalescer.run("key", start), leader, limit=1)
+    following = asyncio.ensure_future(collect(coalescer.run("key", start), follower))
+    await asyncio.sleep(0.01)
+    gate.set()
+    await following
+
+    assert leader == ["papers"]
+    assert follower == ["papers", "summary", "done"]
+    assert log == ["started"]
+
+
+@pytest.mark.asyncio
+async def test_run_is_cancelled_when_every_subscriber_leaves():
+    coalescer = ResearchCoalescer()
+    gate, log = asyncio.Event(), []
+    start = make_source(["papers", "summary"], gate, log)
+
+    await collect(coalescer.run("key", start), [], limit=1)
+    await asyncio.sleep(0.01)
+
+    assert log == ["started", "cancelled"]
+    assert coalescer.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_error_reaches_every_subscriber():
+    coalescer = ResearchCoalescer()
+
+    async def failing():
+        yield "papers"
+        await asyncio.sleep(0.01)
+        raise RuntimeError("model unavailable")
+
+    async def subscribe(results):
+        with pytest.raises(RuntimeError, match="model unavailable"):
+            await collect(coalescer.run("key", failing), results)
+
+    first, second = [], []
+    await asyncio.gather(subscribe(first), subscribe(second))
+    assert first == second == ["papers"]
+
+
+@pytest.mark.asyncio
+async def test_different_keys_run_separately():
+    coalescer = ResearchCoalescer()
+    runs = []
+
+    def start():
+        async def stream():
+            runs.append(1)
+            yield "done"
+
+        return stream()
+
+    results = [[], []]
+    await asyncio.gather(
+        collect(coalescer.run("a", start), results[0]),
+        collect(coalescer.run("b", start), results[1]),
+    )
+    assert len(runs) == 2
+    assert results == [["done"], ["done"]]
@@ -0,0 +1,73 @@
+import threading
+import time
+
+from jobs import JOB_QUEUED, JOB_RUNNING, JobStore
+
+
+def test_concurrent_stores_never_claim_the_same_job(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    stores = [JobStore(path) for _ in range(4)]
+    created = {stores[0].create(f"topic {i}", 5, "direct", "single") for i in range(40)}
+    claimed = []
+
+    def drain(store):
+        while True:
+            job = store.claim_next()
+            if job is None:
+                return
+            claimed.append((job["id"], job["owner"]))
+            assert job["owner"] == store.owner
+
+    threads = [threading.Thread(target=drain, args=(store,)) for store in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(job_id for job_id, _ in claimed) == sorted(created)
+
+
+def test_only_jobs_with_a_stale_heartbeat_are_requeued(tmp_path, monkeypatch):
+    path = str(tmp_path / "jobs.sqlite3")
+    running, restarted = JobStore(path), JobStore(path)
+    job_id = running.create("LLMs", 5, "direct", "single")
+    assert running.claim_next()["status"] == JOB_RUNNING
+
+    # Another process starting up leaves a live process's job alone
+    assert restarted.requeue_interrupted(stale_after=60) == 0
+    assert restarted.get(job_id)["status"] == JOB_RUNNING
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 30)
+    running.heartbeat()
+    monkeypatch.setattr(time, "time", lambda: now + 80)
+    assert restarted.requeue_interrupted(stale_after=60) == 0
+
+    # The owner stops heartbeating
+    monkeypatch.setattr(time, "time", lambda: now + 100)
+    assert restarted.requeue_interrupted(stale_after=60) == 1
+    job = restarted.get(job_id)
+    assert job["status"] == JOB_QUEUED
+    assert job["owner"] is None
+    assert restarted.claim_next()["owner"] == restarted.owner
+
+
+def test_adds_owner_columns_to_an_existing_table(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / "jobs.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE jobs (id TEXT PRIMARY KEY, topic TEXT NOT NULL, max_results INTEGER NOT NULL,"
+        " mode TEXT NOT NULL, summary_mode TEXT NOT NULL, status TEXT NOT NULL, papers TEXT,"
+        " summary TEXT, error TEXT, created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+    )
+    conn.execute(
+        "INSERT INTO jobs (id, topic, max_results, mode, summary_mode, status, created_at)"
+        " VALUES ('old', 'LLMs', 5, 'direct', 'single', 'running', 0)"
+    )
+    conn.commit()
+    conn.close()
+
+    store = JobStore(path)
+    assert store.requeue_interrupted() == 1
+    assert store.claim_next()["id"] == "old"
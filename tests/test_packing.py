@@ -0,0 +1,100 @@
+from datetime import date
+
+import pytest
+
+from packing import compact_paper, count_tokens, pack_paper_message, pack_papers
+from paper import Paper, dumps, loads
+
+SENTENCES = [
+    "Large language model agents plan and call tools to solve multi-step tasks.",
+    "We evaluate twelve benchmarks covering web navigation and coding.",
+    "Our training data was collected over three months from volunteers.",
+    "The appendix lists every hyperparameter used in the experiments.",
+    "Agents with explicit planning outperform reactive agents on long tasks.",
+]
+
+
+def make_paper(index: int, authors: int = 3) -> Paper:
+    return Paper(
+        title=f"Planning agents study {index}",
+        authors=tuple(f"Author {n}" for n in range(authors)),
+        abstract=" ".join(SENTENCES),
+        arxiv_url=f"http://arxiv.org/abs/2401.{index:05d}v1",
+        published=date(2024, 1, 2),
+        arxiv_id=f"2401.{index:05d}v1",
+    )
+
+
+def test_fits_a_generous_budget_unchanged():
+    papers = [make_paper(i) for i in range(3)]
+    packed = pack_papers(papers, "test-model", "llm agents", budget=100000)
+    items = loads(packed.content)
+    assert [item["abstract"] for item in items] == [p.abstract.strip() for p in papers]
+    assert packed.tokens == count_tokens(packed.content)
+    assert packed.saved > 0  # compact JSON alone beats the indented form
+
+
+def test_trims_abstracts_to_the_budget():
+    papers = [make_paper(i) for i in range(4)]
+    full = pack_papers(papers, "test-model", "llm agents", budget=100000)
+    budget = full.tokens * 9 // 10
+    packed = pack_papers(papers, "test-model", "llm agents", budget=budget)
+    assert packed.tokens <= budget
+    items = loads(packed.content)
+    assert any(item["abstract"] != " ".join(SENTENCES) for item in items)
+    for item in items:
+        kept = [s for s in SENTENCES if s in item["abstract"]]
+        assert len(kept) >= 2
+        # Remaining sentences keep their original order
+        assert item["abstract"] == " ".join(kept)
+
+
+def test_drops_excerpts_before_abstract_sentences():
+    papers = [make_paper(i) for i in range(2)]
+    excerpts = {p.key: ["Full text passage about agent planning. " * 20] * 3 for p in papers}
+    without = pack_papers(papers, "test-model", "llm agents", budget=100000)
+    packed = pack_papers(papers, "test-model", "llm agents", excerpts, budget=without.tokens + 5)
+    assert packed.tokens <= without.tokens + 5
+    for item in loads(packed.content):
+        assert item["abstract"] == " ".join(SENTENCES)
+
+
+def test_never_trims_below_minimum_sentences():
+    packed = pack_papers([make_paper(1)], "test-model", "llm agents", budget=1)
+    (item,) = loads(packed.content)
+    assert len([s for s in SENTENCES if s in item["abstract"]]) == 2
+
+
+def test_compact_paper_shortens_authors_and_date():
+    item = compact_paper(make_paper(1, authors=8), max_authors=2)
+    assert item["authors"] == ["Author 0", "Author 1", "et al."]
+    assert item["year"] == 2024
+    assert "arxiv_id" not in item and "published" not in item
+
+
+def test_pack_paper_message_packs_paper_lists_only():
+    papers = [make_paper(i) for i in range(3)]
+    packed = pack_paper_message(dumps(papers), "test-model", "llm agents")
+    assert packed is not None
+    assert packed.content == pack_papers(papers, "test-model", "llm agents").content
+    for text in ("Agentic AI", "[]", "[1, 2]", '{"title": "x"}', "[{\"name\": \"x\"}]"):
+        assert pack_paper_message(text, "test-model") is None
+
+
+@pytest.mark.asyncio
+async def test_team_mode_context_packs_the_tool_result():
+    from autogen_core.models import UserMessage
+
+    import agents
+    from constants import ARXIV_RESEARCH_AGENT_NAME
+
+    papers = [make_paper(i, authors=8) for i in range(3)]
+    context = agents.PackedPapersContext("test-model")
+    await context.add_message(UserMessage(content="llm agents", source="user"))
+    await context.add_message(UserMessage(content=dumps(papers), source=ARXIV_RESEARCH_AGENT_NAME))
+
+    topic, tool_result = await context.get_messages()
+    assert topic.content == "llm agents"
+    assert tool_result.content == pack_papers(papers, "test-model", "llm agents").content
+    await context.clear()
+    assert await context.get_messages() == []
@@ -0,0 +1,81 @@
+from datetime import date
+
+from paper import Paper, PaperStreamParser, dumps, papers_from_json
+
+PAPERS = [
+    Paper(
+        title="Agents [and] tools",
+        authors=("Ada Lovelace", "Alan Turing"),
+        abstract='We study {nested} "quotes" and ] brackets in text.',
+        arxiv_url="http://arxiv.org/abs/2401.00001v1",
+        published=date(2024, 1, 2),
+        arxiv_id="2401.00001v1",
+        categories=("cs.AI", "cs.CL"),
+    ),
+    Paper(
+        title="Second paper",
+        authors=("Grace Hopper",),
+        abstract="Plain abstract.",
+        arxiv_url="http://arxiv.org/abs/2401.00002v2",
+        published=None,
+        arxiv_id="2401.00002v2",
+    ),
+]
+
+
+def test_parses_whole_array():
+    parser = PaperStreamParser()
+    assert parser.feed(dumps(PAPERS)) == PAPERS
+    assert parser.complete
+
+
+def test_parses_chunks_split_anywhere():
+    text = dumps(PAPERS, indent=True)
+    for size in (1, 2, 7, 50):
+        parser = PaperStreamParser()
+        completed = []
+        for start in range(0, len(text), size):
+            completed.extend(parser.feed(text[start:start + size]))
+        assert completed == PAPERS
+        assert parser.papers == PAPERS
+
+
+def test_reports_each_paper_when_its_object_closes():
+    text = dumps(PAPERS)
+    split = text.index("},") + 1
+    parser = PaperStreamParser()
+    assert parser.feed(text[:split]) == PAPERS[:1]
+    assert parser.feed(text[split:]) == PAPERS[1:]
+
+
+def test_brackets_inside_strings_do_not_end_the_array():
+    parser = PaperStreamParser()
+    parser.feed(dumps(PAPERS[:1]))
+    assert parser.papers == PAPERS[:1]
+    assert parser.papers[0].abstract == PAPERS[0].abstract
+
+
+def test_ignores_prose_and_code_fence_before_the_array():
+    text = "Here are the papers I found:\n```json\n" + dumps(PAPERS, indent=True) + "\n```\nDone [1]."
+    parser = PaperStreamParser()
+    assert parser.feed(text) == PAPERS
+    assert parser.complete
+    # Text after the array is ignored
+    assert parser.feed('[{"title": "late"}]') == []
+
+
+def test_without_array_finds_nothing():
+    parser = PaperStreamParser()
+    assert parser.feed("No papers were found for this topic.") == []
+    assert not parser.complete
+
+
+def test_json_round_trip_keeps_categories():
+    assert papers_from_json(dumps(PAPERS)) == PAPERS
+    assert "categories" not in dumps(PAPERS[1])
+
+
+def test_text_that_is_not_a_paper_list_is_not_parsed():
+    assert papers_from_json("not json") is None
+    assert papers_from_json('[{"name": "x"}]') is None
+    assert papers_from_json("[]") is None
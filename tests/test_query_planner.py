@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+from query_planner import is_structured, merge_results, normalize_topic, plan_query
+from paper import Paper
+
+
+def test_equivalent_topics_share_a_key():
+    assert normalize_topic("LLMs") == normalize_topic("Large Language Models")
+    assert normalize_topic("large-language model") == "large language model"
+
+
+@pytest.mark.parametrize(
+    "topic, phrase",
+    [
+        ("Time Series Forecasting", "time series forecasting"),
+        ("Gaussian  Processes", "gaussian processes"),
+        ("Kubernetes bias in Species data", "kubernetes bias in species data"),
+    ],
+)
+def test_unindexed_topic_is_searched_with_the_users_words(topic, phrase):
+    plan = plan_query(topic)
+    assert plan.phrase == phrase
+    assert plan.subqueries == (f'ti:"{phrase}"', f'abs:"{phrase}"', phrase)
+    assert plan.topic == normalize_topic(topic)
+
+
+def test_indexed_topic_uses_index_phrases_and_categories():
+    plan = plan_query("LLMs")
+    assert plan.topic == "large language model"
+    assert plan.subqueries[0] == 'ti:"large language models"'
+    assert "cat:cs.CL" in plan.subqueries[1]
+    assert plan.categories == ("cs.CL", "cs.AI", "cs.LG")
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        'ti:"agentic workflows" AND cat:cs.AI',
+        "au:hinton",
+        "transformers ANDNOT vision",
+        '"exact phrase"',
+        "(agents OR tools)",
+    ],
+)
+def test_arxiv_syntax_is_passed_through(query):
+    assert is_structured(query)
+    assert plan_query(query).subqueries == (query,)
+
+
+def test_lower_case_words_are_not_operators():
+    assert not is_structured("search and rescue robots")
+    assert not is_structured("Time Series Forecasting")
+
+
+def test_merge_keeps_each_paper_once_in_rank_order():
+    def paper(arxiv_id):
+        return Paper(arxiv_id, (), "", "", None, arxiv_id)
+
+    first = [paper("1v1"), paper("2v1")]
+    second = [paper("1v2"), paper("3v1")]
+    merged = merge_results([first, second], 5)
+    assert [p.arxiv_id for p in merged] == ["1v1", "2v1", "3v1"]
+
+
+def test_local_corpus_is_asked_once_with_phrase_and_categories(monkeypatch):
+    import query_planner
+
+    local_calls = []
+    fetches = []
+    found = [Paper("LLM paper", (), "", "", None, "1v1", ("cs.CL",))]
+
+    def fake_local(query, max_results, categories=()):
+        local_calls.append((query, max_results, tuple(categories)))
+        return found
+
+    async def fake_fetch(*args, **kwargs):
+        fetches.append(args)
+        return []
+
+    monkeypatch.setattr(query_planner, "VECTOR_INDEX_ENABLED", True)
+    monkeypatch.setattr(query_planner, "search_local_corpus", fake_local)
+    monkeypatch.setattr(query_planner, "arxiv_research_async", fake_fetch)
+    papers = asyncio.run(query_planner.search_papers("LLMs", max_results=1, sort_by="Relevance"))
+    assert papers == found
+    assert local_calls == [("llms", 1, ("cs.CL", "cs.AI", "cs.LG"))]
+    assert fetches == []
+
+
+def test_sub_queries_skip_the_local_index(monkeypatch):
+    import query_planner
+
+    fetches = []
+
+    async def fake_fetch(query, *args, **kwargs):
+        fetches.append((query, kwargs.get("use_index")))
+        return [Paper(query, (), "", "", None, f"{len(fetches)}v1")]
+
+    monkeypatch.setattr(query_planner, "VECTOR_INDEX_ENABLED", False)
+    monkeypatch.setattr(query_planner, "arxiv_research_async", fake_fetch)
+    papers = asyncio.run(query_planner.search_papers("Time Series Forecasting", max_results=5))
+    assert len(papers) == 3
+    assert all(use_index is False for _, use_index in fetches)
+
+
+def test_local_corpus_filters_by_category(tmp_path, monkeypatch):
+    import utils
+    import vector_index
+    from vector_index import PaperIndex
+
+    index = PaperIndex(str(tmp_path))
+    text = "retrieval augmented generation with large language models"
+    index.add([
+        Paper(text, (), text, "http://arxiv.org/abs/1v1", None, "1v1", ("cs.IR",)),
+        Paper(text, (), text, "http://arxiv.org/abs/2v1", None, "2v1", ("cs.CL",)),
+    ])
+    monkeypatch.setattr(vector_index, "get_paper_index", lambda: index)
+    monkeypatch.setattr(utils, "VECTOR_INDEX_MIN_SCORE", 0.5)
+    assert [p.arxiv_id for p in utils.search_local_corpus(text, 1, ("cs.CL",))] == ["2v1"]
+    assert utils.search_local_corpus(text, 1, ("cs.LG",)) is None
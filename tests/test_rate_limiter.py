@@ -0,0 +1,41 @@
+import threading
+import time
+
+from utils import AdaptiveRateLimiter
+
+
+def test_spaces_requests_after_the_burst():
+    limiter = AdaptiveRateLimiter(0.05, burst=1)
+    start = time.monotonic()
+    for _ in range(3):
+        limiter.acquire()
+    assert time.monotonic() - start >= 0.09
+
+
+def test_zero_interval_disables_limiting():
+    limiter = AdaptiveRateLimiter(0)
+    assert all(limiter.acquire() == 0.0 for _ in range(100))
+
+
+def test_backoff_signal_is_not_blocked_by_a_waiting_thread():
+    limiter = AdaptiveRateLimiter(0.5, burst=1)
+    limiter.acquire()
+    waiter = threading.Thread(target=limiter.acquire)
+    waiter.start()
+    time.sleep(0.05)  # the waiter is now sleeping for the next token
+
+    start = time.monotonic()
+    limiter.throttled()
+    assert time.monotonic() - start < 0.1
+    assert limiter.interval == 1.0
+    waiter.join()
+
+
+def test_throttling_slows_down_and_success_recovers():
+    limiter = AdaptiveRateLimiter(1.0, burst=1, max_interval=3.0)
+    limiter.throttled()
+    limiter.throttled()
+    assert limiter.interval == 3.0
+    for _ in range(50):
+        limiter.succeeded()
+    assert limiter.interval == 1.0
@@ -0,0 +1,61 @@
+import asyncio
+
+from routing import RoutedModelClient
+
+
+class SlowClient:
+    """Stands in for a model client whose requests never finish."""
+
+    def __init__(self):
+        self.started = 0
+        self.cancelled = 0
+
+    async def create(self, messages, **kwargs):
+        self.started += 1
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+
+def make_router(clients):
+    return RoutedModelClient(
+        [(f"model-{i}", client) for i, client in enumerate(clients)],
+        default_timeout=60,
+        hedging=True,
+        hedge_min_samples=1,
+    )
+
+
+def cancel_after(router, clients, delay):
+    """Cancel a call after ``delay`` and return each client's (started, cancelled) counts."""
+
+    async def main():
+        task = asyncio.ensure_future(router.create([]))
+        await asyncio.sleep(delay)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        # Let cancelled requests run their handlers; asyncio.run would cancel
+        # leftover requests itself, so count before it returns
+        await asyncio.sleep(0.01)
+        return [(client.started, client.cancelled) for client in clients]
+
+    return asyncio.run(main())
+
+
+def test_cancelling_before_the_hedge_cancels_the_request():
+    primary, backup = SlowClient(), SlowClient()
+    router = make_router([primary, backup])
+    router._latencies["model-0"].append(30.0)
+    assert cancel_after(router, [primary, backup], 0.05) == [(1, 1), (0, 0)]
+
+
+def test_cancelling_after_the_hedge_cancels_both_requests():
+    primary, backup = SlowClient(), SlowClient()
+    router = make_router([primary, backup])
+    router._latencies["model-0"].append(0.01)
+    assert cancel_after(router, [primary, backup], 0.1) == [(1, 1), (1, 1)]
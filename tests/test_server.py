@@ -0,0 +1,96 @@
+import asyncio
+import json
+
+import pytest
+from starlette.testclient import TestClient
+
+import server
+from constants import OPENAI_API_KEY_ENV
+from pipeline import TeamPool
+
+
+@pytest.fixture
+def client():
+    with TestClient(server.app) as test_client:
+        yield test_client
+
+
+@pytest.mark.parametrize("body", [[1, 2], "topic", 3, None])
+def test_rejects_body_that_is_not_an_object(client, body):
+    response = client.post("/research", content=json.dumps(body))
+    assert response.status_code == 400
+
+
+def test_rejects_invalid_json(client):
+    assert client.post("/research", content=b"{not json").status_code == 400
+
+
+@pytest.mark.parametrize("max_results", [True, 0, 1000, "5", 2.5])
+def test_rejects_invalid_max_results(client, max_results):
+    response = client.post("/research", json={"topic": "LLMs", "max_results": max_results})
+    assert response.status_code == 400
+
+
+def test_rejects_missing_topic(client):
+    assert client.post("/research", json={"topic": "  "}).status_code == 400
+
+
+def test_setup_failure_is_reported_as_error_event(client, monkeypatch):
+    monkeypatch.delenv(OPENAI_API_KEY_ENV, raising=False)
+    response = client.post("/research", json={"topic": "LLMs", "mode": "direct"})
+    assert response.status_code == 200
+    assert "event: error" in response.text
+    assert OPENAI_API_KEY_ENV in response.text
+    assert client.get("/healthz").json()["admitted_runs"] == 0
+
+
+def test_disconnect_between_heartbeats_closes_the_stream():
+    closed = asyncio.Event()
+
+    async def idle_stream():
+        try:
+            await asyncio.Event().wait()
+            yield "never"
+        finally:
+            closed.set()
+
+    async def consume(first_ping):
+        async for item in server.with_heartbeat(idle_stream(), 0.01):
+            assert item is None
+            first_ping.set()
+
+    async def main():
+        first_ping = asyncio.Event()
+        task = asyncio.create_task(consume(first_ping))
+        await first_ping.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert closed.is_set()
+
+    asyncio.run(main())
+
+
+def test_disconnect_before_streaming_releases_admission():
+    limiter = server.RunLimiter(1, 0)
+    server.app.state.limiter = limiter
+    server.app.state.teams = TeamPool(1)
+    body = json.dumps({"topic": "LLMs", "mode": "direct"}).encode()
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/research",
+        "headers": [(b"content-type", b"application/json")],
+        "query_string": b"",
+    }
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        # Yield to the loop, so the disconnect is seen before the body starts
+        await asyncio.sleep(0)
+
+    asyncio.run(server.app(scope, receive, send))
+    assert limiter.admitted == 0
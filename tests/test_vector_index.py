@@ -0,0 +1,70 @@
+from datetime import date
+
+from paper import Paper
+from vector_index import PaperIndex
+
+TOPICS = [
+    "graph neural networks for molecule property prediction",
+    "diffusion models for image generation",
+    "reinforcement learning for robot locomotion",
+    "retrieval augmented generation with large language models",
+    "speech recognition with transformers",
+    "protein structure prediction",
+]
+
+
+def make_paper(index: int) -> Paper:
+    return Paper(
+        title=TOPICS[index].capitalize(),
+        authors=("Author",),
+        abstract=f"We study {TOPICS[index]} and report new results on {TOPICS[index]}.",
+        arxiv_url=f"http://arxiv.org/abs/2401.{index:05d}v1",
+        published=date(2024, 1, 1),
+        arxiv_id=f"2401.{index:05d}v1",
+    )
+
+
+def test_search_finds_added_paper(tmp_path):
+    index = PaperIndex(str(tmp_path))
+    assert index.add([make_paper(i) for i in range(4)]) == 4
+    score, paper = index.search(TOPICS[2], 1)[0]
+    assert paper == make_paper(2)
+    assert score > 0.5
+
+
+def test_add_skips_known_papers(tmp_path):
+    index = PaperIndex(str(tmp_path))
+    index.add([make_paper(0), make_paper(1)])
+    assert index.add([make_paper(1), make_paper(2), make_paper(2)]) == 1
+    assert len(index) == 3
+    assert len(PaperIndex(str(tmp_path))) == 3
+
+
+def test_sees_rows_appended_by_another_writer(tmp_path):
+    # Two instances on one directory stand in for two processes
+    reader = PaperIndex(str(tmp_path))
+    writer = PaperIndex(str(tmp_path))
+    reader.add([make_paper(0)])
+    writer.add([make_paper(1), make_paper(2)])
+    reader.add([make_paper(3)])
+    writer.add([make_paper(4)])
+
+    for index in (reader, writer, PaperIndex(str(tmp_path))):
+        for i in range(5):
+            score, paper = index.search(TOPICS[i], 1)[0]
+            assert paper == make_paper(i)
+            assert score > 0.5
+        assert len(index) == 5
+
+
+def test_repairs_interrupted_write(tmp_path):
+    index = PaperIndex(str(tmp_path))
+    index.add([make_paper(0), make_paper(1)])
+    with open(tmp_path / "embeddings.f32", "ab") as f:
+        f.write(b"\0" * (4 * index.dim))  # matrix row without its paper
+
+    reopened = PaperIndex(str(tmp_path))
+    assert len(reopened) == 2
+    assert reopened.add([make_paper(2)]) == 1
+    assert reopened.search(TOPICS[2], 1)[0][1] == make_paper(2)
+    assert index.search(TOPICS[2], 1)[0][1] == make_paper(2)
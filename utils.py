@@ -2,53 +2,388 @@
 Utility functions for ArXiv research and data processing.
 """
 
-from typing import List, Dict
-import arxiv
+from typing import TYPE_CHECKING, List, Optional, Sequence
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import contextvars
+import functools
+import hashlib
+import random
+import threading
+import time
 import logging
+from cache import ResultCache
+from paper import Paper, papers_from_dicts
+from prompts import CACHED_SUMMARY_PROMPTS
+from constants import (
+    ARXIV_SORT_CRITERION,
+    ARXIV_SORT_ORDER,
+    ARXIV_CACHE_ENABLED,
+    ARXIV_CACHE_PATH,
+    ARXIV_CACHE_TTL_SECONDS,
+    ARXIV_CACHE_MAX_ENTRIES,
+    ARXIV_MAX_WORKERS,
+    ARXIV_DELAY_SECONDS,
+    ARXIV_BURST,
+    ARXIV_BACKOFF_BASE_SECONDS,
+    ARXIV_BACKOFF_MAX_SECONDS,
+    OPENAI_MODEL2,
+    SUMMARY_CACHE_PATH,
+    SUMMARY_CACHE_TTL_SECONDS,
+    SUMMARY_CACHE_MAX_ENTRIES,
+    VECTOR_INDEX_ENABLED,
+    VECTOR_INDEX_MIN_SCORE,
+)
+from metrics import REGISTRY
+
+# arxiv, requests and numpy (through vector_index) take a noticeable part of
+# a cold start, so they are imported on first search rather than with this
+# module, which the UI and API import at startup.
+if TYPE_CHECKING:
+    from arxiv_client import ThrottledArxivClient
 
 logger = logging.getLogger(__name__)
 
+_arxiv_cache: Optional[ResultCache] = None
+_summary_cache: Optional[ResultCache] = None
+_cache_lock = threading.Lock()
+
+# arXiv boolean operators are case-sensitive ("a and b" searches for three words)
+_BOOLEAN_OPERATORS = frozenset(("AND", "OR", "ANDNOT"))
+
+# Local matches examined per wanted result when filtering by category
+_CATEGORY_CANDIDATES = 5
+
+# The arxiv client is blocking, so async callers run it on this pool rather
+# than on the event loop thread.
+_arxiv_executor = ThreadPoolExecutor(
+    max_workers=ARXIV_MAX_WORKERS, thread_name_prefix="arxiv"
+)
+
+
+def get_arxiv_cache() -> ResultCache:
+    """
+    Return the process-wide arXiv result cache, opening it on first use.
+    
+    Returns:
+        ResultCache: Shared cache for arXiv search results.
+    """
+    global _arxiv_cache
+    with _cache_lock:
+        if _arxiv_cache is None:
+            _arxiv_cache = ResultCache(
+                ARXIV_CACHE_PATH,
+                ttl_seconds=ARXIV_CACHE_TTL_SECONDS,
+                max_entries=ARXIV_CACHE_MAX_ENTRIES,
+            )
+        return _arxiv_cache
+
+
+def prompt_version(model_name: str, prompt: str) -> str:
+    """
+    Fingerprint a model and system prompt.
+    
+    Args:
+        model_name (str): Model the prompt is sent to.
+        prompt (str): System prompt text.
+        
+    Returns:
+        str: Short hash that changes whenever either input changes.
+    """
+    return hashlib.sha256(f"{model_name}\n{prompt}".encode("utf-8")).hexdigest()[:12]
+
+
+def summary_cache_key(papers: List[Paper], model_name: str, prompt: str, variant: str = "") -> str:
+    """
+    Build the content-addressed cache key for a summary.
+    
+    The key is ``<prompt version>:<hash of sorted paper IDs>``, so the same
+    set of papers hits the cache regardless of order, and editing the prompt
+    or switching model produces new keys.
+    
+    Args:
+        papers (List[Paper]): Papers being summarized.
+        model_name (str): Summarizer model.
+        prompt (str): Summarizer system prompt.
+        variant (str): Appended to the key when the summarizer saw more than
+            the papers themselves (e.g. "fulltext").
+        
+    Returns:
+        str: Cache key.
+    """
+    ids = "\n".join(sorted(p.key for p in papers))
+    digest = hashlib.sha256(ids.encode("utf-8")).hexdigest()
+    key = f"{prompt_version(model_name, prompt)}:{digest}"
+    return f"{key}:{variant}" if variant else key
+
 
-def arxiv_research(query: str, max_results: int = 5) -> List[Dict]:
+def get_summary_cache() -> ResultCache:
+    """
+    Return the process-wide summary cache, opening it on first use.
+    
+    On open, entries written for another summarizer model or for an older
+    version of the prompts in CACHED_SUMMARY_PROMPTS are dropped, so editing
+    prompts.py invalidates old summaries.
+    
+    Returns:
+        ResultCache: Shared cache for generated summaries.
+    """
+    global _summary_cache
+    with _cache_lock:
+        if _summary_cache is None:
+            cache = ResultCache(
+                SUMMARY_CACHE_PATH,
+                ttl_seconds=SUMMARY_CACHE_TTL_SECONDS,
+                max_entries=SUMMARY_CACHE_MAX_ENTRIES,
+            )
+            removed = cache.retain_prefixes([
+                prompt_version(OPENAI_MODEL2, prompt) + ":" for prompt in CACHED_SUMMARY_PROMPTS
+            ])
+            if removed:
+                logger.info(f"Invalidated {removed} summaries from an older prompt version")
+            _summary_cache = cache
+        return _summary_cache
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a search query so equivalent spellings share a cache entry.
+    
+    Boolean operators (AND, OR, ANDNOT) keep their case, since arXiv only
+    treats them as operators in upper case.
+    
+    Args:
+        query (str): Raw search query.
+        
+    Returns:
+        str: Lower-cased query with collapsed whitespace.
+    """
+    return " ".join(
+        word if word in _BOOLEAN_OPERATORS else word.lower() for word in query.split()
+    )
+
+
+def arxiv_cache_key(query: str, max_results: int, sort_by: str, sort_order: str) -> str:
+    """
+    Build the cache key for an arXiv search.
+    
+    Args:
+        query (str): The search query.
+        max_results (int): Maximum number of results requested.
+        sort_by (str): Name of the arxiv.SortCriterion member.
+        sort_order (str): Name of the arxiv.SortOrder member.
+        
+    Returns:
+        str: Key identifying the normalized search.
+    """
+    return "|".join([normalize_query(query), str(max_results), sort_by, sort_order])
+
+
+def search_local_corpus(
+    query: str, max_results: int, categories: Sequence[str] = ()
+) -> Optional[List[Paper]]:
+    """
+    Answer a query from the local paper index if it has enough close matches.
+    
+    Args:
+        query (str): The search query, in plain words (not arXiv syntax).
+        max_results (int): Number of papers needed.
+        categories (Sequence[str]): If given, only papers known to be in one
+            of these arXiv categories count as matches.
+        
+    Returns:
+        Optional[List[Paper]]: max_results papers that all score at least
+            VECTOR_INDEX_MIN_SCORE, or None if the local corpus cannot answer.
+    """
+    from vector_index import get_paper_index
+    
+    wanted = set(categories)
+    k = max_results * _CATEGORY_CANDIDATES if wanted else max_results
+    matches = get_paper_index().search(query, k)
+    if wanted:
+        matches = [m for m in matches if wanted.intersection(m[1].categories)][:max_results]
+    if len(matches) < max_results or matches[-1][0] < VECTOR_INDEX_MIN_SCORE:
+        return None
+    return [paper for _, paper in matches]
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """
+    Return a "full jitter" backoff delay for a retry.
+    
+    Args:
+        attempt (int): Retry number, starting at 1.
+        base (float): Delay scale in seconds.
+        cap (float): Maximum delay in seconds.
+    
+    Returns:
+        float: Seconds to wait, uniformly drawn from [0, min(cap, base * 2**attempt)].
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class AdaptiveRateLimiter:
+    """
+    Thread-safe token-bucket rate limiter that slows down when throttled.
+    
+    ``acquire`` blocks the calling thread until a token is available. Each
+    ``throttled`` call halves the refill rate (down to a floor); each
+    ``succeeded`` call moves it a step back toward the configured rate.
+    """
+    
+    def __init__(self, min_interval: float, burst: int = 1, max_interval: float = 60.0):
+        """
+        Initialize the limiter.
+        
+        Args:
+            min_interval (float): Seconds between requests at full speed; 0
+                disables limiting.
+            burst (int): Maximum number of requests allowed back to back.
+            max_interval (float): Slowest spacing reached after repeated throttling.
+        """
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.interval = min_interval
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> float:
+        """
+        Wait until a token is available and consume it.
+        
+        Returns:
+            float: Seconds spent waiting.
+        """
+        if self.min_interval <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated_at) / self.interval)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) * self.interval
+            # Sleep without the lock, so throttled()/succeeded() from other
+            # threads take effect on the next check rather than after the wait
+            time.sleep(delay)
+            waited += delay
+    
+    def throttled(self) -> None:
+        """Halve the request rate after the server pushed back."""
+        with self._lock:
+            self.interval = min(self.max_interval, max(self.interval, 0.1) * 2)
+    
+    def succeeded(self) -> None:
+        """Recover part of the request rate after a successful request."""
+        with self._lock:
+            self.interval = max(self.min_interval, self.interval * 0.9)
+
+
+_arxiv_limiter: Optional[AdaptiveRateLimiter] = None
+_arxiv_client: Optional["ThrottledArxivClient"] = None
+_arxiv_client_lock = threading.Lock()
+
+
+def get_arxiv_limiter() -> AdaptiveRateLimiter:
+    """Return the process-wide arXiv rate limiter, creating it on first use."""
+    global _arxiv_limiter
+    with _arxiv_client_lock:
+        if _arxiv_limiter is None:
+            _arxiv_limiter = AdaptiveRateLimiter(
+                ARXIV_DELAY_SECONDS, ARXIV_BURST, ARXIV_BACKOFF_MAX_SECONDS
+            )
+        return _arxiv_limiter
+
+
+def get_arxiv_client() -> "ThrottledArxivClient":
+    """Return the process-wide arXiv client, creating it on first use."""
+    from arxiv_client import ThrottledArxivClient
+    
+    global _arxiv_client
+    limiter = get_arxiv_limiter()
+    with _arxiv_client_lock:
+        if _arxiv_client is None:
+            _arxiv_client = ThrottledArxivClient(limiter)
+        return _arxiv_client
+
+
+def arxiv_research(
+    query: str,
+    max_results: int = 5,
+    sort_by: str = ARXIV_SORT_CRITERION,
+    sort_order: str = ARXIV_SORT_ORDER,
+    use_cache: bool = ARXIV_CACHE_ENABLED,
+    use_index: bool = VECTOR_INDEX_ENABLED,
+) -> List[Paper]:
     """
     Search arXiv.org for papers matching the query.
     
+    Results are served from the on-disk cache when the same normalized search
+    was made within ARXIV_CACHE_TTL_SECONDS. With the local index enabled,
+    relevance searches are next answered from previously fetched papers when
+    enough of them are close matches; otherwise arXiv is queried, and the new
+    papers are indexed and re-ranked semantically against the query.
+    
     Args:
         query (str): The search query for arXiv papers.
         max_results (int): Maximum number of results to return. Default is 5.
+        sort_by (str): arxiv.SortCriterion member name. Default is ARXIV_SORT_CRITERION.
+        sort_order (str): arxiv.SortOrder member name. Default is ARXIV_SORT_ORDER.
+        use_cache (bool): Whether to read and populate the result cache.
+        use_index (bool): Whether to use and populate the local paper index.
     
     Returns:
-        List[Dict]: A list of paper dictionaries containing:
-            - title: Paper title
-            - authors: List of author names
-            - abstract: Paper summary
-            - arxiv_url: URL to the paper
-            - published: Publication date in YYYY-MM-DD format
+        List[Paper]: The papers found, best first.
             
     Raises:
         Exception: If the arXiv API request fails.
     """
+    cache_key = arxiv_cache_key(query, max_results, sort_by, sort_order)
+    if use_cache:
+        cached = get_arxiv_cache().get(cache_key)
+        if cached is not None:
+            REGISTRY.inc("cache_hits_total", cache="arxiv")
+            logger.info(f"Cache hit for arXiv query: {query}")
+            return papers_from_dicts(cached)
+        REGISTRY.inc("cache_misses_total", cache="arxiv")
+    
+    # Date-sorted searches want the newest papers, which only arXiv knows
+    use_local = use_index and sort_by == "Relevance"
+    if use_local:
+        local = search_local_corpus(query, max_results)
+        if local is not None:
+            REGISTRY.inc("cache_hits_total", cache="local_corpus")
+            logger.info(f"Answered arXiv query from local corpus: {query}")
+            if use_cache:
+                get_arxiv_cache().set(cache_key, local)
+            return local
+    
+    import arxiv
+    from vector_index import get_paper_index
+    
     try:
-        client = arxiv.Client()
+        client = get_arxiv_client()
         search = arxiv.Search(
             query=query,
             max_results=max_results,
-            sort_by=arxiv.SortCriterion.Relevance,
-            sort_order=arxiv.SortOrder.Descending,
+            sort_by=arxiv.SortCriterion[sort_by],
+            sort_order=arxiv.SortOrder[sort_order],
         )
         
-        papers: List[Dict] = []
-        for result in client.results(search):
-            paper = {
-                "title": result.title,
-                "authors": [author.name for author in result.authors],
-                "abstract": result.summary,
-                "arxiv_url": result.entry_id,
-                "published": result.published.strftime("%Y-%m-%d"),
-            }
-            papers.append(paper)
+        papers = [Paper.from_result(result) for result in client.results(search)]
         
         logger.info(f"Successfully fetched {len(papers)} papers for query: {query}")
+        if use_index:
+            get_paper_index().add(papers)
+        if use_local:
+            papers = get_paper_index().rerank(query, papers)
+        if use_cache:
+            get_arxiv_cache().set(cache_key, papers)
         return papers
         
     except Exception as e:
@@ -56,22 +391,104 @@ def arxiv_research(query: str, max_results: int = 5) -> List[Dict]:
         raise
 
 
-def format_papers_for_display(papers: List[Dict]) -> str:
+async def arxiv_research_async(
+    query: str,
+    max_results: int = 5,
+    sort_by: str = ARXIV_SORT_CRITERION,
+    sort_order: str = ARXIV_SORT_ORDER,
+    use_cache: bool = ARXIV_CACHE_ENABLED,
+    use_index: bool = VECTOR_INDEX_ENABLED,
+) -> List[Paper]:
+    """
+    Non-blocking wrapper around arxiv_research.
+    
+    The search runs on a dedicated thread pool so the event loop keeps serving
+    other agents and sessions while arXiv responds. It is recorded as the
+    ``arxiv_fetch`` stage; the current context (and so the run trace) is
+    carried into the worker thread.
+    
+    Args:
+        query (str): The search query for arXiv papers.
+        max_results (int): Maximum number of results to return. Default is 5.
+        sort_by (str): arxiv.SortCriterion member name. Default is ARXIV_SORT_CRITERION.
+        sort_order (str): arxiv.SortOrder member name. Default is ARXIV_SORT_ORDER.
+        use_cache (bool): Whether to read and populate the result cache.
+        use_index (bool): Whether to use and populate the local paper index.
+    
+    Returns:
+        List[Paper]: Papers, as returned by arxiv_research.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    with REGISTRY.span("arxiv_fetch"):
+        return await loop.run_in_executor(
+            _arxiv_executor,
+            functools.partial(
+                context.run,
+                arxiv_research,
+                query,
+                max_results=max_results,
+                sort_by=sort_by,
+                sort_order=sort_order,
+                use_cache=use_cache,
+                use_index=use_index,
+            ),
+        )
+
+
+def format_papers_for_display(papers: List[Paper]) -> str:
     """
     Format papers list into a readable string format.
     
     Args:
-        papers (List[Dict]): List of paper dictionaries.
+        papers (List[Paper]): List of papers.
         
     Returns:
         str: Formatted string representation of papers.
     """
     formatted = "📚 Research Papers Found:\n\n"
     for idx, paper in enumerate(papers, 1):
-        formatted += f"{idx}. **{paper['title']}**\n"
-        formatted += f"   Authors: {', '.join(paper['authors'][:3])}"
-        if len(paper['authors']) > 3:
-            formatted += f", +{len(paper['authors']) - 3} more"
-        formatted += f"\n   Published: {paper['published']}\n"
-        formatted += f"   URL: {paper['arxiv_url']}\n\n"
+        formatted += f"{idx}. **{paper.title}**\n"
+        formatted += f"   Authors: {', '.join(paper.authors[:3])}"
+        if len(paper.authors) > 3:
+            formatted += f", +{len(paper.authors) - 3} more"
+        formatted += f"\n   Published: {paper.published or 'Unknown'}\n"
+        formatted += f"   URL: {paper.arxiv_url}\n\n"
     return formatted
+
+
+class AsyncRateLimiter:
+    """
+    Token-bucket rate limiter for async callers.
+    
+    Tokens refill continuously at ``rate_per_minute``; ``acquire`` waits until
+    one is available. Waiters are served in arrival order.
+    """
+    
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        """
+        Initialize the limiter.
+        
+        Args:
+            rate_per_minute (float): Sustained number of acquisitions per minute.
+            burst (int): Maximum number of acquisitions allowed back to back.
+        """
+        self.rate_per_second = rate_per_minute / 60.0
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self) -> None:
+        """Wait until a token is available and consume it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated_at) * self.rate_per_second
+                )
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate_per_second)
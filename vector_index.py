@@ -0,0 +1,353 @@
+"""
+Local vector index over fetched papers.
+This module keeps every paper returned by arXiv in an on-disk embedding index
+so results can be re-ranked semantically and related topics can be answered
+without a network call.
+
+Embeddings are computed on the CPU with the hashing trick (no model download),
+stored as a float32 matrix that is memory-mapped from disk, and searched
+through random-hyperplane LSH buckets.
+"""
+
+import math
+import os
+import re
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from paper import Paper, dumps, loads
+from constants import (
+    VECTOR_INDEX_DIR,
+    VECTOR_INDEX_DIM,
+    VECTOR_INDEX_LSH_BITS,
+)
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, see PaperIndex
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the this "
+    "to was we were which with our their these those can via using based".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lower-case word tokens without stopwords.
+
+    Args:
+        text (str): Input text.
+
+    Returns:
+        List[str]: Tokens in order.
+    """
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def embed(text: str, dim: int = VECTOR_INDEX_DIM) -> np.ndarray:
+    """
+    Embed text with signed feature hashing of unigrams and bigrams.
+
+    Args:
+        text (str): Input text.
+        dim (int): Embedding dimension.
+
+    Returns:
+        np.ndarray: L2-normalized float32 vector of shape (dim,).
+    """
+    tokens = tokenize(text)
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    counts: Dict[str, int] = {}
+    for feature in features:
+        counts[feature] = counts.get(feature, 0) + 1
+
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature, count in counts.items():
+        h = zlib.crc32(feature.encode("utf-8"))
+        sign = 1.0 if h & 0x80000000 else -1.0
+        vector[h % dim] += sign * (1.0 + math.log(count))
+
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+def paper_text(paper: Paper) -> str:
+    """Return the text a paper is embedded from (title weighted over abstract)."""
+    return f"{paper.title} {paper.title} {paper.abstract}"
+
+
+class PaperIndex:
+    """
+    Append-only on-disk embedding index of papers.
+
+    Files in ``directory``:
+        - ``embeddings.f32``: row-major float32 matrix, one row per paper
+        - ``papers.jsonl``: papers (dictionary form) in the same row order
+        - ``index.lock``: lock file taken around every read and append
+
+    Several processes (the UI, API workers, harvest.py) may share the
+    directory: appends hold an exclusive ``fcntl`` lock, and every search
+    first picks up rows other processes appended since the last one. Where
+    ``fcntl`` is unavailable (Windows) only one process may write at a time.
+    """
+
+    def __init__(
+        self,
+        directory: str = VECTOR_INDEX_DIR,
+        dim: int = VECTOR_INDEX_DIM,
+        lsh_bits: int = VECTOR_INDEX_LSH_BITS,
+    ):
+        """
+        Open (or create) the index.
+
+        Args:
+            directory (str): Directory holding the index files.
+            dim (int): Embedding dimension.
+            lsh_bits (int): Number of random hyperplanes per LSH signature.
+        """
+        self.directory = directory
+        self.dim = dim
+        self._matrix_path = os.path.join(directory, "embeddings.f32")
+        self._papers_path = os.path.join(directory, "papers.jsonl")
+        self._lock_path = os.path.join(directory, "index.lock")
+        self._lock = threading.Lock()
+        self._planes = np.random.default_rng(0).standard_normal((lsh_bits, dim)).astype(np.float32)
+        self._bit_weights = 1 << np.arange(lsh_bits, dtype=np.int64)
+
+        self.papers: List[Paper] = []
+        self._ids: Dict[str, int] = {}
+        self._buckets: Dict[int, List[int]] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_bytes = 0
+        self._papers_bytes = 0
+        self._indexed = 0
+
+        os.makedirs(directory, exist_ok=True)
+        with self._lock, self._file_lock(exclusive=True):
+            self._sync(repair=True)
+
+    def __len__(self) -> int:
+        return self._indexed
+
+    def add(self, papers: List[Paper]) -> int:
+        """
+        Add papers that are not indexed yet.
+
+        Args:
+            papers (List[Paper]): Papers from utils.arxiv_research.
+
+        Returns:
+            int: Number of papers added.
+        """
+        with self._lock, self._file_lock(exclusive=True):
+            # Rows appended by other processes decide what is new and where it goes
+            self._sync(repair=True)
+            new = []
+            seen = set(self._ids)
+            for paper in papers:
+                paper_id = self._paper_id(paper)
+                if paper_id and paper_id not in seen:
+                    seen.add(paper_id)
+                    new.append(paper)
+            if not new:
+                return 0
+
+            vectors = np.stack([embed(paper_text(p), self.dim) for p in new])
+            with open(self._matrix_path, "ab") as f:
+                f.write(vectors.tobytes())
+            with open(self._papers_path, "a", encoding="utf-8") as f:
+                for paper in new:
+                    f.write(dumps(paper) + "\n")
+            self._sync(repair=False)
+        logger.debug(f"Indexed {len(new)} new papers ({self._indexed} total)")
+        return len(new)
+
+    def search(self, query: str, k: int) -> List[Tuple[float, Paper]]:
+        """
+        Find the papers most similar to a query.
+
+        Candidates come from the query's LSH bucket and all buckets one bit
+        away; if that yields too few, the whole matrix is scanned.
+
+        Args:
+            query (str): Free-text query.
+            k (int): Number of results.
+
+        Returns:
+            List[Tuple[float, Paper]]: (cosine similarity, paper) pairs, best first.
+        """
+        with self._lock:
+            if self._files_changed():
+                with self._file_lock(exclusive=False):
+                    self._sync(repair=False)
+            if self._matrix is None or not self._indexed:
+                return []
+            q = embed(query, self.dim)
+            signature = int(self._signatures(q[None, :])[0])
+            candidates: List[int] = list(self._buckets.get(signature, []))
+            for bit in range(len(self._planes)):
+                candidates.extend(self._buckets.get(signature ^ (1 << bit), []))
+
+            if len(candidates) < k:
+                rows = np.arange(self._indexed)
+            else:
+                rows = np.fromiter(set(candidates), dtype=np.int64)
+            scores = self._matrix[rows] @ q
+            top = np.argsort(-scores)[:k]
+            return [(float(scores[i]), self.papers[int(rows[i])]) for i in top]
+
+    def rerank(self, query: str, papers: List[Paper]) -> List[Paper]:
+        """
+        Order papers by semantic similarity to a query.
+
+        Args:
+            query (str): Free-text query.
+            papers (List[Paper]): Papers to order.
+
+        Returns:
+            List[Paper]: The same papers, most similar first.
+        """
+        if not papers:
+            return papers
+        q = embed(query, self.dim)
+        scores = [float(embed(paper_text(p), self.dim) @ q) for p in papers]
+        order = sorted(range(len(papers)), key=lambda i: -scores[i])
+        return [papers[i] for i in order]
+
+    @staticmethod
+    def _paper_id(paper: Paper) -> str:
+        """Return the identity of a paper (its arXiv URL)."""
+        return paper.arxiv_url or paper.title
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        """Hold the cross-process lock on the index files (no-op without fcntl)."""
+        if fcntl is None:
+            yield
+            return
+        with open(self._lock_path, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _size(path: str) -> int:
+        """Return the size of a file, or 0 if it does not exist."""
+        try:
+            return os.path.getsize(path)
+        except FileNotFoundError:
+            return 0
+
+    def _files_changed(self) -> bool:
+        """Tell whether the index files differ from what this process has loaded."""
+        return (
+            self._size(self._papers_path) != self._papers_bytes
+            or self._size(self._matrix_path) != self._matrix_bytes
+        )
+
+    def _sync(self, repair: bool) -> None:
+        """
+        Load the rows appended to the index files since the last sync.
+
+        Must be called with the file lock held, exclusively if ``repair``.
+
+        Args:
+            repair (bool): Whether to cut the files back to their consistent
+                rows if an interrupted write left them with different lengths.
+        """
+        size = self._size(self._papers_path)
+        if size < self._papers_bytes:
+            # Another process repaired (rewrote) the files: start over
+            self.papers, self._ids, self._buckets = [], {}, {}
+            self._papers_bytes = self._indexed = 0
+        if size > self._papers_bytes:
+            with open(self._papers_path, "rb") as f:
+                f.seek(self._papers_bytes)
+                data = f.read(size - self._papers_bytes)
+            # Only complete lines; a partial one is read once it is finished
+            complete = data.rfind(b"\n") + 1
+            for line in data[:complete].splitlines():
+                if line.strip():
+                    self.papers.append(Paper.from_dict(loads(line)))
+            self._papers_bytes += complete
+
+        if self._size(self._matrix_path) != self._matrix_bytes:
+            self._load_matrix()
+        rows = min(len(self.papers), self._rows())
+        if repair and len(self.papers) != self._rows():
+            self._truncate(rows)
+        if rows > self._indexed:
+            for row in range(self._indexed, rows):
+                self._ids[self._paper_id(self.papers[row])] = row
+            self._bucket_rows(range(self._indexed, rows), self._matrix[self._indexed:rows])
+            self._indexed = rows
+
+    def _rows(self) -> int:
+        """Return the number of complete rows in the matrix file."""
+        if self._matrix is None:
+            return 0
+        return self._matrix.shape[0]
+
+    def _truncate(self, rows: int) -> None:
+        """Cut both index files back to their first ``rows`` consistent rows."""
+        logger.warning(f"Repairing interrupted paper index write, keeping {rows} rows")
+        del self.papers[rows:]
+        with open(self._papers_path, "w", encoding="utf-8") as f:
+            for paper in self.papers:
+                f.write(dumps(paper) + "\n")
+        self._papers_bytes = self._size(self._papers_path)
+        if os.path.exists(self._matrix_path):
+            with open(self._matrix_path, "r+b") as f:
+                f.truncate(rows * 4 * self.dim)
+        self._load_matrix()
+
+    def _load_matrix(self) -> None:
+        """Memory-map the embedding matrix from disk."""
+        self._matrix_bytes = self._size(self._matrix_path)
+        rows = self._matrix_bytes // (4 * self.dim)
+        if rows == 0:
+            self._matrix = None
+            return
+        self._matrix = np.memmap(
+            self._matrix_path, dtype=np.float32, mode="r", shape=(rows, self.dim)
+        )
+
+    def _signatures(self, vectors: np.ndarray) -> np.ndarray:
+        """Return the LSH signature of each row as an integer."""
+        bits = (vectors @ self._planes.T) > 0
+        return bits.astype(np.int64) @ self._bit_weights
+
+    def _bucket_rows(self, rows, vectors: np.ndarray) -> None:
+        """Insert rows into their LSH buckets."""
+        for row, signature in zip(rows, self._signatures(np.asarray(vectors))):
+            self._buckets.setdefault(int(signature), []).append(row)
+
+
+_paper_index: Optional[PaperIndex] = None
+_paper_index_lock = threading.Lock()
+
+
+def get_paper_index() -> PaperIndex:
+    """
+    Return the process-wide paper index, opening it on first use.
+
+    Returns:
+        PaperIndex: Shared local paper index.
+    """
+    global _paper_index
+    with _paper_index_lock:
+        if _paper_index is None:
+            _paper_index = PaperIndex()
+        return _paper_index
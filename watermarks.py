@@ -0,0 +1,171 @@
+"""
+Per-topic watermarks for incremental digests.
+This module remembers, for every monitored topic, which arXiv papers have
+already been summarized, the newest publication date seen and the review
+written so far, so a scheduled re-run only has to summarize what is new.
+"""
+
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import FrozenSet, Iterable, List, Optional
+from cache import SQLiteStore
+from paper import Paper, dumps, loads
+from query_planner import normalize_topic
+from constants import WATERMARK_DB_PATH
+import logging
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True, slots=True)
+class Watermark:
+    """
+    What has been digested for one topic.
+
+    Attributes:
+        topic (str): Topic as it was last given.
+        seen_ids (FrozenSet[str]): Version-less arXiv IDs already summarized.
+        last_published (Optional[date]): Newest publication date seen.
+        review (str): Review written so far (Markdown).
+        updated_at (float): Time of the last update (Unix seconds).
+    """
+
+    topic: str
+    seen_ids: FrozenSet[str]
+    last_published: Optional[date]
+    review: str
+    updated_at: float
+
+    def new_papers(self, papers: Iterable[Paper]) -> List[Paper]:
+        """
+        Return the papers that were not digested before.
+
+        A paper is new if its ID (without version, so revisions count as
+        seen) was never seen and it was not published before the watermark date.
+
+        Args:
+            papers (Iterable[Paper]): Papers just fetched.
+
+        Returns:
+            List[Paper]: New papers, in the given order.
+        """
+        return [
+            p for p in papers
+            if p.base_id not in self.seen_ids
+            and not (p.published and self.last_published and p.published < self.last_published)
+        ]
+
+
+class WatermarkStore(SQLiteStore):
+    """
+    SQLite table of per-topic watermarks, keyed by canonical topic.
+    """
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS watermarks ("
+        " topic_key TEXT PRIMARY KEY,"
+        " topic TEXT NOT NULL,"
+        " seen_ids TEXT NOT NULL,"
+        " last_published TEXT,"
+        " review TEXT NOT NULL,"
+        " updated_at REAL NOT NULL)",
+    )
+
+    def __init__(self, path: str = WATERMARK_DB_PATH):
+        """
+        Open (or create) the watermark database.
+
+        Args:
+            path (str): Path to the SQLite database file.
+        """
+        super().__init__(path)
+
+    def get(self, topic: str) -> Optional[Watermark]:
+        """
+        Look up the watermark of a topic.
+
+        Args:
+            topic (str): Research topic (canonicalized before lookup).
+
+        Returns:
+            Optional[Watermark]: The watermark, or None if the topic was never digested.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT topic, seen_ids, last_published, review, updated_at"
+                " FROM watermarks WHERE topic_key = ?",
+                (normalize_topic(topic),),
+            ).fetchone()
+        if row is None:
+            return None
+        topic, seen_ids, last_published, review, updated_at = row
+        return Watermark(
+            topic=topic,
+            seen_ids=frozenset(loads(seen_ids)),
+            last_published=date.fromisoformat(last_published) if last_published else None,
+            review=review,
+            updated_at=updated_at,
+        )
+
+    def advance(self, topic: str, papers: List[Paper], review: str) -> Watermark:
+        """
+        Record newly digested papers and the merged review of a topic.
+
+        Args:
+            topic (str): Research topic.
+            papers (List[Paper]): Papers summarized in this run.
+            review (str): Review covering every paper digested so far.
+
+        Returns:
+            Watermark: The updated watermark.
+        """
+        previous = self.get(topic)
+        seen_ids = set(previous.seen_ids) if previous else set()
+        seen_ids.update(p.base_id for p in papers)
+        dates = [p.published for p in papers if p.published]
+        if previous and previous.last_published:
+            dates.append(previous.last_published)
+        watermark = Watermark(
+            topic=topic,
+            seen_ids=frozenset(seen_ids),
+            last_published=max(dates) if dates else None,
+            review=review,
+            updated_at=time.time(),
+        )
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO watermarks"
+                " (topic_key, topic, seen_ids, last_published, review, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    normalize_topic(topic),
+                    topic,
+                    dumps(sorted(watermark.seen_ids)),
+                    watermark.last_published.isoformat() if watermark.last_published else None,
+                    review,
+                    watermark.updated_at,
+                ),
+            )
+            self._conn.commit()
+        return watermark
+
+    def delete(self, topic: str) -> None:
+        """Forget a topic, so its next digest starts from scratch."""
+        with self._lock:
+            self._conn.execute("DELETE FROM watermarks WHERE topic_key = ?", (normalize_topic(topic),))
+            self._conn.commit()
+
+
+def merge_reviews(new_summary: str, previous_review: str, day: date) -> str:
+    """
+    Put the summary of new papers on top of the previous review.
+
+    Args:
+        new_summary (str): Summary of the papers that are new today.
+        previous_review (str): Review from earlier runs.
+        day (date): Date of this run, used in the section heading.
+
+    Returns:
+        str: Merged review (Markdown).
+    """
+    return f"## New on {day.isoformat()}\n\n{new_summary}\n\n---\n\n{previous_review}"